@@ -1,117 +1,218 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Optional
 import os
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models.user import User
 from app.models.document import Document
 from app.schemas.document import DocumentResponse
+from app.schemas.job import JobResponse, JobStageResponse
 from app.core.security import get_current_admin_user
-from app.services.document_processor import DocumentProcessor
-from app.services.vector_store import VectorStoreManager
+from app.services.document_processor import DocumentProcessor, FileTooLargeError, InvalidUploadError
+from app.services.ingestion_queue import ingestion_queue
+from app.services.document_lifecycle import remove_document, compact_vector_store as run_compaction
+from app.services.llm_registry import llm_registry
+from app.services.answer_cache import answer_cache, answer_flights
+from app.core.rag_agent import web_search_tool
 from app.config import get_settings
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 settings = get_settings()
 
 document_processor = DocumentProcessor()
-vector_store_manager = VectorStoreManager()
 
-@router.post("/upload", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
+# Multipart overhead (boundaries, part headers) allowed on top of MAX_FILE_SIZE
+UPLOAD_ENVELOPE_BYTES = 64 * 1024
+
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "required": ["file"],
+                "properties": {"file": {"type": "string", "format": "binary"}},
+            }
+        }
+    },
+}
+
+# The body is parsed from request.stream() rather than File(...), which would
+# spool the whole upload before the handler runs
+@router.post(
+    "/upload",
+    response_model=DocumentResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra={"requestBody": UPLOAD_REQUEST_BODY},
+)
 async def upload_document(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    revise: Optional[bool] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Upload and process a document (Admin only)"""
-    # Validate file size
-    file_content = await file.read()
-    file_size = len(file_content)
+    """Upload and process a document (Admin only).
     
-    if file_size > settings.MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE / (1024*1024)}MB"
-        )
+    With revise=true, older completed uploads with the same filename are removed
+    once this one is indexed. Defaults to REPLACE_REVISED_DOCUMENTS.
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File size exceeds maximum allowed size of {settings.MAX_FILE_SIZE / (1024*1024)}MB"
+    )
     
-    # Validate file type
-    if not file.filename.lower().endswith('.pdf'):
+    # Reject before reading anything when the declared body is already too big
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > settings.MAX_FILE_SIZE + UPLOAD_ENVELOPE_BYTES:
+        raise too_large
+    
+    try:
+        # Stream to disk, enforcing the size limit and hashing as we go
+        upload = await document_processor.save_upload(request, settings.MAX_FILE_SIZE)
+    except FileTooLargeError:
+        raise too_large
+    except InvalidUploadError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Only PDF files are supported"
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Upload failed: {str(e)}"
+        )
+    file_path = upload.file_path
+    
+    # Identical file already indexed (or being indexed): keep the existing row
+    duplicate = (await db.execute(
+        select(Document).where(
+            Document.content_hash == upload.content_hash,
+            Document.processed != "failed"
         )
+    )).scalars().first()
+    if duplicate:
+        os.remove(file_path)
+        response.status_code = status.HTTP_200_OK
+        return duplicate
     
     try:
-        # Save file
-        file_path, unique_filename = await document_processor.save_file(file_content, file.filename)
-        
         # Create document record
         document = Document(
-            filename=unique_filename,
-            original_filename=file.filename,
+            filename=upload.filename,
+            original_filename=upload.original_filename,
             file_path=file_path,
-            file_size=file_size,
-            mime_type=file.content_type,
-            processed="processing"
+            file_size=upload.size,
+            mime_type=upload.content_type,
+            content_hash=upload.content_hash,
+            processed="processing",
+            heartbeat_at=datetime.utcnow()  # keeps recovery off it until the queue owns it
         )
         
         db.add(document)
-        db.commit()
-        db.refresh(document)
-        
-        # Process document in background (for production, use Celery or similar)
-        try:
-            chunks = document_processor.process_document(file_path, file.filename)
-            vector_store_manager.add_documents(chunks)
-            
-            document.processed = "completed"
-            db.commit()
-        except Exception as e:
-            document.processed = "failed"
-            db.commit()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Document processing failed: {str(e)}"
-            )
-        
-        return document
-        
+        await db.commit()
+        await db.refresh(document)
     except Exception as e:
+        os.remove(file_path)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Upload failed: {str(e)}"
         )
+    
+    # Extraction, chunking and embedding run in the background; poll /jobs/{id}
+    await ingestion_queue.submit(
+        document.id,
+        file_path,
+        upload.original_filename,
+        revise=settings.REPLACE_REVISED_DOCUMENTS if revise is None else revise,
+    )
+    
+    return document
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get ingestion progress for an uploaded document (Admin only)"""
+    job = ingestion_queue.get(job_id)
+    if job:
+        return JobResponse(
+            id=job.id,
+            document_id=job.document_id,
+            status=job.status,
+            error=job.error,
+            created_at=job.created_at,
+            finished_at=job.finished_at,
+            stages=[
+                JobStageResponse.model_validate(stage)
+                for stage in job.stages.values()
+            ],
+            stats=job.stats,
+        )
+    
+    # Job ran on another worker or before a restart; report the document status
+    document = await db.get(Document, job_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return JobResponse(
+        id=document.id,
+        document_id=document.id,
+        status=document.processed,
+        created_at=document.uploaded_at,
+    )
 
 @router.get("/documents", response_model=List[DocumentResponse])
-def list_documents(
-    db: Session = Depends(get_db),
+async def list_documents(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_admin_user)
 ):
     """List all uploaded documents (Admin only)"""
-    documents = db.query(Document).order_by(Document.uploaded_at.desc()).all()
+    documents = (await db.execute(
+        select(Document).order_by(Document.uploaded_at.desc())
+    )).scalars().all()
     return documents
 
+# Deletion and compaction do blocking vector-store work, so they stay sync and run in the threadpool
 @router.delete("/documents/{document_id}")
 def delete_document(
     document_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin_user)
 ):
-    """Delete a document (Admin only)"""
+    """Delete a document and its vectors (Admin only)"""
     document = db.query(Document).filter(Document.id == document_id).first()
     
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
     
-    # Delete file from filesystem
-    try:
-        if os.path.exists(document.file_path):
-            os.remove(document.file_path)
-    except Exception as e:
-        print(f"Error deleting file: {e}")
+    # Batches still embedding would re-add vectors tagged with the deleted document
+    if ingestion_queue.is_ingesting(document):
+        raise HTTPException(status_code=409, detail="Document is still being processed; try again once it finishes")
     
-    # Delete from database
-    db.delete(document)
-    db.commit()
+    remove_document(db, document)
     
     return {"message": "Document deleted successfully"}
+
+@router.post("/vector-store/compact")
+def compact_vector_store(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Purge unreferenced vectors and compact the collection (Admin only)"""
+    return run_compaction(db)
+
+@router.get("/llm/stats")
+def llm_stats(current_user: User = Depends(get_current_admin_user)):
+    """Per-client LLM request counters (Admin only)"""
+    return {
+        **llm_registry.stats(),
+        "web_search_cache": web_search_tool.stats(),
+        "rag_answer_cache": answer_cache.stats(),
+        "rag_coalesced": answer_flights.stats(),
+    }
@@ -1,85 +1,217 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.database import get_async_db, AsyncSessionLocal
 from app.models.user import User
 from app.models.session import Session as ChatSession
 from app.models.message import Message, MessageRole
 from app.schemas.message import MessageCreate, MessageResponse
 from app.core.security import get_current_active_user
-from app.core.rag_agent import RAGAgent
+from app.core.rag_agent import get_rag_agent
+from app.services.session_summary import record_message
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, cursor_headers, decode_cursor
 from app.config import get_settings
 from datetime import datetime
+import asyncio
+import json
 
 router = APIRouter(prefix="/api/chat", tags=["Chat"])
 settings = get_settings()
 
 # Initialize RAG agent
-rag_agent = RAGAgent(settings.DATABASE_URL)
+rag_agent = get_rag_agent()
+
+# Streamed turns still running; holding them keeps the tasks from being collected
+_streamed_turns = set()
 
 @router.post("/{session_id}/message", response_model=MessageResponse)
 async def send_message(
     session_id: int,
     message: MessageCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Send a message and get agent response"""
     # Verify session belongs to user
-    session = db.query(ChatSession).filter(
-        ChatSession.id == session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    session = (await db.execute(
+        select(ChatSession).where(
+            ChatSession.id == session_id,
+            ChatSession.user_id == current_user.id
+        )
+    )).scalars().first()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     # Save user message
+    now = datetime.utcnow()
     user_message = Message(
         session_id=session_id,
         role=MessageRole.USER,
-        content=message.content
+        content=message.content,
+        created_at=now
     )
     db.add(user_message)
-    db.commit()
+    await db.execute(record_message(session_id, message.content, now))
+    await db.commit()
     
     # Get agent response
     agent_response = await rag_agent.chat(session.thread_id, message.content)
     
     # Save agent message
+    now = datetime.utcnow()
     assistant_message = Message(
         session_id=session_id,
         role=MessageRole.ASSISTANT,
-        content=agent_response
+        content=agent_response,
+        created_at=now
     )
     db.add(assistant_message)
     
-    # Update session timestamp
-    session.updated_at = datetime.utcnow()
+    # Update session timestamp and summary
+    await db.execute(record_message(session_id, agent_response, now))
     
-    db.commit()
-    db.refresh(assistant_message)
+    await db.commit()
+    await db.refresh(assistant_message)
     
     return assistant_message
 
+@router.post("/{session_id}/message/stream")
+async def send_message_stream(
+    session_id: int,
+    message: MessageCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Send a message and stream the agent response as server-sent events"""
+    # Verify session belongs to user
+    session = (await db.execute(
+        select(ChatSession).where(
+            ChatSession.id == session_id,
+            ChatSession.user_id == current_user.id
+        )
+    )).scalars().first()
+    
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    # Save user message
+    now = datetime.utcnow()
+    user_message = Message(
+        session_id=session_id,
+        role=MessageRole.USER,
+        content=message.content,
+        created_at=now
+    )
+    db.add(user_message)
+    await db.execute(record_message(session_id, message.content, now))
+    await db.commit()
+    
+    # The turn runs detached from the response, so a client that disconnects
+    # mid-stream still gets its reply saved next to the checkpointed turn
+    events: asyncio.Queue = asyncio.Queue()
+    task = asyncio.create_task(_run_streamed_turn(session_id, session.thread_id, message.content, events))
+    _streamed_turns.add(task)
+    task.add_done_callback(_streamed_turns.discard)
+    
+    async def event_stream():
+        while (frame := await events.get()) is not None:
+            yield frame
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _run_streamed_turn(session_id: int, thread_id: str, content: str, events: asyncio.Queue):
+    """Run the agent and save its reply, queueing SSE frames for whoever is still listening"""
+    try:
+        final_response = ""
+        async for event in rag_agent.chat_stream(thread_id, content):
+            if event["event"] == "final":
+                final_response = event["content"]
+                continue
+            events.put_nowait(_sse(event["event"], event))
+        
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            assistant_message = Message(
+                session_id=session_id,
+                role=MessageRole.ASSISTANT,
+                content=final_response,
+                created_at=now
+            )
+            db.add(assistant_message)
+            
+            # Update session timestamp and summary
+            await db.execute(record_message(session_id, final_response, now))
+            
+            await db.commit()
+            await db.refresh(assistant_message)
+            events.put_nowait(_sse("done", MessageResponse.model_validate(assistant_message).model_dump(mode="json")))
+    except Exception as e:
+        print(f"Streamed chat turn failed for session {session_id}: {e}")
+        events.put_nowait(_sse("error", {"detail": str(e)}))
+    finally:
+        events.put_nowait(None)
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 @router.get("/{session_id}/messages", response_model=List[MessageResponse])
-def get_messages(
+async def get_messages(
     session_id: int,
-    db: Session = Depends(get_db),
+    response: Response,
+    before: Optional[str] = Query(None, description="Cursor: messages older than this one"),
+    after: Optional[str] = Query(None, description="Cursor: messages newer than this one"),
+    limit: int = Query(2 * DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all messages for a session"""
+    """Get a page of a session's messages, oldest first (the latest page by default).
+    
+    Keyset paginated: X-Before-Cursor / X-After-Cursor response headers point at
+    the older / newer neighbouring pages when they exist.
+    """
+    try:
+        before_key, after_key = decode_cursor(before), decode_cursor(after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
     # Verify session belongs to user
-    session = db.query(ChatSession).filter(
-        ChatSession.id == session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    session = (await db.execute(
+        select(ChatSession).where(
+            ChatSession.id == session_id,
+            ChatSession.user_id == current_user.id
+        )
+    )).scalars().first()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    messages = db.query(Message).filter(
-        Message.session_id == session_id
-    ).order_by(Message.created_at).all()
+    key = tuple_(Message.created_at, Message.id)
+    query = select(Message).where(Message.session_id == session_id)
+    if before_key:
+        query = query.where(key < tuple_(*before_key))
+    if after_key:
+        query = query.where(key > tuple_(*after_key)).order_by(Message.created_at.asc(), Message.id.asc())
+    else:
+        # Newest first to take the latest page, flipped back to chronological below
+        query = query.order_by(Message.created_at.desc(), Message.id.desc())
+    messages = list((await db.execute(query.limit(limit + 1))).scalars())
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    if not after_key:
+        messages.reverse()
+    
+    if messages:
+        response.headers.update(cursor_headers(
+            (messages[0].created_at, messages[0].id),
+            (messages[-1].created_at, messages[-1].id),
+            has_more, bool(before_key), bool(after_key),
+        ))
     
     return messages
@@ -1,21 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import uuid
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.models.session import Session as ChatSession
-from app.models.message import Message
 from app.schemas.session import SessionCreate, SessionResponse, SessionListResponse
 from app.core.security import get_current_active_user
+from app.core.rag_agent import get_rag_agent
+from app.utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, cursor_headers, decode_cursor
 
 router = APIRouter(prefix="/api/sessions", tags=["Sessions"])
 
 @router.post("/", response_model=SessionResponse, status_code=201)
-def create_session(
+async def create_session(
     session: SessionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Create a new chat session"""
@@ -27,50 +28,82 @@ def create_session(
     )
     
     db.add(new_session)
-    db.commit()
-    db.refresh(new_session)
+    await db.commit()
+    await db.refresh(new_session)
     
     return new_session
 
 @router.get("/", response_model=List[SessionListResponse])
-def list_sessions(
-    db: Session = Depends(get_db),
+async def list_sessions(
+    response: Response,
+    before: Optional[str] = Query(None, description="Cursor: sessions updated before this one"),
+    after: Optional[str] = Query(None, description="Cursor: sessions updated after this one"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    """Get all sessions for current user"""
-    sessions = db.query(
-        ChatSession,
-        func.count(Message.id).label('message_count')
-    ).outerjoin(Message).filter(
-        ChatSession.user_id == current_user.id
-    ).group_by(ChatSession.id).order_by(
-        ChatSession.updated_at.desc()
-    ).all()
+    """Get the current user's sessions, most recently updated first.
+    
+    Keyset paginated: X-Before-Cursor / X-After-Cursor response headers point at
+    the older / newer neighbouring pages when they exist.
+    """
+    try:
+        before_key, after_key = decode_cursor(before), decode_cursor(after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    key = tuple_(ChatSession.updated_at, ChatSession.id)
+    query = select(ChatSession).where(ChatSession.user_id == current_user.id)
+    if before_key:
+        query = query.where(key < tuple_(*before_key))
+    if after_key:
+        # Walk forward from the cursor, then flip back to newest-first
+        query = query.where(key > tuple_(*after_key)).order_by(
+            ChatSession.updated_at.asc(), ChatSession.id.asc()
+        )
+    else:
+        query = query.order_by(ChatSession.updated_at.desc(), ChatSession.id.desc())
+    sessions = list((await db.execute(query.limit(limit + 1))).scalars())
+    has_more = len(sessions) > limit
+    sessions = sessions[:limit]
+    if after_key:
+        sessions.reverse()
+    
+    if sessions:
+        response.headers.update(cursor_headers(
+            (sessions[-1].updated_at, sessions[-1].id),
+            (sessions[0].updated_at, sessions[0].id),
+            has_more, bool(before_key), bool(after_key),
+        ))
     
     result = []
-    for session, message_count in sessions:
+    for session in sessions:
         result.append(SessionListResponse(
             id=session.id,
             thread_id=session.thread_id,
             title=session.title,
             created_at=session.created_at,
             updated_at=session.updated_at,
-            message_count=message_count
+            message_count=session.message_count or 0,
+            last_message_at=session.last_message_at,
+            last_message_preview=session.last_message_preview
         ))
     
     return result
 
 @router.get("/{session_id}", response_model=SessionResponse)
-def get_session(
+async def get_session(
     session_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Get a specific session"""
-    session = db.query(ChatSession).filter(
-        ChatSession.id == session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    session = (await db.execute(
+        select(ChatSession).where(
+            ChatSession.id == session_id,
+            ChatSession.user_id == current_user.id
+        )
+    )).scalars().first()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -78,42 +111,50 @@ def get_session(
     return session
 
 @router.delete("/{session_id}")
-def delete_session(
+async def delete_session(
     session_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Delete a session"""
-    session = db.query(ChatSession).filter(
-        ChatSession.id == session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    session = (await db.execute(
+        select(ChatSession).where(
+            ChatSession.id == session_id,
+            ChatSession.user_id == current_user.id
+        )
+    )).scalars().first()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    db.delete(session)
-    db.commit()
+    thread_id = session.thread_id
+    await db.delete(session)
+    await db.commit()
+    
+    # Drop the conversation's checkpointed agent state too
+    await get_rag_agent().delete_thread(thread_id)
     
     return {"message": "Session deleted successfully"}
 
 @router.patch("/{session_id}/title")
-def update_session_title(
+async def update_session_title(
     session_id: int,
     title: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Update session title"""
-    session = db.query(ChatSession).filter(
-        ChatSession.id == session_id,
-        ChatSession.user_id == current_user.id
-    ).first()
+    session = (await db.execute(
+        select(ChatSession).where(
+            ChatSession.id == session_id,
+            ChatSession.user_id == current_user.id
+        )
+    )).scalars().first()
     
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
     session.title = title
-    db.commit()
+    await db.commit()
     
     return {"message": "Title updated successfully"}
@@ -14,23 +14,103 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DATABASE_ASYNC_URL: str = ""  # defaults to DATABASE_URL with its async driver
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
     
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000
+    # Put id/is_active/is_admin in the token so requests skip the user lookup;
+    # role or deactivation changes then apply only once the token expires
+    TOKEN_EMBED_CLAIMS: bool = False
+    PASSWORD_HASH_WORKERS: int = 2  # dedicated bcrypt threads
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # waiting beyond this fails fast with 503
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
     
     # API Keys
     GOOGLE_API_KEY: str
     TAVILY_API_KEY: str
     
+    # LLM
+    LLM_MODEL: str = "gemini-2.0-flash-exp"
+    LLM_AGENT_TEMPERATURE: float = 0
+    LLM_RAG_TEMPERATURE: float = 0.3
+    LLM_TIMEOUT_SECONDS: float = 60
+    LLM_MAX_RETRIES: int = 2
+    LLM_WARMUP_PING: bool = False
+    
+    # LangGraph checkpointer
+    CHECKPOINT_BACKEND: str = "auto"  # auto, postgres, sqlite, memory
+    CHECKPOINT_DB_URL: str = ""  # defaults to DATABASE_URL
+    CHECKPOINT_SQLITE_PATH: str = "checkpoints.sqlite3"
+    CHECKPOINT_POOL_MIN_SIZE: int = 1
+    CHECKPOINT_POOL_MAX_SIZE: int = 10
+    CHECKPOINT_KEEP_LAST: int = 20  # checkpoints kept per thread, 0 = keep all
+    
+    # Intent router (skips the tool-selection LLM call for obvious intents)
+    INTENT_ROUTER_ENABLED: bool = True
+    INTENT_ROUTER_MIN_CONFIDENCE: float = 0.8
+    
+    # Conversation context (token estimates)
+    CONTEXT_SUMMARIZE_THRESHOLD_TOKENS: int = 6000
+    CONTEXT_RECENT_TOKENS: int = 3000
+    CONTEXT_TOOL_OUTPUT_MAX_TOKENS: int = 1500
+    
     # File Upload
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    PDF_EXTRACT_WORKERS: int = 0  # 0 = one per CPU
+    PDF_PAGES_PER_TASK: int = 25
     
     # ChromaDB
     CHROMA_DB_DIR: str = "chroma_db"
     
+    # Vector backend
+    VECTOR_BACKEND: str = "chroma"  # chroma, numpy
+    VECTOR_INDEX_DIR: str = "vector_index"
+    VECTOR_INDEX_QUANTIZE: bool = False
+    
+    # Retrieval
+    RETRIEVAL_MODE: str = "hybrid"  # hybrid, dense
+    HYBRID_FETCH_MULTIPLIER: int = 3
+    RRF_K: int = 60
+    LEXICAL_ONLY_MAX_TERMS: int = 3
+    LEXICAL_INDEX_SYNC_SECONDS: int = 30
+    
+    # Embeddings
+    EMBEDDING_MODEL: str = "models/embedding-001"
+    EMBEDDING_CACHE_DIR: str = "embedding_cache"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 200_000
+    
+    # Ingestion
+    INGEST_BATCH_SIZE: int = 64
+    INGEST_MAX_CONCURRENCY: int = 4
+    INGEST_MAX_RETRIES: int = 3
+    INGEST_WORKERS: int = 2
+    INGEST_MAX_JOBS_RETAINED: int = 200
+    INGEST_HEARTBEAT_SECONDS: int = 30
+    INGEST_STALE_SECONDS: int = 180  # unfinished documents without a heartbeat this long are resumed
+    # Default for the upload "revise" flag: a completed upload removes older completed
+    # uploads with the same filename. Off, so same-named unrelated files are kept
+    REPLACE_REVISED_DOCUMENTS: bool = False
+    
+    # RAG answer cache
+    ANSWER_CACHE_MAX_ENTRIES: int = 1024
+    ANSWER_CACHE_TTL_SECONDS: int = 6 * 60 * 60
+    
+    # Web search cache
+    SEARCH_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    SEARCH_CACHE_STALE_SECONDS: int = 7 * 24 * 60 * 60  # served while refreshing in the background
+    SEARCH_CACHE_MAX_ENTRIES: int = 1024
+    SEARCH_CACHE_PATH: str = "search_cache/search.sqlite3"  # empty = memory only
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,136 @@
+import re
+from typing import Optional
+from langgraph.checkpoint.memory import MemorySaver
+from app.config import get_settings
+
+settings = get_settings()
+
+
+class CheckpointerManager:
+    """Owns the LangGraph checkpointer and its connection pool.
+
+    Postgres uses AsyncPostgresSaver over a psycopg AsyncConnectionPool so
+    every uvicorn worker shares durable thread state; SQLite (aiosqlite) is
+    the local stand-in and MemorySaver is kept for tests/dev.
+    """
+
+    def __init__(self, db_url: str):
+        self.db_url = settings.CHECKPOINT_DB_URL or db_url
+        self.backend = settings.CHECKPOINT_BACKEND
+        if self.backend == "auto":
+            self.backend = "postgres" if self.db_url.startswith("postgres") else "sqlite"
+        self.keep_last = settings.CHECKPOINT_KEEP_LAST
+        self.saver = None
+        self._pool = None
+        self._sqlite_conn = None
+
+    async def open(self):
+        if self.saver is not None:
+            return
+        if self.backend == "postgres":
+            from psycopg.rows import dict_row
+            from psycopg_pool import AsyncConnectionPool
+            from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+            # psycopg wants a plain libpq URL, not SQLAlchemy's postgresql+driver:// form
+            conninfo = re.sub(r"^postgres(ql)?\+\w+://", "postgresql://", self.db_url)
+            self._pool = AsyncConnectionPool(
+                conninfo,
+                min_size=settings.CHECKPOINT_POOL_MIN_SIZE,
+                max_size=settings.CHECKPOINT_POOL_MAX_SIZE,
+                kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+                open=False,
+            )
+            await self._pool.open()
+            self.saver = AsyncPostgresSaver(self._pool)
+            await self.saver.setup()
+        elif self.backend == "sqlite":
+            import aiosqlite
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+            self._sqlite_conn = await aiosqlite.connect(settings.CHECKPOINT_SQLITE_PATH)
+            await self._sqlite_conn.execute("PRAGMA journal_mode=WAL")
+            self.saver = AsyncSqliteSaver(self._sqlite_conn)
+            await self.saver.setup()
+        else:
+            self.saver = MemorySaver()
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+        if self._sqlite_conn is not None:
+            await self._sqlite_conn.close()
+            self._sqlite_conn = None
+        self.saver = None
+
+    async def prune(self, thread_id: str, keep_last: Optional[int] = None):
+        """Delete all but the newest keep_last checkpoints of a thread"""
+        keep_last = keep_last or self.keep_last
+        if not keep_last:
+            return
+        if self.backend == "postgres":
+            async with self._pool.connection() as conn:
+                await conn.execute(
+                    """
+                    DELETE FROM checkpoints WHERE thread_id = %(thread_id)s
+                    AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints WHERE thread_id = %(thread_id)s
+                        ORDER BY checkpoint_id DESC LIMIT %(keep)s
+                    )
+                    """,
+                    {"thread_id": thread_id, "keep": keep_last},
+                )
+                await conn.execute(
+                    """
+                    DELETE FROM checkpoint_writes w WHERE w.thread_id = %(thread_id)s
+                    AND NOT EXISTS (
+                        SELECT 1 FROM checkpoints c
+                        WHERE c.thread_id = w.thread_id AND c.checkpoint_ns = w.checkpoint_ns
+                        AND c.checkpoint_id = w.checkpoint_id
+                    )
+                    """,
+                    {"thread_id": thread_id},
+                )
+                # Channel values are stored once per version; drop versions no kept checkpoint points at
+                await conn.execute(
+                    """
+                    DELETE FROM checkpoint_blobs b WHERE b.thread_id = %(thread_id)s
+                    AND NOT EXISTS (
+                        SELECT 1 FROM checkpoints c
+                        WHERE c.thread_id = b.thread_id AND c.checkpoint_ns = b.checkpoint_ns
+                        AND c.checkpoint -> 'channel_versions' ->> b.channel = b.version
+                    )
+                    """,
+                    {"thread_id": thread_id},
+                )
+        elif self.backend == "sqlite":
+            async with self.saver.lock:
+                await self._sqlite_conn.execute(
+                    """
+                    DELETE FROM checkpoints WHERE thread_id = ?
+                    AND checkpoint_id NOT IN (
+                        SELECT checkpoint_id FROM checkpoints WHERE thread_id = ?
+                        ORDER BY checkpoint_id DESC LIMIT ?
+                    )
+                    """,
+                    (thread_id, thread_id, keep_last),
+                )
+                await self._sqlite_conn.execute(
+                    """
+                    DELETE FROM writes WHERE thread_id = ?
+                    AND checkpoint_id NOT IN (SELECT checkpoint_id FROM checkpoints WHERE thread_id = ?)
+                    """,
+                    (thread_id, thread_id),
+                )
+                await self._sqlite_conn.commit()
+        else:
+            for checkpoint_ns, checkpoints in self.saver.storage.get(thread_id, {}).items():
+                for checkpoint_id in sorted(checkpoints)[:-keep_last]:
+                    del checkpoints[checkpoint_id]
+                    self.saver.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+
+    async def delete_thread(self, thread_id: str):
+        """Remove all stored state for a thread"""
+        await self.open()
+        await self.saver.adelete_thread(thread_id)
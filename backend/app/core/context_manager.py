@@ -0,0 +1,104 @@
+from typing import List, Tuple
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from app.config import get_settings
+from app.services.llm_registry import llm_registry
+
+settings = get_settings()
+
+SUMMARY_TAG = "context_summary"
+
+SUMMARY_PROMPT = """Summarize the conversation below between a patient and a medical appointment assistant.
+Keep every detail needed to continue it: symptoms and medical questions discussed, doctors or clinics found,
+and any patient details collected for booking (name, phone, city, age, chosen doctor and timeslot).
+Be concise."""
+
+
+def estimate_tokens(message: BaseMessage) -> int:
+    """Rough token count (~4 characters per token), no network round trip"""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    tokens = len(content) // 4 + 4
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tokens += len(str(message.tool_calls)) // 4
+    return tokens
+
+
+class ContextWindowManager:
+    """Keeps the prompt sent to the agent LLM within a token budget.
+
+    The system prompt is injected once per call instead of being stored in the
+    thread state, turns older than the recent-history budget are folded into a
+    running summary (and removed from state), and tool outputs are trimmed.
+    """
+
+    def __init__(self, system_prompt: str):
+        self.system_prompt = system_prompt
+        self.recent_tokens = settings.CONTEXT_RECENT_TOKENS
+        self.summarize_threshold = settings.CONTEXT_SUMMARIZE_THRESHOLD_TOKENS
+        self.tool_output_max_chars = settings.CONTEXT_TOOL_OUTPUT_MAX_TOKENS * 4
+
+    def _split(self, messages: List[BaseMessage]) -> Tuple[List[BaseMessage], List[BaseMessage]]:
+        """Split history into (older, recent) at a user-turn boundary.
+
+        Cutting only before a HumanMessage keeps tool calls and their results together.
+        """
+        total = 0
+        cut = len(messages)
+        for i in range(len(messages) - 1, -1, -1):
+            total += estimate_tokens(messages[i])
+            if isinstance(messages[i], HumanMessage):
+                if total > self.recent_tokens and cut < len(messages):
+                    break
+                cut = i
+        return messages[:cut], messages[cut:]
+
+    async def compact(self, messages: List[BaseMessage], summary: str) -> Tuple[List[BaseMessage], str, list]:
+        """Fold older turns into the summary once history exceeds the threshold.
+
+        Returns the remaining messages, the updated summary and the state updates
+        (RemoveMessage entries) that drop the folded and legacy system messages.
+        """
+        removals = [RemoveMessage(id=m.id) for m in messages if isinstance(m, SystemMessage) and m.id]
+        history = [m for m in messages if not isinstance(m, SystemMessage)]
+
+        if sum(estimate_tokens(m) for m in history) <= self.summarize_threshold:
+            return history, summary, removals
+
+        older, recent = self._split(history)
+        if not older:
+            return history, summary, removals
+
+        transcript = "\n".join(
+            f"{m.type}: {self._trim(m.content)}" for m in older if m.content
+        )
+        if summary:
+            transcript = f"Summary so far:\n{summary}\n\nNew messages:\n{transcript}"
+        llm = llm_registry.get("summary").with_config(tags=[SUMMARY_TAG])
+        response = await llm.ainvoke([SystemMessage(content=SUMMARY_PROMPT), HumanMessage(content=transcript)])
+
+        removals += [RemoveMessage(id=m.id) for m in older if m.id]
+        return recent, response.content, removals
+
+    def build_prompt(self, messages: List[BaseMessage], summary: str) -> List[BaseMessage]:
+        """Single system prompt + summary, then the recent history with tool outputs trimmed"""
+        system = self.system_prompt
+        if summary:
+            system += f"\n\nSummary of the earlier conversation:\n{summary}"
+        prompt = [SystemMessage(content=system)]
+        for message in messages:
+            if isinstance(message, ToolMessage) and isinstance(message.content, str):
+                message = message.model_copy(update={"content": self._trim(message.content)})
+            prompt.append(message)
+        return prompt
+
+    def _trim(self, content) -> str:
+        content = content if isinstance(content, str) else str(content)
+        if len(content) <= self.tool_output_max_chars:
+            return content
+        return content[:self.tool_output_max_chars] + " ...[truncated]"
@@ -0,0 +1,59 @@
+import threading
+import time
+from typing import Any, Dict, Tuple
+from langchain_core.callbacks import BaseCallbackHandler
+from app.utils.metrics import graph_node_seconds, tool_seconds
+
+
+class GraphMetricsHandler(BaseCallbackHandler):
+    """Times LangGraph nodes and tool calls from the run callbacks.
+
+    A node run is the chain whose name equals its ``langgraph_node`` metadata;
+    chains nested inside a node carry the same metadata under other names.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._started: Dict[Any, Tuple[str, str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, kind: str, name: str):
+        with self._lock:
+            self._started[run_id] = (kind, name, time.perf_counter())
+
+    def _end(self, run_id, status: str = "ok"):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is None:
+            return
+        kind, name, at = started
+        elapsed = time.perf_counter() - at
+        if kind == "node":
+            graph_node_seconds.observe(elapsed, node=name)
+        else:
+            tool_seconds.observe(elapsed, tool=name, status=status)
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            self._start(run_id, "node", node)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "unknown")
+        self._start(run_id, "tool", name)
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, status="error")
+
+
+graph_metrics = GraphMetricsHandler()
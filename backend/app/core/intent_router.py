@@ -0,0 +1,183 @@
+import math
+import re
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from app.config import get_settings
+from app.services.answer_cache import normalize_query
+from app.services.search_cache import search_key
+
+settings = get_settings()
+
+MEDICAL_INFO = "medical_info"
+PROVIDER_SEARCH = "provider_search"
+BOOKING = "booking"
+OTHER = "other"
+
+ROUTE_ID_PREFIX = "route_"
+
+RULES = {
+    BOOKING: re.compile(
+        r"\b(book|booking|appointment|schedule|reschedule|reserve|slot|timeslot|my name is|my phone)\b"
+    ),
+    PROVIDER_SEARCH: re.compile(
+        r"\b(doctors?|clinics?|hospitals?|specialists?|physicians?|surgeons?|dentists?|"
+        r"\w+logists?|\w+iatricians?|gynaecologists?|gynecologists?|pharmacy|pharmacies|nursing home)\b"
+    ),
+    # Question stems alone ("what is", "how do") are not enough: they match small talk too
+    MEDICAL_INFO: re.compile(
+        r"\b(symptoms?|causes?|treatments?|treated|treat|cure|remed(y|ies)|side effects?|diagnos(is|ed|e)|"
+        r"prevent(ion)?|dosage|dose|risk factors?|complications?|contagious|infectious|"
+        r"disease|disorder|infection|syndrome|deficiency|medicines?|medications?|tablets?|"
+        r"vaccines?|antibiotics?)\b"
+    ),
+}
+
+SEED_EXAMPLES = {
+    MEDICAL_INFO: [
+        "what are the symptoms of a cold",
+        "what causes migraine headaches",
+        "how is diabetes treated",
+        "what are the side effects of paracetamol",
+        "is dengue contagious",
+        "how can i prevent high blood pressure",
+        "what is the normal dosage of ibuprofen",
+        "what are the early signs of a heart attack",
+        "how do you treat a sprained ankle at home",
+        "what is thyroid and why does it happen",
+        "remedies for acidity and heartburn",
+        "explain the risk factors for asthma",
+    ],
+    PROVIDER_SEARCH: [
+        "find a cardiologist in pune",
+        "best dentist near me in mumbai",
+        "hospitals in delhi with emergency care",
+        "list of pediatricians in bangalore",
+        "good skin specialist clinic in hyderabad",
+        "top orthopedic doctors in chennai",
+        "suggest a gynecologist in kolkata",
+        "search for eye hospitals in jaipur",
+        "which clinic in noida treats kidney stones",
+        "ent doctor available in ahmedabad",
+    ],
+    BOOKING: [
+        "book an appointment with dr sharma",
+        "i want to schedule a visit tomorrow at 10",
+        "please book the 5 pm slot",
+        "my name is ravi and my phone is 9876543210",
+        "reserve a consultation for my mother",
+        "can you book dr mehta for monday morning",
+        "i am 34 years old and live in pune",
+        "confirm the booking",
+    ],
+    OTHER: [
+        "hello",
+        "hi there",
+        "thank you so much",
+        "ok thanks",
+        "who are you",
+        "what can you do",
+        "bye",
+        "that was helpful",
+        "what is your name",
+        "what is the weather today",
+        "what are your working hours",
+        "how can i contact support",
+        "how do i reset my password",
+        "what is this app for",
+        "how does this chat work",
+    ],
+}
+
+
+class NaiveBayesIntentModel:
+    """Multinomial naive Bayes over unigrams and bigrams, trained in-process from seed phrases"""
+
+    def __init__(self, examples: Dict[str, List[str]], alpha: float = 1.0):
+        self.alpha = alpha
+        self.priors: Dict[str, float] = {}
+        self.counts: Dict[str, Counter] = {}
+        self.totals: Dict[str, int] = {}
+        vocabulary = set()
+        total_examples = sum(len(texts) for texts in examples.values())
+        for intent, texts in examples.items():
+            counter = Counter()
+            for text in texts:
+                counter.update(self.features(text))
+            self.counts[intent] = counter
+            self.totals[intent] = sum(counter.values())
+            self.priors[intent] = math.log(len(texts) / total_examples)
+            vocabulary.update(counter)
+        self.vocabulary_size = len(vocabulary)
+
+    @staticmethod
+    def features(text: str) -> List[str]:
+        words = normalize_query(text).split()
+        return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        features = self.features(text)
+        scores = {}
+        for intent, counter in self.counts.items():
+            denominator = self.totals[intent] + self.alpha * self.vocabulary_size
+            scores[intent] = self.priors[intent] + sum(
+                math.log((counter[f] + self.alpha) / denominator) for f in features
+            )
+        best = max(scores.values())
+        exp_scores = {intent: math.exp(score - best) for intent, score in scores.items()}
+        total = sum(exp_scores.values())
+        return {intent: value / total for intent, value in exp_scores.items()}
+
+
+class IntentRouter:
+    """Local (no network) intent classifier used to skip the tool-selection LLM call.
+
+    Keyword rules and the naive Bayes model must agree; only medical questions and
+    provider searches that name a city are routed, everything else goes to the agent.
+    """
+
+    def __init__(self, routes: Dict[str, str], min_confidence: float = None):
+        self.routes = routes  # intent -> name of the tool to call directly
+        self.min_confidence = settings.INTENT_ROUTER_MIN_CONFIDENCE if min_confidence is None else min_confidence
+        self.model = NaiveBayesIntentModel(SEED_EXAMPLES)
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        normalized = normalize_query(text)
+        probabilities = self.model.predict_proba(normalized)
+        # Booking wins over everything: it needs the agent to collect details
+        if RULES[BOOKING].search(normalized):
+            return BOOKING, 1.0
+        matched = [intent for intent in (PROVIDER_SEARCH, MEDICAL_INFO) if RULES[intent].search(normalized)]
+        if PROVIDER_SEARCH in matched and not search_key(text)[1]:
+            # No city: the agent has to ask for it first
+            return PROVIDER_SEARCH, probabilities[PROVIDER_SEARCH] * 0.5
+        if len(matched) != 1:
+            intent = max(probabilities, key=probabilities.get)
+            return intent, probabilities[intent] * 0.5
+        intent = matched[0]
+        return intent, 0.5 + 0.5 * probabilities[intent]
+
+    def route(self, messages: List[BaseMessage]) -> Optional[AIMessage]:
+        """Tool-call message for a high-confidence intent, or None to defer to the agent"""
+        if not messages or not isinstance(messages[-1], HumanMessage):
+            return None
+        text = messages[-1].content if isinstance(messages[-1].content, str) else ""
+        if len(text.split()) < 3:
+            return None
+        # The user is answering a question the assistant asked (e.g. mid-booking)
+        previous = next((m for m in reversed(messages[:-1]) if isinstance(m, AIMessage) and m.content), None)
+        if previous is not None and isinstance(previous.content, str) and previous.content.rstrip().endswith("?"):
+            return None
+
+        intent, confidence = self.classify(text)
+        if intent not in self.routes or confidence < self.min_confidence:
+            return None
+        return AIMessage(
+            content="",
+            tool_calls=[{
+                "name": self.routes[intent],
+                "args": {"query": text},
+                "id": f"{ROUTE_ID_PREFIX}{uuid.uuid4().hex}",
+            }],
+        )
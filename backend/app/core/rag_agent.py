@@ -1,18 +1,25 @@
 import os
-from typing import TypedDict, Annotated, List
-from langchain_core.messages import AnyMessage, SystemMessage, HumanMessage, AIMessage, BaseMessage
+import asyncio
+from functools import lru_cache
+from typing import TypedDict, Annotated, List, AsyncIterator
+from langchain_core.messages import AnyMessage, SystemMessage, HumanMessage, AIMessage, BaseMessage, ToolMessage
 from pydantic import BaseModel, Field
 from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.postgres import PostgresSaver
 from langgraph.prebuilt import ToolNode, tools_condition
-from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.tools import tool
 from langchain_tavily import TavilySearch # UPDATED IMPORT
 from langgraph.graph.message import add_messages
 import uuid
-from app.services.vector_store import VectorStoreManager
+from app.services.vector_store import get_vector_store_manager
+from app.services.answer_cache import answer_cache, answer_flights, make_answer_key, normalize_query
+from app.services.llm_registry import llm_registry
+from app.services.search_cache import CachedSearchTool
+from app.core.checkpointer import CheckpointerManager
+from app.core.context_manager import ContextWindowManager, SUMMARY_TAG
+from app.core.graph_metrics import graph_metrics
+from app.utils.metrics import track_request_tokens
+from app.core.intent_router import IntentRouter, MEDICAL_INFO, PROVIDER_SEARCH, ROUTE_ID_PREFIX
 from app.config import get_settings
-from langgraph.checkpoint.memory import MemorySaver
 # Load settings first
 settings = get_settings()
 
@@ -21,38 +28,51 @@ os.environ["GOOGLE_API_KEY"] = settings.GOOGLE_API_KEY
 os.environ["TAVILY_API_KEY"] = settings.TAVILY_API_KEY
 
 # Initialize vector store
-vector_store_manager = VectorStoreManager()
+vector_store_manager = get_vector_store_manager()
 
 # Initialize Tavily (new package handles API key from environment)
 web_search_tool = TavilySearch(max_results=3)
 web_search_tool.description = "A search engine useful for finding doctors, clinics, or hospitals in a specific city. Use this to answer any questions about healthcare providers."
+# Provider listings change slowly; serve repeat city/specialty lookups from cache
+web_search_tool = CachedSearchTool.wrap(web_search_tool)
 
 class RagQuerySchema(BaseModel):
     query: str = Field(description="A specific medical question to ask the RAG system.")
 
 @tool(args_schema=RagQuerySchema)
-def medical_assistant_rag(query: str) -> str:
+async def medical_assistant_rag(query: str) -> str:
     """Provides information on general medical topics using a RAG system."""
+    return await answer_flights.do(normalize_query(query), lambda: _answer_medical_question(query))
+
+async def _answer_medical_question(query: str) -> str:
     try:
         retriever = vector_store_manager.get_retriever(k=3)
-        retrieved_docs = retriever.invoke(query)
+        retrieved_docs = await retriever.ainvoke(query)
+        
+        # Same question over the same chunks gets the same answer
+        cache_key = make_answer_key(query, retrieved_docs)
+        cached_answer = answer_cache.get(cache_key)
+        if cached_answer is not None:
+            return cached_answer
         
         if not retrieved_docs:
             # Fallback to LLM knowledge
-            llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", temperature=0.3)
-            response = llm.invoke(f"Answer this medical question: {query}\n\nAlways end your answer with the disclaimer: 'This information is for educational purposes only and is not a substitute for professional medical advice.'")
+            llm = llm_registry.get("rag")
+            response = await llm.ainvoke(f"Answer this medical question: {query}\n\nAlways end your answer with the disclaimer: 'This information is for educational purposes only and is not a substitute for professional medical advice.'")
+            answer_cache.set(cache_key, response.content)
             return response.content
         
         context = "\n\n".join([doc.page_content for doc in retrieved_docs])
         final_prompt = f"Using the following context, please answer the user's question.\nContext: {context}\n\nUser's Question: {query}\n\nAlways end your answer with the disclaimer: 'This information is for educational purposes only and is not a substitute for professional medical advice.'"
         
-        llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", temperature=0.3)
-        response = llm.invoke(final_prompt)
+        llm = llm_registry.get("rag")
+        response = await llm.ainvoke(final_prompt)
+        answer_cache.set(cache_key, response.content)
         return response.content
     except Exception as e:
         # Silent fallback to LLM knowledge
-        llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", temperature=0.3)
-        response = llm.invoke(f"Answer this medical question: {query}\n\nAlways end your answer with the disclaimer: 'This information is for educational purposes only and is not a substitute for professional medical advice.'")
+        llm = llm_registry.get("rag")
+        response = await llm.ainvoke(f"Answer this medical question: {query}\n\nAlways end your answer with the disclaimer: 'This information is for educational purposes only and is not a substitute for professional medical advice.'")
         return response.content
 
 class BookAppointmentSchema(BaseModel):
@@ -72,16 +92,13 @@ def book_appointment(doctor_name: str, timeslot: str, patient_name: str, patient
 # State definition
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
+    summary: str
 
 # Tools and LLM setup
 tools = [web_search_tool, medical_assistant_rag, book_appointment]
-llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-exp", temperature=0)
+llm = llm_registry.get("agent")
 llm_with_tools = llm.bind_tools(tools)
 
-# Agent node
-def agent_node(state: AgentState):
-    response = llm_with_tools.invoke(state['messages'])
-    return {"messages": [response]}
 
 # System prompt
 SYSTEM_PROMPT = """You are a helpful Indian medical appointment assistant.
@@ -92,55 +109,166 @@ Be polite and converse naturally. Always provide helpful medical information.
 4. if medical_assistant_rag tool is offline then then use tavily search tool answer medical questions.
 5. dont say im not a doctor"""
 
+context_manager = ContextWindowManager(SYSTEM_PROMPT)
+
+# Agent node
+async def agent_node(state: AgentState):
+    messages, summary, removals = await context_manager.compact(state['messages'], state.get('summary', ""))
+    response = await llm_with_tools.ainvoke(context_manager.build_prompt(messages, summary))
+    return {"messages": removals + [response], "summary": summary}
+
+intent_router = IntentRouter({
+    MEDICAL_INFO: medical_assistant_rag.name,
+    PROVIDER_SEARCH: web_search_tool.name,
+})
+
+# Router node: call the tool directly for obvious intents, skipping the tool-selection LLM call
+def router_node(state: AgentState):
+    routed = intent_router.route(state['messages'])
+    return {"messages": [routed]} if routed is not None else {}
+
+def after_router(state: AgentState) -> str:
+    last_message = state['messages'][-1]
+    return "tools" if isinstance(last_message, AIMessage) and last_message.tool_calls else "agent"
+
+def after_tools(state: AgentState) -> str:
+    # A routed RAG answer is already final; search results still need the agent to present them
+    last_message = state['messages'][-1]
+    if (
+        isinstance(last_message, ToolMessage)
+        and last_message.tool_call_id.startswith(ROUTE_ID_PREFIX)
+        and last_message.name == medical_assistant_rag.name
+        and last_message.status != "error"
+    ):
+        return "respond"
+    return "agent"
+
+def respond_node(state: AgentState):
+    return {"messages": [AIMessage(content=state['messages'][-1].content)]}
+
 class RAGAgent:
     def __init__(self, db_url: str):
+        self.db_url = db_url
+        
         # Initialize graph
         self.graph_builder = StateGraph(AgentState)
         
         # Add nodes
+        self.graph_builder.add_node("router", router_node)
         self.graph_builder.add_node("agent", agent_node)
         tool_node = ToolNode(tools)
         self.graph_builder.add_node("tools", tool_node)
+        self.graph_builder.add_node("respond", respond_node)
         
         # Set entry point
-        self.graph_builder.set_entry_point("agent")
+        self.graph_builder.set_entry_point("router" if settings.INTENT_ROUTER_ENABLED else "agent")
         
         # Add edges
+        self.graph_builder.add_conditional_edges("router", after_router, ["tools", "agent"])
         self.graph_builder.add_conditional_edges("agent", tools_condition)
-        self.graph_builder.add_edge("tools", "agent")
-        
-        # Compile with PostgreSQL checkpointer (FIXED - use context manager properly)
-        self.checkpointer = MemorySaver()
-        self.graph = self.graph_builder.compile(checkpointer=self.checkpointer)
-
-        
-        # Compile graph
+        self.graph_builder.add_conditional_edges("tools", after_tools, ["respond", "agent"])
+        self.graph_builder.add_edge("respond", END)
         
+        # The checkpointer needs a running event loop; the graph is compiled in setup()
+        self.checkpointer_manager = CheckpointerManager(db_url)
+        self.graph = None
+        self._setup_lock = asyncio.Lock()
+        self._background_tasks = set()
+    
+    async def setup(self):
+        """Open the checkpointer connection pool and compile the graph"""
+        if self.graph is not None:
+            return
+        async with self._setup_lock:
+            if self.graph is None:
+                await self.checkpointer_manager.open()
+                self.graph = self.graph_builder.compile(checkpointer=self.checkpointer_manager.saver)
+    
+    async def close(self):
+        await self.checkpointer_manager.close()
+        self.graph = None
+    
+    async def delete_thread(self, thread_id: str):
+        """Remove all checkpointed state for a conversation"""
+        await self.checkpointer_manager.delete_thread(thread_id)
     
-    def _setup_checkpointer(self):
-        """Setup PostgreSQL checkpointer using context manager"""
-        # Use context manager to setup and keep reference
-        context_manager = PostgresSaver.from_conn_string(self.db_url)
-        self.checkpointer = context_manager.__enter__()
+    def _prune_in_background(self, thread_id: str):
+        async def prune():
+            try:
+                await self.checkpointer_manager.prune(thread_id)
+            except Exception as e:
+                print(f"Checkpoint pruning failed for thread {thread_id}: {e}")
         
-        # Setup tables (first time only)
-        try:
-            self.checkpointer.setup()
-        except Exception as e:
-            # Tables might already exist
-            pass
+        task = asyncio.create_task(prune())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
     
     async def chat(self, thread_id: str, user_message: str) -> str:
-        config = {"configurable": {"thread_id": thread_id}}
-        initial_messages = [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=user_message)]
+        await self.setup()
+        config = {"configurable": {"thread_id": thread_id}, "callbacks": [graph_metrics]}
+        # The system prompt is added per call by the context manager, not stored in the thread
+        initial_messages = [HumanMessage(content=user_message)]
 
         final_response = ""
-        async for event in self.graph.astream({"messages": initial_messages}, config=config, stream_mode="values"):
-            latest_message = event["messages"][-1]
-            if isinstance(latest_message, AIMessage) and not latest_message.tool_calls:
-                final_response = latest_message.content
+        with track_request_tokens():
+            async for event in self.graph.astream({"messages": initial_messages}, config=config, stream_mode="values"):
+                latest_message = event["messages"][-1]
+                if isinstance(latest_message, AIMessage) and not latest_message.tool_calls:
+                    final_response = latest_message.content
 
+        self._prune_in_background(thread_id)
         return final_response
+    
+    async def chat_stream(self, thread_id: str, user_message: str) -> AsyncIterator[dict]:
+        """Stream agent tokens and tool progress as they are produced.
+        
+        Yields {"event": "token" | "tool_start" | "tool_end" | "final", ...} dicts;
+        the last one is "final" with the complete response text.
+        """
+        await self.setup()
+        config = {"configurable": {"thread_id": thread_id}, "callbacks": [graph_metrics]}
+        initial_messages = [HumanMessage(content=user_message)]
+        streamed = False
+        
+        with track_request_tokens():
+            async for event in self.graph.astream_events({"messages": initial_messages}, config=config, version="v2"):
+                kind = event["event"]
+                node = event.get("metadata", {}).get("langgraph_node")
+                if kind == "on_chat_model_stream" and node == "agent" and SUMMARY_TAG not in event.get("tags", []):
+                    # Tool-call chunks carry no text, only answer tokens are forwarded
+                    content = _text_content(event["data"]["chunk"].content)
+                    if content:
+                        streamed = True
+                        yield {"event": "token", "content": content}
+                elif kind == "on_tool_start":
+                    yield {"event": "tool_start", "tool": event["name"]}
+                elif kind == "on_tool_end":
+                    yield {"event": "tool_end", "tool": event["name"]}
+        
+        state = await self.graph.aget_state({"configurable": {"thread_id": thread_id}})
+        final_response = ""
+        for message in reversed(state.values.get("messages", [])):
+            if isinstance(message, AIMessage) and not message.tool_calls:
+                final_response = _text_content(message.content)
+                break
+        if not streamed and final_response:
+            # Routed answers come straight from a tool, not from streamed agent tokens
+            yield {"event": "token", "content": final_response}
+        self._prune_in_background(thread_id)
+        yield {"event": "final", "content": final_response}
+
 
+def _text_content(content) -> str:
+    """Gemini may return content as a list of parts"""
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part if isinstance(part, str) else part.get("text", "")
+        for part in content
+    )
 
 
+@lru_cache()
+def get_rag_agent() -> RAGAgent:
+    """One agent (and checkpointer pool) per process"""
+    return RAGAgent(settings.DATABASE_URL)
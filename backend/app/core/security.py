@@ -1,16 +1,91 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 from app.config import get_settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
+from app.utils.cache import TTLCache
+from app.utils.metrics import (
+    password_hash_queue_seconds,
+    password_hash_rejected_total,
+    password_hash_seconds,
+    principal_lookups_total,
+)
 
 settings = get_settings()
 
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user as request handlers see it, detached from any DB session"""
+    id: int
+    username: str
+    is_active: bool
+    is_admin: bool
+    email: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            is_active=user.is_active,
+            is_admin=user.is_admin,
+            email=user.email,
+            created_at=user.created_at,
+        )
+
+# Resolved principals keyed by token subject (username)
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Bumped on every eviction; a lookup that overlapped one does not cache its (possibly old) row
+_principal_epoch = 0
+PENDING_EVICTIONS = "principal_evictions"
+
+def evict_principals(usernames):
+    global _principal_epoch
+    _principal_epoch += 1
+    for username in usernames:
+        principal_cache.pop(username)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _queue_principal_eviction(mapper, connection, target):
+    # Drop the old username too if it was just renamed
+    history = inspect(target).attrs.username.history
+    usernames = [target.username, *(history.deleted or ())]
+    session = object_session(target)
+    if session is None:
+        evict_principals(usernames)
+        return
+    # Evicting now (at flush) would let a concurrent request re-cache the
+    # still-committed old row; wait until the change is visible
+    session.info.setdefault(PENDING_EVICTIONS, set()).update(usernames)
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_principals(session):
+    usernames = session.info.pop(PENDING_EVICTIONS, None)
+    if usernames:
+        evict_principals(usernames)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back_evictions(session):
+    session.info.pop(PENDING_EVICTIONS, None)
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
@@ -24,6 +99,68 @@ def get_password_hash(password: str) -> str:
     password = password[:72]
     return pwd_context.hash(password)
 
+def principal_claims(user: User) -> dict:
+    """Token claims for a user; authorization claims only when TOKEN_EMBED_CLAIMS is on"""
+    claims = {"sub": user.username}
+    if settings.TOKEN_EMBED_CLAIMS:
+        claims.update(uid=user.id, act=user.is_active, adm=user.is_admin)
+    return claims
+
+class PasswordHashPool:
+    """Dedicated, bounded bcrypt executor.
+
+    Keeps login/signup bursts off the threadpool the rest of the API uses; once
+    every worker is busy and the queue is full, new requests fail fast with 503.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.capacity = workers + max_queue
+        self.pending = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._lock = threading.Lock()
+
+    async def run(self, operation: str, fn, *args):
+        with self._lock:
+            if self.pending >= self.capacity:
+                password_hash_rejected_total.inc(operation=operation)
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Authentication is busy, please retry shortly",
+                    headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+                )
+            self.pending += 1
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            password_hash_queue_seconds.observe(started - submitted, operation=operation)
+            try:
+                return fn(*args)
+            finally:
+                password_hash_seconds.observe(time.perf_counter() - started, operation=operation)
+
+        try:
+            future = self._executor.submit(timed)
+        except BaseException:
+            self._release()
+            raise
+        # Freed when the bcrypt call finishes (or is dropped from the queue), not when
+        # the caller stops waiting: a cancelled request still occupies its thread
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, _future=None):
+        with self._lock:
+            self.pending -= 1
+
+password_hash_pool = PasswordHashPool(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_QUEUE)
+
+async def hash_password(password: str) -> str:
+    return await password_hash_pool.run("hash", get_password_hash, password)
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run("verify", verify_password, plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -41,15 +178,15 @@ def decode_access_token(token: str):
     except JWTError:
         return None
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(User).filter(User.username == username).first()
+async def authenticate_user(db: AsyncSession, username: str, password: str):
+    user = (await db.execute(select(User).where(User.username == username))).scalars().first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await check_password(password, user.hashed_password):
         return False
     return user
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -64,11 +201,50 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
+    # Claims carried in the token: no lookup at all
+    if settings.TOKEN_EMBED_CLAIMS and "uid" in payload:
+        principal_lookups_total.inc(source="token")
+        return Principal(
+            id=payload["uid"],
+            username=username,
+            is_active=payload.get("act", False),
+            is_admin=payload.get("adm", False),
+        )
+    
+    principal = await resolve_principal(db, username)
+    if principal is None:
         raise credentials_exception
     
-    return user
+    return principal
+
+async def resolve_principal(db: AsyncSession, username: str) -> Optional[Principal]:
+    """Principal for a username from the cache, falling back to the database"""
+    principal = principal_cache.get(username)
+    if principal is not None:
+        principal_lookups_total.inc(source="cache")
+        return principal
+    
+    principal_lookups_total.inc(source="db")
+    epoch = _principal_epoch
+    user = (await db.execute(select(User).where(User.username == username))).scalars().first()
+    if user is None:
+        return None
+    principal = Principal.from_user(user)
+    if epoch == _principal_epoch:
+        principal_cache.set(username, principal)
+    return principal
+
+async def get_current_user_profile(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Like get_current_user, but always with the full profile (token claims omit it)"""
+    if current_user.email is not None:
+        return current_user
+    principal = await resolve_principal(db, current_user.username)
+    if principal is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    return principal
 
 async def get_current_active_user(current_user: User = Depends(get_current_user)):
     if not current_user.is_active:
@@ -1,12 +1,71 @@
-from sqlalchemy import create_engine
+import re
+import time
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.config import get_settings
+from app.utils.metrics import db_query_seconds
 
 settings = get_settings()
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite", "mysql": "aiomysql"}
+
+def async_database_url(url: str) -> str:
+    """Same database, async driver: postgresql:// -> postgresql+asyncpg:// etc."""
+    match = re.match(r"^(postgres(?:ql)?|sqlite|mysql)(?:\+(\w+))?://", url)
+    if not match:
+        return url
+    dialect = "postgresql" if match.group(1).startswith("postgres") else match.group(1)
+    driver = match.group(2)
+    if driver in ASYNC_DRIVERS.values() or driver in ("psycopg", "psycopg_async"):
+        return url
+    return f"{dialect}+{ASYNC_DRIVERS[dialect]}://" + url[match.end():]
+
+def pool_options(url: str) -> dict:
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+    # SQLite uses a single-connection/static pool that takes no sizing arguments
+    if not url.startswith("sqlite"):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        )
+    return options
+
+# Sync engine: schema management, the ingestion worker and admin maintenance endpoints
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL))
+
+# Async engine: request handlers, so DB waits don't block the event loop
+async_url = settings.DATABASE_ASYNC_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(async_url, **pool_options(async_url))
+
+class TimedSession(Session):
+    """Session whose commits (flush + COMMIT) are recorded in the DB latency histogram"""
+    
+    def commit(self):
+        with db_query_seconds.time(operation="SESSION_COMMIT"):
+            super().commit()
+
+SessionLocal = sessionmaker(class_=TimedSession, autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: attributes stay readable after commit without an implicit (sync) refresh
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, sync_session_class=TimedSession, autoflush=False, expire_on_commit=False
+)
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_started = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    words = statement.split(None, 1)
+    operation = words[0].upper() if words else "OTHER"
+    db_query_seconds.observe(time.perf_counter() - context._query_started, operation=operation)
 
 Base = declarative_base()
 
@@ -16,3 +75,34 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def ensure_schema():
+    """Create missing tables, then add columns and indexes introduced after a table was created.
+    
+    create_all never alters existing tables, so new nullable columns are added here
+    with ALTER TABLE ... ADD COLUMN.
+    """
+    Base.metadata.create_all(bind=engine)
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                default = None
+                if column.server_default is not None:
+                    default = getattr(column.server_default.arg, "text", column.server_default.arg)
+                conn.execute(text(
+                    f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+                    + (f' DEFAULT {default}' if default is not None else '')
+                ))
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn, checkfirst=True)
@@ -1,18 +1,28 @@
-from fastapi import FastAPI
+import asyncio
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from fastapi.responses import PlainTextResponse
+from app.database import ensure_schema
 from app.api import auth, chat, sessions, admin
+from app.services.ingestion_queue import ingestion_queue
+from app.services.llm_registry import llm_registry
+from app.services.embedding_cache import get_embedding_cache
+from app.services.document_processor import shutdown_extraction_executor
+from app.core.rag_agent import get_rag_agent
+from app.utils.metrics import registry as metrics_registry, http_request_seconds
 from app.config import get_settings
 import os
 
 settings = get_settings()
 
 
-Base.metadata.create_all(bind=engine)
+ensure_schema()
 
 
 os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 os.makedirs(settings.CHROMA_DB_DIR, exist_ok=True)
+os.makedirs(settings.EMBEDDING_CACHE_DIR, exist_ok=True)
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -26,8 +36,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Before-Cursor", "X-After-Cursor"],  # keyset pagination
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, to keep the series count bounded
+        route = request.scope.get("route")
+        http_request_seconds.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status_code,
+        )
+
+@app.on_event("startup")
+async def startup():
+    await ingestion_queue.start()
+    await llm_registry.warm_up()
+    await get_rag_agent().setup()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await ingestion_queue.stop()
+    # After the queue, so no job is still submitting pages to the pool
+    await asyncio.to_thread(shutdown_extraction_executor)
+    await get_rag_agent().close()
+    get_embedding_cache().flush()
+
 app.include_router(auth.router)
 app.include_router(sessions.router)
 app.include_router(chat.router)
@@ -41,6 +84,11 @@ def root():
         "docs": "/docs"
     }
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of latency histograms and token counters"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, BigInteger
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, JSON
 from datetime import datetime
 from app.database import Base
 
@@ -11,5 +11,8 @@ class Document(Base):
     file_path = Column(String, nullable=False)
     file_size = Column(BigInteger, nullable=False)
     mime_type = Column(String)
+    content_hash = Column(String(64), index=True)  # SHA-256 of the uploaded file
     uploaded_at = Column(DateTime, default=datetime.utcnow)
+    chunk_hashes = Column(JSON(none_as_null=True))  # SHA-256 of each chunk, also used as its vector ID
     processed = Column(String, default="pending")  # pending, processing, completed, failed
+    heartbeat_at = Column(DateTime)  # refreshed while an ingestion worker holds the document
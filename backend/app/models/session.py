@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Keyset pagination of a user's sessions, most recently updated first
+        Index("ix_sessions_user_updated_id", "user_id", "updated_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     thread_id = Column(String, unique=True, index=True, nullable=False)
@@ -13,6 +17,11 @@ class Session(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # Denormalized from messages, kept current by chat writes (see services/session_summary.py)
+    message_count = Column(Integer, default=0, server_default="0")
+    last_message_at = Column(DateTime)
+    last_message_preview = Column(String(120))
+    
     # Relationships
     user = relationship("User", back_populates="sessions")
     messages = relationship("Message", back_populates="session", cascade="all, delete-orphan")
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class JobStageResponse(BaseModel):
+    name: str
+    status: str
+    progress: float
+    done: int
+    total: Optional[int] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
+
+class JobResponse(BaseModel):
+    id: int
+    document_id: int
+    status: str
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    stages: List[JobStageResponse] = []
+    stats: dict = {}
@@ -25,6 +25,8 @@ class SessionListResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     message_count: Optional[int] = 0
+    last_message_at: Optional[datetime] = None
+    last_message_preview: Optional[str] = None
     
     class Config:
         from_attributes = True
@@ -0,0 +1,39 @@
+import hashlib
+import re
+from typing import List
+from langchain_core.documents import Document
+from app.config import get_settings
+from app.utils.cache import SingleFlight, TTLCache
+
+settings = get_settings()
+
+# Shared by the RAG tool and the admin endpoints that change the corpus
+answer_cache = TTLCache(
+    maxsize=settings.ANSWER_CACHE_MAX_ENTRIES,
+    ttl=settings.ANSWER_CACHE_TTL_SECONDS,
+)
+
+# Identical questions asked at the same moment share one retrieval + LLM call
+answer_flights = SingleFlight()
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace"""
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+def chunk_id(doc: Document) -> str:
+    """Stable identifier for a retrieved chunk"""
+    if getattr(doc, "id", None):
+        return doc.id
+    return hashlib.sha256(doc.page_content.encode("utf-8")).hexdigest()
+
+
+def make_answer_key(query: str, docs: List[Document]) -> tuple:
+    return (normalize_query(query), tuple(chunk_id(doc) for doc in docs))
+
+
+def invalidate_answer_cache():
+    """Drop every cached answer after the document corpus changes"""
+    answer_cache.clear()
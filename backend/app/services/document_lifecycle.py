@@ -0,0 +1,98 @@
+import os
+from typing import List, Set
+from sqlalchemy.orm import Session
+from app.models.document import Document
+from app.services.vector_store import get_vector_store_manager
+from app.services.answer_cache import invalidate_answer_cache
+
+
+def referenced_chunk_ids(db: Session, exclude_document_id: int = None) -> Set[str]:
+    """Every chunk ID referenced by a document, optionally ignoring one document"""
+    query = db.query(Document.chunk_hashes).filter(Document.chunk_hashes.isnot(None))
+    if exclude_document_id is not None:
+        query = query.filter(Document.id != exclude_document_id)
+    referenced = set()
+    for (chunk_hashes,) in query.all():
+        referenced.update(chunk_hashes)
+    return referenced
+
+
+def orphaned_chunk_ids(db: Session, document: Document) -> List[str]:
+    """Chunk IDs of a document that no other document references"""
+    if not document.chunk_hashes:
+        return []
+    still_referenced = referenced_chunk_ids(db, exclude_document_id=document.id)
+    return [chunk_id for chunk_id in document.chunk_hashes if chunk_id not in still_referenced]
+
+
+def remove_document(db: Session, document: Document):
+    """Delete a document's file, its unshared vectors and its row"""
+    vector_store_manager = get_vector_store_manager()
+    chunk_ids = set(document.chunk_hashes or [])
+    chunk_ids.update(vector_store_manager.collection.get(
+        where={"document_id": document.id}, include=[]
+    )["ids"])
+    if document.chunk_hashes is None:
+        # Indexed before chunks had deterministic IDs, or ingestion never completed
+        chunk_ids.update(vector_store_manager.collection.get(
+            where={"file_path": document.file_path}, include=[]
+        )["ids"])
+    # Whatever the branch, never drop a chunk another document still lists
+    still_referenced = referenced_chunk_ids(db, exclude_document_id=document.id)
+    vector_store_manager.delete_ids([
+        chunk_id for chunk_id in chunk_ids if chunk_id not in still_referenced
+    ])
+
+    # Delete file from filesystem
+    try:
+        if os.path.exists(document.file_path):
+            os.remove(document.file_path)
+    except Exception as e:
+        print(f"Error deleting file: {e}")
+
+    # Delete from database
+    db.delete(document)
+    db.commit()
+    invalidate_answer_cache()
+
+
+def purge_deleted_document_vectors(db: Session, document_id: int) -> int:
+    """Drop vectors still tagged with a deleted document, keeping any another document lists"""
+    vector_store_manager = get_vector_store_manager()
+    tagged = vector_store_manager.collection.get(where={"document_id": document_id}, include=[])["ids"]
+    still_referenced = referenced_chunk_ids(db)
+    orphans = [chunk_id for chunk_id in tagged if chunk_id not in still_referenced]
+    vector_store_manager.delete_ids(orphans)
+    if orphans:
+        invalidate_answer_cache()
+    return len(orphans)
+
+
+def compact_vector_store(db: Session) -> dict:
+    """Purge vectors no document references, reclaim disk space and report before/after"""
+    vector_store_manager = get_vector_store_manager()
+    before = vector_store_manager.stats()
+
+    referenced = referenced_chunk_ids(db)
+    legacy_paths = {
+        file_path for (file_path,) in
+        db.query(Document.file_path).filter(Document.chunk_hashes.is_(None)).all()
+    }
+    # Documents still being ingested have tagged vectors but no chunk_hashes yet
+    document_ids = {document_id for (document_id,) in db.query(Document.id).all()}
+    orphans = [
+        chunk_id for chunk_id, metadata in vector_store_manager.all_metadatas().items()
+        if chunk_id not in referenced
+        and (metadata or {}).get("document_id") not in document_ids
+        and (metadata or {}).get("file_path") not in legacy_paths
+    ]
+    vector_store_manager.delete_ids(orphans)
+    vector_store_manager.vacuum()
+    if orphans:
+        invalidate_answer_cache()
+
+    return {
+        "purged_vectors": len(orphans),
+        "before": before,
+        "after": vector_store_manager.stats(),
+    }
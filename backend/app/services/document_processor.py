@@ -1,68 +1,222 @@
 import os
 import uuid
+import asyncio
+import hashlib
+import multiprocessing
+import threading
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List
-import pypdf
-import pdfplumber
+from typing import List, Optional, Tuple
+from fastapi import Request
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document as LangChainDocument
 from app.config import get_settings
+from app.services.pdf_extraction import count_pages, extract_page_range
 
 settings = get_settings()
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+class FileTooLargeError(Exception):
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"File size exceeds maximum allowed size of {max_size / (1024*1024)}MB")
+
+class InvalidUploadError(Exception):
+    pass
+
+@dataclass
+class SavedUpload:
+    file_path: str
+    filename: str  # unique name on disk
+    original_filename: str
+    content_type: Optional[str]
+    size: int
+    content_hash: str  # SHA-256 hex digest
+
+class _FilePart:
+    """MultipartParser callbacks that buffer the data of one file field and skip every other part"""
+    
+    def __init__(self, field: str, extensions: Tuple[str, ...], max_size: int):
+        self.field = field.encode()
+        self.extensions = extensions
+        self.max_size = max_size
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.size = 0
+        self.complete = False
+        self.pending: List[bytes] = []  # file bytes not yet written to disk
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._capturing = False
+    
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        }
+    
+    def _on_part_begin(self):
+        self._headers = {}
+    
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+    
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+    
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field, self._header_value = b"", b""
+    
+    def _on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if options.get(b"name") != self.field or b"filename" not in options or self.filename is not None:
+            return
+        filename = options[b"filename"].decode("utf-8", "replace")
+        # Checked before any of the file's bytes are read
+        if not filename.lower().endswith(self.extensions):
+            raise InvalidUploadError(f"Only {', '.join(self.extensions)} files are supported")
+        self.filename = filename
+        content_type = self._headers.get(b"content-type")
+        self.content_type = content_type.decode("latin-1") if content_type else None
+        self._capturing = True
+    
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        if not self._capturing:
+            return
+        self.size += end - start
+        if self.size > self.max_size:
+            raise FileTooLargeError(self.max_size)
+        self.pending.append(data[start:end])
+    
+    def _on_part_end(self):
+        if self._capturing:
+            self._capturing = False
+            self.complete = True
+
 class DocumentProcessor:
     def __init__(self):
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=1000,
             chunk_overlap=200,
             length_function=len,
+            add_start_index=True,
         )
         self.upload_dir = Path(settings.UPLOAD_DIR)
         self.upload_dir.mkdir(exist_ok=True)
     
-    async def save_file(self, file_content: bytes, original_filename: str) -> tuple:
-        """Save uploaded file and return file path and unique filename"""
-        file_extension = Path(original_filename).suffix
-        unique_filename = f"{uuid.uuid4()}{file_extension}"
-        file_path = self.upload_dir / unique_filename
+    async def save_upload(self, request: Request, max_size: int, field: str = "file",
+                          extensions: Tuple[str, ...] = (".pdf",)) -> SavedUpload:
+        """Stream the file field of a multipart request body to disk, hashing it and
+        enforcing max_size as bytes arrive.
         
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        The body is parsed straight from request.stream(), so an oversized upload is
+        rejected after max_size bytes instead of being spooled in full first.
+        """
+        content_type, options = parse_options_header(request.headers.get("content-type", ""))
+        if content_type != b"multipart/form-data" or not options.get(b"boundary"):
+            raise InvalidUploadError("Expected a multipart/form-data request")
+        
+        unique_filename = f"{uuid.uuid4()}.part"
+        partial_path = self.upload_dir / unique_filename
+        part = _FilePart(field, extensions, max_size)
+        parser = MultipartParser(options[b"boundary"], part.callbacks())
+        digest = hashlib.sha256()
+        try:
+            with open(partial_path, "wb") as f:
+                async for chunk in request.stream():
+                    parser.write(chunk)
+                    if part.pending:
+                        data = b"".join(part.pending)
+                        part.pending.clear()
+                        digest.update(data)
+                        await asyncio.to_thread(f.write, data)
+                parser.finalize()
+            if part.filename is None or not part.complete:
+                raise InvalidUploadError(f"No file in the '{field}' form field")
+            unique_filename = f"{uuid.uuid4()}{Path(part.filename).suffix}"
+            file_path = self.upload_dir / unique_filename
+            os.replace(partial_path, file_path)
+        except MultipartParseError as e:
+            partial_path.unlink(missing_ok=True)
+            raise InvalidUploadError(f"Malformed multipart body: {e}")
+        except BaseException:
+            partial_path.unlink(missing_ok=True)
+            raise
         
-        return str(file_path), unique_filename
+        return SavedUpload(
+            file_path=str(file_path),
+            filename=unique_filename,
+            original_filename=part.filename,
+            content_type=part.content_type,
+            size=part.size,
+            content_hash=digest.hexdigest(),
+        )
     
-    def extract_text_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file"""
-        text = ""
+    def extract_pages(self, file_path: str) -> List[Tuple[int, str]]:
+        """Extract (page number, text) pairs, fanning page ranges out across processes"""
         try:
-            # Try pdfplumber first (better for complex PDFs)
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
+            page_count = count_pages(file_path)
+            ranges = [
+                (start, min(start + settings.PDF_PAGES_PER_TASK, page_count))
+                for start in range(0, page_count, settings.PDF_PAGES_PER_TASK)
+            ]
+            
+            # Not worth the process round trip for short documents
+            if len(ranges) <= 1:
+                return extract_page_range(file_path, 0, page_count)
+            
+            executor = _get_extraction_executor()
+            futures = [executor.submit(extract_page_range, file_path, start, end) for start, end in ranges]
+            pages = []
+            for future in futures:
+                pages.extend(future.result())
+            return pages
         except Exception as e:
-            print(f"pdfplumber failed: {e}, trying pypdf")
-            # Fallback to pypdf
-            try:
-                with open(file_path, 'rb') as file:
-                    pdf_reader = pypdf.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-            except Exception as e:
-                print(f"pypdf also failed: {e}")
-                raise Exception(f"Failed to extract text from PDF: {e}")
-        
-        return text.strip()
+            print(f"PDF extraction failed: {e}")
+            raise Exception(f"Failed to extract text from PDF: {e}")
+    
+    def extract_text_from_pdf(self, file_path: str) -> str:
+        """Extract text from PDF file"""
+        return "\n".join(text for _, text in self.extract_pages(file_path) if text).strip()
     
     def process_document(self, file_path: str, filename: str) -> List[LangChainDocument]:
         """Process document and return chunks"""
         # Extract text
-        text = self.extract_text_from_pdf(file_path)
+        pages = self.extract_pages(file_path)
         
-        if not text:
+        if not any(text.strip() for _, text in pages):
             raise Exception("No text could be extracted from the document")
         
+        return self.chunk_pages(pages, file_path, filename)
+    
+    def chunk_pages(self, pages: List[Tuple[int, str]], file_path: str, filename: str) -> List[LangChainDocument]:
+        """Split extracted pages into chunks tagged with the pages they span"""
+        # Join once, remembering where each page starts
+        parts = []
+        page_starts = []
+        page_numbers = []
+        offset = 0
+        for page_number, page_text in pages:
+            if not page_text:
+                continue
+            page_starts.append(offset)
+            page_numbers.append(page_number)
+            parts.append(page_text)
+            offset += len(page_text) + 1
+        text = "\n".join(parts)
+        
         # Create document
         doc = LangChainDocument(
             page_content=text,
@@ -72,4 +226,36 @@ class DocumentProcessor:
         # Split into chunks
         chunks = self.text_splitter.split_documents([doc])
         
+        for chunk in chunks:
+            start = chunk.metadata.pop("start_index", 0)
+            end = start + max(len(chunk.page_content) - 1, 0)
+            chunk.metadata["page"] = page_numbers[max(bisect_right(page_starts, start) - 1, 0)]
+            chunk.metadata["page_end"] = page_numbers[max(bisect_right(page_starts, end) - 1, 0)]
+        
         return chunks
+
+
+_extraction_executor = None
+_extraction_executor_lock = threading.Lock()
+
+
+def _get_extraction_executor() -> ProcessPoolExecutor:
+    global _extraction_executor
+    # Ingestion workers call this from separate threads; only one may build the pool
+    with _extraction_executor_lock:
+        if _extraction_executor is None:
+            _extraction_executor = ProcessPoolExecutor(
+                max_workers=settings.PDF_EXTRACT_WORKERS or os.cpu_count(),
+                # Workers only import app.services.pdf_extraction
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _extraction_executor
+
+
+def shutdown_extraction_executor():
+    """Stop the PDF extraction processes, if they were ever started"""
+    global _extraction_executor
+    with _extraction_executor_lock:
+        executor, _extraction_executor = _extraction_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
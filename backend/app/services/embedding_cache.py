@@ -0,0 +1,210 @@
+import hashlib
+import os
+import sqlite3
+import asyncio
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from app.config import get_settings
+from app.utils.metrics import external_call_seconds
+
+settings = get_settings()
+
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by (model name, SHA-256 of the text).
+
+    Vectors are stored as packed float32 blobs in a single SQLite file and
+    evicted least-recently-used once ``max_entries`` is exceeded. Reads only
+    note recency in memory; it is written back on the next put or once
+    ``flush_interval`` seconds have passed, so a hit never commits.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = 100_000, flush_interval: float = 60.0):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, "embeddings.sqlite3")
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._last_used: Dict[str, float] = {}  # key -> last hit, not yet written
+        self._last_flush = time.monotonic()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        return f"{model}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+    def get_many(self, keys: List[str]) -> List[Optional[List[float]]]:
+        """Return cached vectors for keys, None where missing"""
+        if not keys:
+            return []
+        found = {}
+        with self._lock:
+            unique_keys = list(dict.fromkeys(keys))
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f")
+                    vector.frombytes(blob)
+                    found[key] = vector.tolist()
+            now = time.time()
+            for key in found:
+                self._last_used[key] = now
+            if self._last_used and time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_recency()
+                self._conn.commit()
+            results = [found.get(key) for key in keys]
+            hit_count = sum(1 for vector in results if vector is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def put_many(self, keys: List[str], vectors: List[List[float]]):
+        """Store vectors and evict least-recently-used entries over the limit"""
+        if not keys:
+            return
+        now = time.time()
+        rows = [
+            (key, array("f", vector).tobytes(), now)
+            for key, vector in zip(keys, vectors)
+        ]
+        with self._lock:
+            # Eviction below must see the recency of recent hits
+            self._flush_recency()
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows,
+            )
+            count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    "SELECT key FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+            self._conn.commit()
+
+    def _flush_recency(self):
+        """Write pending hit times; caller holds the lock and commits"""
+        if self._last_used:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(at, key) for key, at in self._last_used.items()],
+            )
+            self._last_used = {}
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush_recency()
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only calls the remote model on cache misses"""
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache
+
+    def _keys(self, texts: List[str], task: str) -> List[str]:
+        # Documents and queries are embedded with different task types
+        namespace = f"{self.model_name}/{task}"
+        return [EmbeddingCache.make_key(namespace, text) for text in texts]
+
+    def _merge(self, keys, cached, computed) -> List[List[float]]:
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        self.cache.put_many([keys[i] for i in missing], computed)
+        for i, vector in zip(missing, computed):
+            cached[i] = vector
+        return cached
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = self._keys(texts, "document")
+        cached = self.cache.get_many(keys)
+        missing_texts = [texts[i] for i, vector in enumerate(cached) if vector is None]
+        computed = []
+        if missing_texts:
+            with external_call_seconds.time(service="embeddings", operation="documents"):
+                computed = self.embeddings.embed_documents(missing_texts)
+        return self._merge(keys, cached, computed)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._keys([text], "query")
+        cached = self.cache.get_many(key)[0]
+        if cached is not None:
+            return cached
+        with external_call_seconds.time(service="embeddings", operation="query"):
+            vector = self.embeddings.embed_query(text)
+        self.cache.put_many(key, [vector])
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = self._keys(texts, "document")
+        # SQLite calls stay off the event loop
+        cached = await asyncio.to_thread(self.cache.get_many, keys)
+        missing_texts = [texts[i] for i, vector in enumerate(cached) if vector is None]
+        computed = []
+        if missing_texts:
+            with external_call_seconds.time(service="embeddings", operation="documents"):
+                computed = await self.embeddings.aembed_documents(missing_texts)
+        return await asyncio.to_thread(self._merge, keys, cached, computed)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = self._keys([text], "query")
+        cached = (await asyncio.to_thread(self.cache.get_many, key))[0]
+        if cached is not None:
+            return cached
+        with external_call_seconds.time(service="embeddings", operation="query"):
+            vector = await self.embeddings.aembed_query(text)
+        await asyncio.to_thread(self.cache.put_many, key, [vector])
+        return vector
+
+
+_embedding_cache: Optional[EmbeddingCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Process-wide embedding cache shared by every VectorStoreManager"""
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(
+                settings.EMBEDDING_CACHE_DIR,
+                max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            )
+        return _embedding_cache
@@ -0,0 +1,383 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import or_
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.document import Document
+from app.services.document_processor import DocumentProcessor
+from app.services.vector_store import get_vector_store_manager
+from app.services.answer_cache import invalidate_answer_cache
+from app.services.document_lifecycle import purge_deleted_document_vectors, remove_document
+
+settings = get_settings()
+
+STAGES = ("extract", "chunk", "embed")
+
+
+class JobStage:
+    def __init__(self, name: str):
+        self.name = name
+        self.status = "pending"  # pending, running, completed, failed
+        self.done = 0
+        self.total: Optional[int] = None
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.duration_seconds: Optional[float] = None
+        self._started = None
+
+    def start(self, total: Optional[int] = None):
+        self.status = "running"
+        self.total = total
+        self.started_at = datetime.utcnow()
+        self._started = time.perf_counter()
+
+    def advance(self, count: int = 1):
+        self.done += count
+
+    def finish(self, status: str = "completed"):
+        self.status = status
+        self.finished_at = datetime.utcnow()
+        self.duration_seconds = round(time.perf_counter() - self._started, 3)
+
+    @property
+    def progress(self) -> float:
+        if self.status == "completed":
+            return 1.0
+        if not self.total:
+            return 0.0
+        return min(self.done / self.total, 1.0)
+
+
+class IngestionJob:
+    def __init__(self, document_id: int, file_path: str, filename: str, revise: bool = False):
+        self.id = document_id
+        self.document_id = document_id
+        self.file_path = file_path
+        self.filename = filename
+        self.revise = revise  # replace older uploads of the same filename once indexed
+        self.status = "queued"  # queued, running, completed, failed
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+        self.stages = OrderedDict((name, JobStage(name)) for name in STAGES)
+        self.stats: dict = {}
+
+    @contextmanager
+    def stage(self, name: str, total: Optional[int] = None):
+        stage = self.stages[name]
+        stage.start(total)
+        try:
+            yield stage
+        except Exception:
+            stage.finish("failed")
+            raise
+        stage.finish()
+
+
+class IngestionQueue:
+    """In-process document ingestion queue served by a fixed pool of asyncio workers.
+
+    PDF extraction, chunking and every database call are offloaded to threads;
+    embedding uses the batched async pipeline. Job state is kept in memory for
+    the most recent ``max_jobs`` jobs. While a document is queued or running
+    its ``heartbeat_at`` is refreshed, so rows left pending or processing by a
+    worker that stopped or crashed are picked up again (see ``recover``).
+    """
+
+    def __init__(self, workers: int = 2, max_jobs: int = 200):
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[int, IngestionJob]" = OrderedDict()
+        self.document_processor = DocumentProcessor()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._active: set = set()  # document IDs queued or running here
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+        await self.recover()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Hand unfinished documents back so the next start picks them up right away
+        if self._active:
+            await asyncio.to_thread(self._release, list(self._active))
+            self._active.clear()
+
+    async def submit(self, document_id: int, file_path: str, filename: str, revise: bool = False) -> IngestionJob:
+        await self.start()
+        return self._enqueue(document_id, file_path, filename, revise)
+
+    def _enqueue(self, document_id: int, file_path: str, filename: str, revise: bool = False) -> IngestionJob:
+        job = IngestionJob(document_id, file_path, filename, revise)
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.max_jobs:
+            self.jobs.popitem(last=False)
+        self._active.add(document_id)
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: int) -> Optional[IngestionJob]:
+        return self.jobs.get(job_id)
+
+    def is_ingesting(self, document: Document) -> bool:
+        """Whether a worker here or in another process is still indexing the document"""
+        if document.id in self._active:
+            return True
+        if document.processed not in ("pending", "processing") or document.heartbeat_at is None:
+            return False
+        return datetime.utcnow() - document.heartbeat_at < timedelta(seconds=settings.INGEST_STALE_SECONDS)
+
+    async def recover(self) -> int:
+        """Re-enqueue documents whose ingestion stopped without finishing; returns how many"""
+        try:
+            claimed = await asyncio.to_thread(self._claim_stale)
+        except Exception as e:
+            print(f"Ingestion recovery failed: {e}")
+            return 0
+        for document_id, file_path, filename in claimed:
+            if document_id not in self._active:
+                # The upload's revise flag is not persisted; resumed jobs use the default
+                print(f"Resuming ingestion of {filename}")
+                self._enqueue(document_id, file_path, filename, settings.REPLACE_REVISED_DOCUMENTS)
+        return len(claimed)
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(settings.INGEST_HEARTBEAT_SECONDS)
+            try:
+                if self._active:
+                    await asyncio.to_thread(self._touch, list(self._active))
+            except Exception as e:
+                print(f"Ingestion heartbeat failed: {e}")
+            # Jobs of a worker process that died are picked up here, not only on restart
+            await self.recover()
+
+    # Database calls, run in threads
+
+    @staticmethod
+    def _touch(document_ids: List[int]):
+        db = SessionLocal()
+        try:
+            db.query(Document).filter(Document.id.in_(document_ids)).update(
+                {Document.heartbeat_at: datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _release(document_ids: List[int]):
+        db = SessionLocal()
+        try:
+            db.query(Document).filter(
+                Document.id.in_(document_ids),
+                Document.processed.in_(("pending", "processing")),
+            ).update(
+                {Document.processed: "pending", Document.heartbeat_at: None}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _claim_stale() -> List[Tuple[int, str, str]]:
+        """Claim unfinished documents nobody has touched recently; fail those whose file is gone"""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.INGEST_STALE_SECONDS)
+        stale = or_(Document.heartbeat_at.is_(None), Document.heartbeat_at < cutoff)
+        db = SessionLocal()
+        try:
+            candidates = db.query(Document.id, Document.file_path, Document.original_filename).filter(
+                Document.processed.in_(("pending", "processing")), stale
+            ).all()
+            claimed = []
+            for document_id, file_path, filename in candidates:
+                # Conditional update: when several workers recover at once only one wins
+                found = os.path.exists(file_path)
+                won = db.query(Document).filter(
+                    Document.id == document_id,
+                    Document.processed.in_(("pending", "processing")),
+                    stale,
+                ).update(
+                    {
+                        Document.processed: "pending" if found else "failed",
+                        Document.heartbeat_at: datetime.utcnow(),
+                    },
+                    synchronize_session=False,
+                )
+                db.commit()
+                if won and found:
+                    claimed.append((document_id, file_path, filename))
+                elif won:
+                    print(f"Ingestion of {filename} cannot resume, file is missing")
+            return claimed
+        finally:
+            db.close()
+
+    @staticmethod
+    def _start_document(document_id: int):
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document is None:
+                raise Exception("Document was deleted before processing started")
+            document.processed = "processing"
+            document.heartbeat_at = datetime.utcnow()
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _complete_document(document_id: int, chunk_ids: List[str], retag_ids: List[str], retag_metadatas: List[dict]):
+        """Point already-indexed chunks at the document and record its chunk list"""
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document is None:
+                # Batches indexed before the delete are still tagged with this document
+                purge_deleted_document_vectors(db, document_id)
+                raise Exception("Document was deleted during processing")
+            get_vector_store_manager().update_metadatas(retag_ids, retag_metadatas)
+            document.chunk_hashes = chunk_ids
+            document.processed = "completed"
+            db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _fail_document(document_id: int):
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document is not None:
+                document.processed = "failed"
+                db.commit()
+        finally:
+            db.close()
+
+    @staticmethod
+    def _supersede_previous_versions(document_id: int) -> int:
+        """Remove older completed uploads of the same file; chunks they share with this one stay indexed.
+
+        Uploads still pending or processing are left alone. Returns how many were removed.
+        """
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if document is None:
+                return 0
+            previous_versions = db.query(Document).filter(
+                Document.original_filename == document.original_filename,
+                Document.id != document.id,
+                Document.processed == "completed",
+                Document.uploaded_at <= document.uploaded_at
+            ).all()
+            for previous in previous_versions:
+                remove_document(db, previous)
+            return len(previous_versions)
+        finally:
+            db.close()
+
+    # Workers
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._active.discard(job.document_id)
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob):
+        job.status = "running"
+        try:
+            await asyncio.to_thread(self._start_document, job.document_id)
+
+            with job.stage("extract"):
+                pages = await asyncio.to_thread(
+                    self.document_processor.extract_pages, job.file_path
+                )
+                if not any(text.strip() for _, text in pages):
+                    raise Exception("No text could be extracted from the document")
+
+            with job.stage("chunk"):
+                chunks = await asyncio.to_thread(
+                    self.document_processor.chunk_pages, pages, job.file_path, job.filename
+                )
+
+            vector_store_manager = get_vector_store_manager()
+
+            # Chunk IDs are content hashes, so unchanged chunks are already indexed
+            unique_chunks = {}
+            for chunk in chunks:
+                chunk.metadata["document_id"] = job.document_id
+                unique_chunks.setdefault(vector_store_manager.chunk_id(chunk.page_content), chunk)
+            chunk_ids = list(unique_chunks)
+            existing = await asyncio.to_thread(vector_store_manager.existing_ids, chunk_ids)
+            new_ids = [chunk_id for chunk_id in chunk_ids if chunk_id not in existing]
+
+            with job.stage("embed", total=len(new_ids)) as stage:
+                job.stats = await vector_store_manager.aadd_documents_batched(
+                    [unique_chunks[chunk_id] for chunk_id in new_ids],
+                    ids=new_ids,
+                    progress_callback=stage.advance,
+                )
+                job.stats["unchanged_chunks"] = len(existing)
+
+            # Unchanged chunks move to this document without being re-embedded. Done only
+            # now, so a failed upload never retags chunks another document still owns
+            existing_ids = [chunk_id for chunk_id in chunk_ids if chunk_id in existing]
+            await asyncio.to_thread(
+                self._complete_document,
+                job.document_id,
+                chunk_ids,
+                existing_ids,
+                [unique_chunks[chunk_id].metadata for chunk_id in existing_ids],
+            )
+            job.status = "completed"
+            print(
+                f"Indexed {job.stats['chunks']} new chunks ({len(existing)} unchanged) from {job.filename} "
+                f"in {job.stats['seconds']}s ({job.stats['chunks_per_sec']} chunks/sec)"
+            )
+
+        except Exception as e:
+            print(f"Document processing failed for {job.filename}: {e}")
+            job.status = "failed"
+            job.error = str(e)
+            try:
+                await asyncio.to_thread(self._fail_document, job.document_id)
+            except Exception as e:
+                print(f"Could not mark {job.filename} as failed: {e}")
+        finally:
+            job.finished_at = datetime.utcnow()
+            # Some batches may have been upserted even if a later one failed
+            invalidate_answer_cache()
+
+        if job.status == "completed" and job.revise:
+            # The new document is already indexed; failing here must not mark it failed
+            try:
+                job.stats["superseded_documents"] = await asyncio.to_thread(
+                    self._supersede_previous_versions, job.document_id
+                )
+            except Exception as e:
+                print(f"Could not remove previous versions of {job.filename}: {e}")
+                job.stats["supersede_error"] = str(e)
+
+
+ingestion_queue = IngestionQueue(
+    workers=settings.INGEST_WORKERS,
+    max_jobs=settings.INGEST_MAX_JOBS_RETAINED,
+)
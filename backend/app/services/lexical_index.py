@@ -0,0 +1,136 @@
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Keeps dosages, ICD codes and hyphenated drug names as single tokens
+# (e.g. "500mg", "e11.9", "covid-19")
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LexicalIndex:
+    """In-process BM25 inverted index over document chunks"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_lengths: Dict[str, int] = {}
+        self.texts: Dict[str, str] = {}
+        self.metadatas: Dict[str, dict] = {}
+        self.total_length = 0
+        self.bootstrapped = False
+        self.last_synced = 0.0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    def add(self, ids: List[str], texts: List[str], metadatas: Optional[List[dict]] = None):
+        """Index chunks, replacing any existing entries with the same IDs"""
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                text = text or ""
+                if doc_id in self.doc_lengths:
+                    self._remove_one(doc_id)
+                terms = tokenize(text)
+                for term, count in Counter(terms).items():
+                    self.postings[term][doc_id] = count
+                self.doc_lengths[doc_id] = len(terms)
+                self.total_length += len(terms)
+                self.texts[doc_id] = text
+                self.metadatas[doc_id] = metadata or {}
+
+    def update_metadata(self, ids: List[str], metadatas: List[dict]):
+        with self._lock:
+            for doc_id, metadata in zip(ids, metadatas):
+                if doc_id in self.metadatas:
+                    self.metadatas[doc_id] = metadata or {}
+
+    def remove(self, ids: List[str]):
+        with self._lock:
+            for doc_id in ids:
+                if doc_id in self.doc_lengths:
+                    self._remove_one(doc_id)
+
+    def _remove_one(self, doc_id: str):
+        for term in set(tokenize(self.texts[doc_id])):
+            docs = self.postings.get(term)
+            if docs is not None:
+                docs.pop(doc_id, None)
+                if not docs:
+                    del self.postings[term]
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        self.texts.pop(doc_id, None)
+        self.metadatas.pop(doc_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.postings.clear()
+            self.doc_lengths.clear()
+            self.texts.clear()
+            self.metadatas.clear()
+            self.total_length = 0
+
+    def rebuild(self, ids: List[str], texts: List[str], metadatas: Optional[List[dict]] = None):
+        """Replace the whole index contents"""
+        with self._lock:
+            self.clear()
+            self.add(ids, texts, metadatas)
+            self.bootstrapped = True
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[str, float]]:
+        """Return (chunk id, BM25 score) pairs, best first"""
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self.doc_lengths)
+            if not terms or not n_docs:
+                return []
+            avg_length = self.total_length / n_docs
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                docs = self.postings.get(term)
+                if not docs:
+                    continue
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                for doc_id, tf in docs.items():
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                    scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def get(self, ids: List[str]) -> Dict[str, Tuple[str, dict]]:
+        """Text and metadata of the given chunks that are still indexed"""
+        with self._lock:
+            return {
+                doc_id: (self.texts[doc_id], self.metadatas.get(doc_id, {}))
+                for doc_id in ids if doc_id in self.texts
+            }
+
+    def covers(self, query: str, doc_id: str) -> bool:
+        """True if every query term occurs in the chunk"""
+        terms = set(tokenize(query))
+        with self._lock:
+            return bool(terms) and all(doc_id in self.postings.get(term, {}) for term in terms)
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    """Fuse several ranked ID lists into one"""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+_lexical_index = LexicalIndex()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """Process-wide index shared by every VectorStoreManager"""
+    return _lexical_index
@@ -0,0 +1,138 @@
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models import BaseChatModel
+from langchain_google_genai import ChatGoogleGenerativeAI
+from app.config import get_settings
+from app.utils.metrics import external_call_seconds, record_tokens
+
+settings = get_settings()
+
+
+class RequestCounter(BaseCallbackHandler):
+    """Counts requests, errors, latency and tokens for one client"""
+
+    # Called inline so async runs don't pay an executor hop per callback
+    run_inline = True
+
+    def __init__(self, profile: str = ""):
+        self.profile = profile
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.total_seconds = 0.0
+        self._started: Dict[Any, float] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self._started[run_id] = time.perf_counter()
+
+    def _finish(self, run_id, failed: bool):
+        with self._lock:
+            self.in_flight -= 1
+            if failed:
+                self.errors += 1
+            started = self._started.pop(run_id, None)
+            if started is not None:
+                elapsed = time.perf_counter() - started
+                self.total_seconds += elapsed
+        if started is not None:
+            external_call_seconds.observe(elapsed, service="gemini", operation=self.profile)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, failed=False)
+        usage = self._usage(response)
+        if usage:
+            record_tokens(self.profile, usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+
+    @staticmethod
+    def _usage(response) -> dict:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if getattr(message, "usage_metadata", None):
+                    return message.usage_metadata
+        return {}
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, failed=True)
+
+    def stats(self) -> dict:
+        completed = self.requests - self.in_flight
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "avg_latency_seconds": round(self.total_seconds / completed, 3) if completed else 0.0,
+        }
+
+
+class LLMRegistry:
+    """Process-wide chat model clients, built once per profile and reused.
+
+    Reusing a client keeps its underlying connection pool warm instead of
+    paying connection and client setup on every call.
+    """
+
+    def __init__(self):
+        self.profiles = {
+            "agent": {"temperature": settings.LLM_AGENT_TEMPERATURE},
+            "rag": {"temperature": settings.LLM_RAG_TEMPERATURE},
+            "summary": {"temperature": 0},
+        }
+        # Builds a client from (profile name, callbacks, **profile); None = Gemini.
+        # The offline benchmarks plug in fake models here.
+        self.factory: Optional[Callable[..., BaseChatModel]] = None
+        self._clients: Dict[str, BaseChatModel] = {}
+        self._counters: Dict[str, RequestCounter] = {}
+        self._lock = threading.Lock()
+
+    def set_factory(self, factory: Optional[Callable[..., BaseChatModel]]):
+        """Swap the client factory; clients already built are dropped"""
+        with self._lock:
+            self.factory = factory
+            self._clients.clear()
+            self._counters.clear()
+
+    def get(self, name: str) -> BaseChatModel:
+        client = self._clients.get(name)
+        if client is not None:
+            return client
+        with self._lock:
+            if name not in self._clients:
+                counter = RequestCounter(name)
+                self._counters[name] = counter
+                build = self.factory or self._build_gemini
+                self._clients[name] = build(name, [counter], **self.profiles[name])
+            return self._clients[name]
+
+    @staticmethod
+    def _build_gemini(name: str, callbacks: list, **profile) -> ChatGoogleGenerativeAI:
+        return ChatGoogleGenerativeAI(
+            model=settings.LLM_MODEL,
+            google_api_key=settings.GOOGLE_API_KEY,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES,
+            callbacks=callbacks,
+            **profile,
+        )
+
+    async def warm_up(self):
+        """Build every client up front, optionally sending a ping to open connections"""
+        for name in self.profiles:
+            client = self.get(name)
+            if settings.LLM_WARMUP_PING:
+                try:
+                    await client.ainvoke("ping")
+                except Exception as e:
+                    print(f"LLM warm-up for '{name}' failed: {e}")
+
+    def stats(self) -> dict:
+        return {name: counter.stats() for name, counter in self._counters.items()}
+
+
+llm_registry = LLMRegistry()
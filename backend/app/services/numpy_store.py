@@ -0,0 +1,441 @@
+import fcntl
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+SCORE_BLOCK_ROWS = 4096
+
+
+class Segment:
+    """One immutable batch of rows: a vector file (plus scales when int8) and its records"""
+
+    def __init__(self, directory: str, name: str, count: int, dim: int, dtype: str):
+        self.name = name
+        self.count = count
+        if name.startswith("legacy-"):
+            # Single-matrix layout written before segments existed
+            version = name.split("-", 1)[1]
+            paths = {
+                "float32": f"vectors.f32-{version}",
+                "int8": f"vectors.i8-{version}",
+                "scales": f"scales.f32-{version}",
+                "records": f"records.json-{version}",
+            }
+        else:
+            paths = {
+                "float32": f"{name}.f32",
+                "int8": f"{name}.i8",
+                "scales": f"{name}.scales",
+                "records": f"{name}.json",
+            }
+        self.files = [
+            os.path.join(directory, paths[key])
+            for key in ((dtype, "scales", "records") if dtype == "int8" else (dtype, "records"))
+        ]
+        if dtype == "int8":
+            self.matrix = np.memmap(self.files[0], dtype=np.int8, mode="r", shape=(count, dim))
+            self.scales = np.memmap(self.files[1], dtype=np.float32, mode="r", shape=(count,))
+        else:
+            self.matrix = np.memmap(self.files[0], dtype=np.float32, mode="r", shape=(count, dim))
+            self.scales = None
+        with open(self.files[-1]) as f:
+            records = json.load(f)
+        self.ids: List[str] = records["ids"]
+        self.texts: List[str] = records["documents"]
+        self.metadatas: List[dict] = records["metadatas"]
+
+    def float_rows(self, rows) -> np.ndarray:
+        block = np.asarray(self.matrix[rows], dtype=np.float32)
+        if self.scales is not None:
+            block = block * self.scales[rows][:, None]
+        return block
+
+    @staticmethod
+    def write(directory: str, name: str, matrix: np.ndarray, ids: List[str], texts: List[str],
+              metadatas: List[dict], quantize: bool) -> dict:
+        if quantize:
+            scales = np.abs(matrix).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            np.round(matrix / scales[:, None]).astype(np.int8).tofile(os.path.join(directory, f"{name}.i8"))
+            scales.astype(np.float32).tofile(os.path.join(directory, f"{name}.scales"))
+        else:
+            matrix.astype(np.float32).tofile(os.path.join(directory, f"{name}.f32"))
+        with open(os.path.join(directory, f"{name}.json"), "w") as f:
+            json.dump({"ids": ids, "documents": texts, "metadatas": metadatas}, f)
+        return {
+            "name": name,
+            "count": len(ids),
+            "dim": int(matrix.shape[1]),
+            "dtype": "int8" if quantize else "float32",
+            "deleted": [],
+        }
+
+
+class NumpyVectorStore(VectorStore):
+    """Vector store backed by append-only, memory-mapped embedding segments on disk.
+
+    Each upsert writes its rows as a new immutable segment; replaced or deleted
+    rows are tombstoned in ``manifest.json`` and metadata-only updates go to
+    small patch files, so a write costs the size of the batch, not the index.
+    Trailing segments are merged once they hold no more live rows than the
+    segments after them, which keeps the segment count logarithmic, and ``vacuum``
+    folds everything into one segment. The manifest is swapped atomically
+    under an flock; readers map segments read-only, so every worker on the
+    host shares the same page-cache pages. Vectors are L2-normalized at write
+    time and optionally int8-quantized with a per-row scale.
+
+    Besides the LangChain VectorStore interface it exposes the subset of the
+    Chroma collection API that VectorStoreManager uses (upsert, get, update,
+    delete, count), so either backend can sit behind ``VectorStoreManager.collection``.
+    """
+
+    def __init__(self, persist_directory: str, embedding_function: Embeddings, quantize: bool = False):
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.quantize = quantize
+        os.makedirs(persist_directory, exist_ok=True)
+        self._manifest_path = os.path.join(persist_directory, "manifest.json")
+        self._lock_path = os.path.join(persist_directory, ".lock")
+        self._loaded_version = None
+        self._manifest: dict = self._empty_manifest()
+        self._segment_cache: Dict[str, Segment] = {}  # segments are immutable, keep them across versions
+        self._segments: List[Segment] = []
+        self._deleted: List[np.ndarray] = []  # per segment, True where the row is tombstoned
+        self._overrides: Dict[Tuple[int, int], dict] = {}  # (segment, row) -> patched metadata
+        self._positions: Dict[str, Tuple[int, int]] = {}  # live id -> (segment, row)
+        self._state_lock = threading.RLock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding_function
+
+    # Storage
+
+    @staticmethod
+    def _empty_manifest() -> dict:
+        return {"version": 0, "segments": [], "patches": []}
+
+    def _read_manifest(self) -> Optional[dict]:
+        try:
+            with open(self._manifest_path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        if "segments" not in manifest:
+            # Single-matrix layout; read it as one segment until the next write
+            version = manifest["version"]
+            manifest = {
+                "version": version,
+                "segments": [{
+                    "name": f"legacy-{version}",
+                    "count": manifest["count"],
+                    "dim": manifest["dim"],
+                    "dtype": manifest["dtype"],
+                    "deleted": [],
+                }] if manifest["count"] else [],
+                "patches": [],
+            }
+        return manifest
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, name)
+
+    def _refresh(self):
+        """Remap segments if another process has published a new version"""
+        manifest = self._read_manifest()
+        version = manifest["version"] if manifest else 0
+        if version == self._loaded_version:
+            return
+        with self._state_lock:
+            try:
+                self._load(manifest)
+            except FileNotFoundError:
+                # A writer merged segments away between reading the manifest and mapping them
+                self._load(self._read_manifest())
+
+    def _load(self, manifest: Optional[dict]):
+        manifest = manifest or self._empty_manifest()
+        segments = [self._open(entry) for entry in manifest["segments"]]
+        index = {segment.name: i for i, segment in enumerate(segments)}
+
+        deleted = []
+        for segment, entry in zip(segments, manifest["segments"]):
+            mask = np.zeros(segment.count, dtype=bool)
+            mask[entry["deleted"]] = True
+            deleted.append(mask)
+
+        overrides = {}
+        for patch in manifest["patches"]:
+            with open(self._path(patch)) as f:
+                for name, rows in json.load(f).items():
+                    if name in index:  # patches for merged-away segments were folded in
+                        for row, metadata in rows.items():
+                            overrides[(index[name], int(row))] = metadata
+
+        positions = {}
+        for s, segment in enumerate(segments):
+            for row in np.flatnonzero(~deleted[s]):
+                positions[segment.ids[row]] = (s, int(row))
+
+        self._segment_cache = {segment.name: segment for segment in segments}
+        self._manifest = manifest
+        self._segments, self._deleted, self._overrides, self._positions = segments, deleted, overrides, positions
+        self._loaded_version = manifest["version"]
+
+    @contextmanager
+    def _write_lock(self):
+        with open(self._lock_path, "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _metadata(self, s: int, row: int) -> dict:
+        return self._overrides.get((s, row), self._segments[s].metadatas[row])
+
+    def _live_rows(self, s: int) -> np.ndarray:
+        return np.flatnonzero(~self._deleted[s])
+
+    def _new_manifest(self) -> dict:
+        """Copy of the loaded manifest for the next version"""
+        return {
+            "version": self._manifest["version"] + 1,
+            "segments": [
+                dict(entry, deleted=sorted(int(row) for row in np.flatnonzero(mask)))
+                for entry, mask in zip(self._manifest["segments"], self._deleted)
+            ],
+            "patches": list(self._manifest["patches"]),
+        }
+
+    def _open(self, entry: dict) -> Segment:
+        segment = self._segment_cache.get(entry["name"])
+        if segment is None:
+            segment = Segment(self.persist_directory, entry["name"], entry["count"], entry["dim"], entry["dtype"])
+            self._segment_cache[entry["name"]] = segment
+        return segment
+
+    def _merge(self, manifest: dict, first: int) -> List[str]:
+        """Rewrite segments[first:] of the new manifest as one segment without tombstones or patches.
+
+        Returns the names of the segments it replaced.
+        """
+        entries = manifest["segments"][first:]
+        loaded = {segment.name: s for s, segment in enumerate(self._segments)}
+        matrices, ids, texts, metadatas = [], [], [], []
+        for entry in entries:
+            segment = self._open(entry)
+            deleted = set(entry["deleted"])
+            rows = [row for row in range(segment.count) if row not in deleted]
+            if not rows:
+                continue
+            s = loaded.get(segment.name)
+            matrices.append(segment.float_rows(rows))
+            ids.extend(segment.ids[row] for row in rows)
+            texts.extend(segment.texts[row] for row in rows)
+            metadatas.extend(self._overrides.get((s, row), segment.metadatas[row]) for row in rows)
+        manifest["segments"][first:] = [Segment.write(
+            self.persist_directory, f"segment-{manifest['version']}-{uuid.uuid4().hex[:8]}",
+            np.vstack(matrices), ids, texts, metadatas, self.quantize,
+        )] if ids else []
+        return [entry["name"] for entry in entries]
+
+    def _publish(self, manifest: dict, obsolete: Iterable[str] = ()):
+        """Atomically point the manifest at a new version, then drop files it no longer uses"""
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._manifest_path)
+        # Readers that still map the old files keep them alive until they remap
+        for name in obsolete:
+            segment = self._segment_cache.get(name)
+            for path in segment.files if segment else []:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        self._refresh()
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    # Collection-style API
+
+    def count(self) -> int:
+        self._refresh()
+        return len(self._positions)
+
+    def upsert(self, ids: List[str], embeddings: List[List[float]], documents: List[str], metadatas: Optional[List[dict]] = None):
+        if not ids:
+            return
+        metadatas = metadatas or [None] * len(ids)
+        # The last occurrence of a repeated ID wins, as with a row-by-row upsert
+        last = {doc_id: row for row, doc_id in enumerate(ids)}
+        rows = sorted(last.values())
+        new_vectors = self._normalize(np.asarray(embeddings, dtype=np.float32)[rows])
+        with self._write_lock():
+            manifest = self._new_manifest()
+            for doc_id in last:
+                if doc_id in self._positions:
+                    s, row = self._positions[doc_id]
+                    manifest["segments"][s]["deleted"].append(row)
+            manifest["segments"].append(Segment.write(
+                self.persist_directory, f"segment-{manifest['version']}-{uuid.uuid4().hex[:8]}",
+                new_vectors,
+                [ids[row] for row in rows],
+                [documents[row] for row in rows],
+                [metadatas[row] or {} for row in rows],
+                self.quantize,
+            ))
+            # Merge the tail while a segment is no larger than the one after it,
+            # so each row is rewritten O(log n) times over the life of the index
+            first = len(manifest["segments"]) - 1
+            while first > 0 and self._live_count(manifest["segments"][first - 1]) <= sum(
+                self._live_count(entry) for entry in manifest["segments"][first:]
+            ):
+                first -= 1
+            obsolete = self._merge(manifest, first) if first < len(manifest["segments"]) - 1 else []
+            self._publish(manifest, obsolete)
+
+    @staticmethod
+    def _live_count(entry: dict) -> int:
+        return entry["count"] - len(entry["deleted"])
+
+    def update(self, ids: List[str], metadatas: List[dict], **kwargs):
+        """Replace metadata for existing IDs without touching their vectors"""
+        with self._write_lock():
+            patch: Dict[str, Dict[int, dict]] = {}
+            for doc_id, metadata in zip(ids, metadatas):
+                if doc_id in self._positions:
+                    s, row = self._positions[doc_id]
+                    patch.setdefault(self._segments[s].name, {})[row] = metadata or {}
+            if not patch:
+                return
+            manifest = self._new_manifest()
+            name = f"patch-{manifest['version']}-{uuid.uuid4().hex[:8]}.json"
+            with open(self._path(name), "w") as f:
+                json.dump(patch, f)
+            manifest["patches"].append(name)
+            self._publish(manifest)
+
+    def vacuum(self):
+        """Fold every segment, tombstone and patch into one segment and remove unused files"""
+        with self._write_lock():
+            manifest = self._new_manifest()
+            if len(manifest["segments"]) > 1 or manifest["patches"] or any(
+                entry["deleted"] for entry in manifest["segments"]
+            ):
+                obsolete = self._merge(manifest, 0)
+                manifest["patches"] = []
+                self._publish(manifest, obsolete)
+            in_use = {"manifest.json", ".lock"}
+            for segment in self._segments:
+                in_use.update(os.path.basename(path) for path in segment.files)
+            for name in os.listdir(self.persist_directory):
+                if name not in in_use:
+                    os.remove(self._path(name))
+
+    def _matching(self, ids: Optional[List[str]], where: Optional[dict]) -> List[Tuple[int, int]]:
+        if ids is not None:
+            return [self._positions[doc_id] for doc_id in ids if doc_id in self._positions]
+        return [
+            (s, int(row))
+            for s in range(len(self._segments))
+            for row in self._live_rows(s)
+            if not where or all(self._metadata(s, row).get(key) == value for key, value in where.items())
+        ]
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, include: Optional[List[str]] = None) -> dict:
+        self._refresh()
+        with self._state_lock:
+            rows = self._matching(ids, where)
+            return {
+                "ids": [self._segments[s].ids[row] for s, row in rows],
+                "documents": [self._segments[s].texts[row] for s, row in rows],
+                "metadatas": [self._metadata(s, row) for s, row in rows],
+            }
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[dict] = None, **kwargs):
+        with self._write_lock():
+            drop = self._matching(ids, where)
+            if not drop:
+                return
+            manifest = self._new_manifest()
+            for s, row in drop:
+                manifest["segments"][s]["deleted"].append(row)
+            self._publish(manifest)
+
+    # VectorStore API
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None, ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        embeddings = self.embedding_function.embed_documents(texts)
+        self.upsert(ids=ids, embeddings=embeddings, documents=texts, metadatas=metadatas)
+        return ids
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4) -> List[Tuple[Document, float]]:
+        self._refresh()
+        with self._state_lock:
+            segments, deleted, overrides = self._segments, self._deleted, self._overrides
+        if not segments or k <= 0:
+            return []
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+        candidates = []  # (score, segment, row)
+        for s, segment in enumerate(segments):
+            if segment.scales is not None:
+                # Dequantize block by block so a query never materializes the full float matrix
+                scores = np.empty(segment.count, dtype=np.float32)
+                for start in range(0, segment.count, SCORE_BLOCK_ROWS):
+                    block = segment.matrix[start:start + SCORE_BLOCK_ROWS].astype(np.float32)
+                    scores[start:start + SCORE_BLOCK_ROWS] = block @ query
+                scores *= segment.scales
+            else:
+                scores = segment.matrix @ query
+            scores = np.where(deleted[s], -np.inf, scores)
+            top = min(k, segment.count)
+            for row in np.argpartition(-scores, top - 1)[:top]:
+                if np.isfinite(scores[row]):
+                    candidates.append((float(scores[row]), s, int(row)))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        return [
+            (
+                Document(
+                    id=segments[s].ids[row],
+                    page_content=segments[s].texts[row],
+                    metadata=overrides.get((s, row), segments[s].metadatas[row]),
+                ),
+                score,
+            )
+            for score, s, row in candidates[:k]
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k=k)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k)]
+
+    def _select_relevance_score_fn(self):
+        # Scores are cosine similarities in [-1, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[dict]] = None, persist_directory: str = "vector_index", **kwargs: Any) -> "NumpyVectorStore":
+        store = cls(persist_directory=persist_directory, embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas)
+        return store
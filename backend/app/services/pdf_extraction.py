@@ -0,0 +1,50 @@
+"""Page-level PDF text extraction.
+
+Kept free of app/langchain imports so process-pool workers start quickly.
+"""
+from typing import List, Tuple
+import pypdf
+import pdfplumber
+
+
+def count_pages(file_path: str) -> int:
+    with open(file_path, 'rb') as file:
+        return len(pypdf.PdfReader(file).pages)
+
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extract pages [start, end) as (1-based page number, text) pairs.
+
+    Uses pdfplumber and falls back to pypdf for any single page it fails on.
+    """
+    pages = []
+    fallback_reader = None
+
+    def fallback(index: int) -> str:
+        nonlocal fallback_reader
+        if fallback_reader is None:
+            fallback_reader = pypdf.PdfReader(file_path)
+        return fallback_reader.pages[index].extract_text() or ""
+
+    try:
+        pdf = pdfplumber.open(file_path)
+    except Exception as e:
+        print(f"pdfplumber failed to open {file_path}: {e}, trying pypdf")
+        pdf = None
+
+    try:
+        for index in range(start, end):
+            if pdf is None:
+                page_text = fallback(index)
+            else:
+                try:
+                    page_text = pdf.pages[index].extract_text() or ""
+                except Exception as e:
+                    print(f"pdfplumber failed on page {index + 1}: {e}, trying pypdf")
+                    page_text = fallback(index)
+            pages.append((index + 1, page_text))
+    finally:
+        if pdf is not None:
+            pdf.close()
+
+    return pages
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Tuple
+from langchain_core.tools import BaseTool
+from pydantic import Field, PrivateAttr
+from app.config import get_settings
+from app.services.answer_cache import normalize_query
+from app.utils.cache import SingleFlight, TTLCache
+from app.utils.metrics import external_call_seconds
+
+settings = get_settings()
+
+KNOWN_CITIES = {
+    "mumbai", "delhi", "new delhi", "bengaluru", "bangalore", "hyderabad", "ahmedabad",
+    "chennai", "kolkata", "pune", "jaipur", "lucknow", "kanpur", "nagpur", "indore",
+    "thane", "bhopal", "visakhapatnam", "patna", "vadodara", "ghaziabad", "ludhiana",
+    "agra", "nashik", "faridabad", "meerut", "rajkot", "varanasi", "srinagar", "aurangabad",
+    "amritsar", "noida", "gurgaon", "gurugram", "chandigarh", "coimbatore", "kochi",
+    "mysuru", "mysore", "surat", "goa", "dehradun", "bhubaneswar", "guwahati", "ranchi",
+}
+
+FILLER_WORDS = {
+    "a", "an", "the", "in", "at", "near", "me", "around", "for", "find", "search",
+    "show", "list", "best", "good", "top", "please", "some", "any", "of", "i", "need",
+}
+# "near me", "around here": a place word, not a city
+NOT_CITIES = {"me", "here", "us", "you", "home", "my", "this", "there"}
+
+
+def search_key(query: str, extra_args: Optional[dict] = None) -> Tuple[str, str, str]:
+    """(topic, city, extra args) so rephrasings of the same provider lookup share an entry"""
+    normalized = normalize_query(query)
+    city = ""
+    for candidate in sorted(KNOWN_CITIES, key=len, reverse=True):
+        if re.search(rf"\b{candidate}\b", normalized):
+            city = candidate
+            normalized = re.sub(rf"\b{candidate}\b", " ", normalized)
+            break
+    else:
+        match = re.search(r"\b(?:in|at|near)\s+([a-z]+)\s*$", normalized)
+        if match and match.group(1) not in NOT_CITIES:
+            city = match.group(1)
+            normalized = normalized[:match.start()]
+    topic = " ".join(sorted(set(normalized.split()) - FILLER_WORDS))
+    extras = json.dumps(extra_args or {}, sort_keys=True, default=str)
+    return topic, city, extras
+
+
+class SearchResultStore:
+    """Optional on-disk copy of search results so they survive restarts"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_results ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Tuple[float, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fetched_at, value FROM search_results WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def set(self, key: str, fetched_at: float, value: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results (key, value, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), fetched_at),
+            )
+            self._conn.commit()
+
+
+class CachedSearchTool(BaseTool):
+    """Wraps a search tool with a TTL + LRU cache and stale-while-revalidate.
+
+    Fresh entries are returned directly; entries past ``ttl`` but within
+    ``stale_ttl`` are returned immediately while a background task refreshes
+    them; anything older is fetched synchronously.
+    """
+
+    tool: BaseTool
+    ttl: float
+    stale_ttl: float
+    cache: Any
+    store: Any = None
+    refreshed: int = 0
+    flights: Any = Field(default_factory=SingleFlight)
+    _refreshing: dict = PrivateAttr(default_factory=dict)
+
+    @classmethod
+    def wrap(cls, tool: BaseTool) -> "CachedSearchTool":
+        return cls(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            tool=tool,
+            ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+            stale_ttl=settings.SEARCH_CACHE_STALE_SECONDS,
+            cache=TTLCache(
+                maxsize=settings.SEARCH_CACHE_MAX_ENTRIES,
+                ttl=settings.SEARCH_CACHE_TTL_SECONDS + settings.SEARCH_CACHE_STALE_SECONDS,
+            ),
+            store=SearchResultStore(settings.SEARCH_CACHE_PATH) if settings.SEARCH_CACHE_PATH else None,
+        )
+
+    def _key(self, kwargs: dict) -> str:
+        kwargs = dict(kwargs)
+        query = kwargs.pop("query", "")
+        return "|".join(search_key(query, kwargs))
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self.cache.get(key)
+        if entry is None and self.store is not None:
+            entry = self._promote(key, self.store.get(key))
+        return entry
+
+    async def _alookup(self, key: str) -> Optional[Tuple[float, Any]]:
+        entry = self.cache.get(key)
+        if entry is None and self.store is not None:
+            # sqlite3 blocks; keep disk reads off the event loop
+            entry = self._promote(key, await asyncio.to_thread(self.store.get, key))
+        return entry
+
+    def _promote(self, key: str, entry: Optional[Tuple[float, Any]]) -> Optional[Tuple[float, Any]]:
+        """Copy a disk entry into memory unless it is past the stale window"""
+        if entry is not None and time.time() - entry[0] < self.ttl + self.stale_ttl:
+            self.cache.set(key, entry)
+            return entry
+        return None
+
+    def _save(self, key: str, value: Any):
+        fetched_at = time.time()
+        self.cache.set(key, (fetched_at, value))
+        if self.store is not None:
+            self.store.set(key, fetched_at, value)
+
+    async def _asave(self, key: str, value: Any):
+        fetched_at = time.time()
+        self.cache.set(key, (fetched_at, value))
+        if self.store is not None:
+            await asyncio.to_thread(self.store.set, key, fetched_at, value)
+
+    async def _refresh(self, key: str, kwargs: dict):
+        try:
+            with external_call_seconds.time(service="tavily", operation="refresh"):
+                result = await self.tool.ainvoke(kwargs)
+            await self._asave(key, result)
+            self.refreshed += 1
+        except Exception as e:
+            print(f"Background search refresh failed: {e}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    def _run(self, run_manager=None, **kwargs) -> Any:
+        key = self._key(kwargs)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry[1]
+        with external_call_seconds.time(service="tavily", operation="search"):
+            result = self.tool.invoke(kwargs)
+        self._save(key, result)
+        return result
+
+    async def _arun(self, run_manager=None, **kwargs) -> Any:
+        key = self._key(kwargs)
+        entry = await self._alookup(key)
+        if entry is not None:
+            fetched_at, value = entry
+            if time.time() - fetched_at >= self.ttl and key not in self._refreshing:
+                # Keep a reference so the refresh task is not garbage collected
+                self._refreshing[key] = asyncio.create_task(self._refresh(key, kwargs))
+            return value
+        return await self.flights.do(key, lambda: self._fetch(key, kwargs))
+
+    async def _fetch(self, key: str, kwargs: dict) -> Any:
+        with external_call_seconds.time(service="tavily", operation="search"):
+            result = await self.tool.ainvoke(kwargs)
+        await self._asave(key, result)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "background_refreshes": self.refreshed,
+            "coalesced": self.flights.stats(),
+        }
@@ -0,0 +1,57 @@
+from datetime import datetime
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from app.models.message import Message
+from app.models.session import Session as ChatSession
+
+PREVIEW_LENGTH = 120
+
+
+def record_message(session_id: int, content: str, at: datetime):
+    """UPDATE bumping a session's denormalized summary for one new message.
+
+    Executed in the same transaction as the message insert; the count is
+    incremented in SQL so concurrent writers don't lose updates.
+    """
+    return update(ChatSession).where(ChatSession.id == session_id).values(
+        message_count=func.coalesce(ChatSession.message_count, 0) + 1,
+        last_message_at=at,
+        last_message_preview=content[:PREVIEW_LENGTH],
+        updated_at=at,
+    ).execution_options(synchronize_session=False)
+
+
+def backfill_session_summaries(db: Session, batch_size: int = 500) -> int:
+    """Recompute message_count / last_message_at / last_message_preview from the messages table"""
+    messages = Message.__table__
+    count = select(func.count(messages.c.id)).where(
+        messages.c.session_id == ChatSession.id
+    ).scalar_subquery()
+    last_at = select(func.max(messages.c.created_at)).where(
+        messages.c.session_id == ChatSession.id
+    ).scalar_subquery()
+    preview = select(func.substr(messages.c.content, 1, PREVIEW_LENGTH)).where(
+        messages.c.session_id == ChatSession.id
+    ).order_by(messages.c.created_at.desc(), messages.c.id.desc()).limit(1).scalar_subquery()
+
+    updated = 0
+    last_id = 0
+    while True:
+        # Short transactions over id ranges rather than one table-wide UPDATE
+        ids = db.execute(
+            select(ChatSession.id).where(ChatSession.id > last_id).order_by(ChatSession.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return updated
+        db.execute(
+            update(ChatSession).where(ChatSession.id.in_(ids)).values(
+                message_count=count,
+                last_message_at=last_at,
+                last_message_preview=preview,
+                # Leave updated_at alone; it orders the session list
+                updated_at=ChatSession.updated_at,
+            ).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        updated += len(ids)
+        last_id = ids[-1]
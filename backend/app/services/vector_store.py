@@ -1,44 +1,322 @@
 import os
+import time
+import hashlib
+import sqlite3
+import uuid
+import asyncio
 import chromadb
+from functools import lru_cache
 from chromadb.config import Settings
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_chroma import Chroma
-from typing import List
+from typing import Any, Callable, List, Optional
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
 from app.config import get_settings
+from app.services.embedding_cache import CachedEmbeddings, get_embedding_cache
+from app.services.numpy_store import NumpyVectorStore
+from app.utils.metrics import external_call_seconds
+from app.services.lexical_index import get_lexical_index, reciprocal_rank_fusion, tokenize
 
 settings = get_settings()
 
+def google_embeddings() -> Embeddings:
+    # Ensure API key is set
+    if not os.getenv('GOOGLE_API_KEY'):
+        os.environ['GOOGLE_API_KEY'] = settings.GOOGLE_API_KEY
+    
+    return GoogleGenerativeAIEmbeddings(
+        model=settings.EMBEDDING_MODEL,
+        google_api_key=settings.GOOGLE_API_KEY  # Explicitly pass API key
+    )
+
+# Builds the upstream embedding client; the offline benchmarks swap in a fake
+embeddings_factory: Callable[[], Embeddings] = google_embeddings
+
 class VectorStoreManager:
     def __init__(self):
-        # Ensure API key is set
-        if not os.getenv('GOOGLE_API_KEY'):
-            os.environ['GOOGLE_API_KEY'] = settings.GOOGLE_API_KEY
-        
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/embedding-001",
-            google_api_key=settings.GOOGLE_API_KEY  # Explicitly pass API key
+        base_embeddings = embeddings_factory()
+        # Cache wraps both ingestion and query embedding calls
+        self.embeddings = CachedEmbeddings(
+            base_embeddings,
+            model_name=settings.EMBEDDING_MODEL,
+            cache=get_embedding_cache(),
         )
-        self.persist_directory = settings.CHROMA_DB_DIR
-        
-        # Initialize Chroma client
-        self.client = chromadb.PersistentClient(path=self.persist_directory)
+        if settings.VECTOR_BACKEND == "numpy":
+            self.persist_directory = settings.VECTOR_INDEX_DIR
+            self.client = None
+            self.vector_store = NumpyVectorStore(
+                persist_directory=self.persist_directory,
+                embedding_function=self.embeddings,
+                quantize=settings.VECTOR_INDEX_QUANTIZE,
+            )
+            self.collection = self.vector_store
+        else:
+            self.persist_directory = settings.CHROMA_DB_DIR
+            
+            # Initialize Chroma client
+            self.client = chromadb.PersistentClient(path=self.persist_directory)
+            
+            # Initialize vector store
+            self.vector_store = Chroma(
+                client=self.client,
+                collection_name="medical_documents",
+                embedding_function=self.embeddings,
+            )
+            self.collection = self.vector_store._collection
         
-        # Initialize vector store
-        self.vector_store = Chroma(
-            client=self.client,
-            collection_name="medical_documents",
-            embedding_function=self.embeddings,
-        )
+        # BM25 index over the same chunks, updated as they are ingested
+        self.lexical_index = get_lexical_index()
     
     def add_documents(self, documents: List[Document]):
         """Add documents to vector store"""
-        self.vector_store.add_documents(documents)
+        ids = self.vector_store.add_documents(documents)
+        self.lexical_index.add(
+            ids,
+            [doc.page_content for doc in documents],
+            [doc.metadata for doc in documents],
+        )
+    
+    @staticmethod
+    def chunk_id(text: str) -> str:
+        """Deterministic vector ID for a chunk: SHA-256 of its text"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def existing_ids(self, ids: List[str]) -> set:
+        """Subset of ids already present in the collection"""
+        if not ids:
+            return set()
+        return set(self.collection.get(ids=ids, include=[])["ids"])
+    
+    def delete_ids(self, ids: List[str]):
+        """Remove vectors by ID from the collection and the BM25 index"""
+        if not ids:
+            return
+        self.collection.delete(ids=ids)
+        self.lexical_index.remove(ids)
+    
+    def update_metadatas(self, ids: List[str], metadatas: List[dict]):
+        """Replace chunk metadata without re-embedding"""
+        if not ids:
+            return
+        self.collection.update(ids=ids, metadatas=metadatas)
+        self.lexical_index.update_metadata(ids, metadatas)
+    
+    def all_metadatas(self) -> dict:
+        """Every vector ID in the collection mapped to its metadata"""
+        data = self.collection.get(include=["metadatas"])
+        return dict(zip(data["ids"], data["metadatas"]))
+    
+    def stats(self) -> dict:
+        """Vector count and on-disk size of the collection"""
+        size = 0
+        for root, _, files in os.walk(self.persist_directory):
+            size += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return {"vectors": self.collection.count(), "size_bytes": size}
+    
+    def vacuum(self):
+        """Reclaim disk space left by deleted vectors"""
+        if isinstance(self.vector_store, NumpyVectorStore):
+            self.vector_store.vacuum()
+            return
+        conn = sqlite3.connect(os.path.join(self.persist_directory, "chroma.sqlite3"))
+        try:
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+    
+    def delete_where(self, where: dict) -> int:
+        """Remove every vector whose metadata matches where, returns the count removed"""
+        ids = self.collection.get(where=where, include=[])["ids"]
+        self.delete_ids(ids)
+        return len(ids)
+    
+    async def aadd_documents_batched(
+        self,
+        documents: List[Document],
+        ids: Optional[List[str]] = None,
+        batch_size: int = None,
+        max_concurrency: int = None,
+        max_retries: int = None,
+        progress_callback: Callable[[int], None] = None,
+    ) -> dict:
+        """Embed documents in concurrent batches and upsert each batch as it finishes"""
+        batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        max_concurrency = max_concurrency or settings.INGEST_MAX_CONCURRENCY
+        max_retries = settings.INGEST_MAX_RETRIES if max_retries is None else max_retries
+        
+        ids = ids or [str(uuid.uuid4()) for _ in documents]
+        batches = [
+            (documents[i:i + batch_size], ids[i:i + batch_size])
+            for i in range(0, len(documents), batch_size)
+        ]
+        semaphore = asyncio.Semaphore(max_concurrency)
+        started = time.perf_counter()
+        
+        async def process_batch(batch: List[Document], batch_ids: List[str]):
+            texts = [doc.page_content for doc in batch]
+            async with semaphore:
+                for attempt in range(max_retries + 1):
+                    try:
+                        vectors = await self.embeddings.aembed_documents(texts)
+                        break
+                    except Exception as e:
+                        if attempt == max_retries:
+                            raise
+                        print(f"Embedding batch failed (attempt {attempt + 1}): {e}, retrying")
+                        await asyncio.sleep(2 ** attempt)
+            # Both backends are synchronous, keep the upsert off the event loop
+            stored = asyncio.ensure_future(asyncio.to_thread(store_batch, batch, batch_ids, texts, vectors))
+            try:
+                await asyncio.shield(stored)
+            except asyncio.CancelledError:
+                # The thread can't be interrupted; let it land before the caller moves on
+                await stored
+                raise
+            if progress_callback:
+                progress_callback(len(batch))
+        
+        def store_batch(batch: List[Document], batch_ids: List[str], texts: List[str], vectors):
+            self.collection.upsert(
+                ids=batch_ids,
+                embeddings=vectors,
+                documents=texts,
+                metadatas=[doc.metadata or None for doc in batch],
+            )
+            self.lexical_index.add(batch_ids, texts, [doc.metadata for doc in batch])
+        
+        tasks = [asyncio.ensure_future(process_batch(batch, batch_ids)) for batch, batch_ids in batches]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # Stop the other batches so nothing is upserted after the job is failed
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        
+        elapsed = time.perf_counter() - started
+        return {
+            "chunks": len(documents),
+            "batches": len(batches),
+            "seconds": round(elapsed, 3),
+            "chunks_per_sec": round(len(documents) / elapsed, 2) if elapsed else 0.0,
+        }
     
     def get_retriever(self, k: int = 3):
         """Get retriever for RAG"""
+        if settings.RETRIEVAL_MODE == "hybrid":
+            return HybridRetriever(manager=self, k=k)
         return self.vector_store.as_retriever(search_kwargs={"k": k})
     
+    def sync_lexical_index(self, force: bool = False):
+        """Rebuild the BM25 index from the collection when it is out of date"""
+        index = self.lexical_index
+        now = time.monotonic()
+        if not force and index.bootstrapped and now - index.last_synced < settings.LEXICAL_INDEX_SYNC_SECONDS:
+            return
+        index.last_synced = now
+        collection = self.collection
+        # Another worker may have ingested or deleted chunks since the last sync
+        if not force and index.bootstrapped and collection.count() == len(index):
+            return
+        data = collection.get(include=["documents", "metadatas"])
+        index.rebuild(data["ids"], data["documents"], data["metadatas"])
+    
+    def lexical_search(self, query: str, k: int = 3) -> List[Document]:
+        """BM25 keyword search, no embedding call"""
+        self.sync_lexical_index()
+        return self._lexical_documents([doc_id for doc_id, _ in self.lexical_index.search(query, k=k)])
+    
+    def hybrid_search(self, query: str, k: int = 3) -> List[Document]:
+        """Fuse BM25 and dense similarity results with reciprocal rank fusion"""
+        self.sync_lexical_index()
+        with external_call_seconds.time(service="vector_store", operation="lexical_search"):
+            lexical_hits = self.lexical_index.search(query, k=k * settings.HYBRID_FETCH_MULTIPLIER)
+        if self._is_lexical_match(query, lexical_hits):
+            return self._lexical_documents([doc_id for doc_id, _ in lexical_hits[:k]])
+        
+        with external_call_seconds.time(service="vector_store", operation="similarity_search"):
+            dense_docs = self.vector_store.similarity_search(query, k=k * settings.HYBRID_FETCH_MULTIPLIER)
+        return self._fuse(dense_docs, lexical_hits, k)
+    
+    async def ahybrid_search(self, query: str, k: int = 3) -> List[Document]:
+        """Async hybrid_search: embeds asynchronously, runs BM25 and the sync stores in threads"""
+        await asyncio.to_thread(self.sync_lexical_index)
+        with external_call_seconds.time(service="vector_store", operation="lexical_search"):
+            lexical_hits, lexical_docs = await asyncio.to_thread(self._lexical_candidates, query, k)
+        if lexical_docs is not None:
+            return lexical_docs
+        
+        # The embedding cache lookup runs in a thread inside aembed_query
+        embedding = await self.embeddings.aembed_query(query)
+        with external_call_seconds.time(service="vector_store", operation="similarity_search"):
+            dense_docs = await asyncio.to_thread(
+                self.vector_store.similarity_search_by_vector, embedding, k * settings.HYBRID_FETCH_MULTIPLIER
+            )
+        return await asyncio.to_thread(self._fuse, dense_docs, lexical_hits, k)
+    
+    def _lexical_candidates(self, query: str, k: int):
+        """BM25 hits for fusion, plus the final documents when BM25 alone answers the query"""
+        lexical_hits = self.lexical_index.search(query, k=k * settings.HYBRID_FETCH_MULTIPLIER)
+        if self._is_lexical_match(query, lexical_hits):
+            return lexical_hits, self._lexical_documents([doc_id for doc_id, _ in lexical_hits[:k]])
+        return lexical_hits, None
+    
+    def _is_lexical_match(self, query: str, lexical_hits: list) -> bool:
+        # Short keyword queries fully matched by BM25 skip the embedding round trip
+        return bool(
+            lexical_hits
+            and len(tokenize(query)) <= settings.LEXICAL_ONLY_MAX_TERMS
+            and self.lexical_index.covers(query, lexical_hits[0][0])
+        )
+    
+    def _fuse(self, dense_docs: List[Document], lexical_hits: list, k: int) -> List[Document]:
+        docs_by_id = {doc.id: doc for doc in dense_docs if doc.id}
+        fused = reciprocal_rank_fusion(
+            [[doc.id for doc in dense_docs if doc.id], [doc_id for doc_id, _ in lexical_hits]],
+            k=settings.RRF_K,
+        )
+        lexical_docs = {
+            doc.id: doc for doc in self._lexical_documents([doc_id for doc_id in fused if doc_id not in docs_by_id])
+        }
+        return [
+            docs_by_id.get(doc_id) or lexical_docs[doc_id]
+            for doc_id in fused if doc_id in docs_by_id or doc_id in lexical_docs
+        ][:k]
+    
+    def _lexical_documents(self, doc_ids: List[str]) -> List[Document]:
+        # Chunks removed after the search ran (concurrent delete or rebuild) are skipped
+        found = self.lexical_index.get(doc_ids)
+        return [
+            Document(id=doc_id, page_content=found[doc_id][0], metadata=found[doc_id][1])
+            for doc_id in doc_ids if doc_id in found
+        ]
+    
     def similarity_search(self, query: str, k: int = 3):
         """Perform similarity search"""
         return self.vector_store.similarity_search(query, k=k)
+    
+    def embedding_cache_stats(self) -> dict:
+        """Hit/miss counters for the embedding cache"""
+        return self.embeddings.cache.stats()
+
+
+@lru_cache()
+def get_vector_store_manager():
+    """One manager per process, shared by the admin API and the RAG agent"""
+    return VectorStoreManager()
+
+
+class HybridRetriever(BaseRetriever):
+    """Retriever over VectorStoreManager.hybrid_search"""
+    
+    manager: Any
+    k: int = 3
+    
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.manager.hybrid_search(query, k=self.k)
+    
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return await self.manager.ahybrid_search(query, k=self.k)
@@ -0,0 +1,188 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+# Seconds; spans cache hits (sub-ms) through slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> list:
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        lines = []
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_request_seconds = registry.histogram(
+    "healthagent_http_request_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+graph_node_seconds = registry.histogram(
+    "healthagent_graph_node_seconds", "LangGraph node latency", ["node"]
+)
+tool_seconds = registry.histogram(
+    "healthagent_tool_seconds", "Agent tool latency", ["tool", "status"]
+)
+external_call_seconds = registry.histogram(
+    "healthagent_external_call_seconds", "Latency of calls to upstream services and stores",
+    ["service", "operation"]
+)
+db_query_seconds = registry.histogram(
+    "healthagent_db_query_seconds", "Database round-trip latency", ["operation"]
+)
+llm_tokens_total = registry.counter(
+    "healthagent_llm_tokens_total", "LLM tokens used", ["profile", "type"]
+)
+principal_lookups_total = registry.counter(
+    "healthagent_principal_lookups_total", "How authenticated users were resolved", ["source"]
+)
+password_hash_seconds = registry.histogram(
+    "healthagent_password_hash_seconds", "bcrypt hash/verify time", ["operation"]
+)
+password_hash_queue_seconds = registry.histogram(
+    "healthagent_password_hash_queue_seconds", "Time waiting for a bcrypt worker", ["operation"]
+)
+password_hash_rejected_total = registry.counter(
+    "healthagent_password_hash_rejected_total", "bcrypt requests rejected because the queue was full", ["operation"]
+)
+request_tokens = registry.histogram(
+    "healthagent_request_tokens", "LLM tokens used per chat request", ["type"], buckets=TOKEN_BUCKETS
+)
+
+# Token usage of the chat request being handled; LLM callbacks add to it
+current_request_tokens: ContextVar[Optional[Dict[str, int]]] = ContextVar("current_request_tokens", default=None)
+
+
+def record_tokens(profile: str, input_tokens: int, output_tokens: int):
+    llm_tokens_total.inc(input_tokens, profile=profile, type="input")
+    llm_tokens_total.inc(output_tokens, profile=profile, type="output")
+    usage = current_request_tokens.get()
+    if usage is not None:
+        usage["input"] += input_tokens
+        usage["output"] += output_tokens
+
+
+@contextmanager
+def track_request_tokens():
+    """Collect token usage for everything run inside the block into one observation"""
+    usage = {"input": 0, "output": 0}
+    token = current_request_tokens.set(usage)
+    try:
+        yield usage
+    finally:
+        try:
+            current_request_tokens.reset(token)
+        except ValueError:
+            # Exited from another context, e.g. a streaming generator closed by its consumer
+            pass
+        request_tokens.observe(usage["input"], type="input")
+        request_tokens.observe(usage["output"], type="output")
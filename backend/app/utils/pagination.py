@@ -0,0 +1,41 @@
+import base64
+from datetime import datetime
+from typing import Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for a (timestamp, id) position"""
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, int]]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        timestamp, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def cursor_headers(oldest: Tuple[datetime, int], newest: Tuple[datetime, int], has_more: bool,
+                   paged_before: bool, paged_after: bool) -> dict:
+    """X-Before-Cursor / X-After-Cursor headers for the older / newer neighbouring pages.
+
+    has_more says whether the query found rows beyond the page in its own direction;
+    the other direction is known to have rows whenever a cursor was given.
+    """
+    has_older = True if paged_after else has_more
+    has_newer = has_more if paged_after else paged_before
+    headers = {}
+    if has_older:
+        headers["X-Before-Cursor"] = encode_cursor(*oldest)
+    if has_newer:
+        headers["X-After-Cursor"] = encode_cursor(*newest)
+    return headers
@@ -0,0 +1,184 @@
+"""Offline stand-ins for Gemini chat, Gemini embeddings and Tavily search.
+
+Each fake sleeps for a configurable latency and returns deterministic output,
+so the load test exercises the API, LangGraph and storage layers without
+network calls or quota.
+"""
+import asyncio
+import hashlib
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+PROVIDER_PATTERN = re.compile(r"\b(doctors?|clinics?|hospitals?|\w+logists?|dentists?)\b", re.I)
+BOOKING_PATTERN = re.compile(r"\b(book|appointment|schedule)\b", re.I)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with Gemini-like latency that can emit tool calls.
+
+    With tools bound, a new user message is answered with a tool call picked by
+    keyword (search for provider questions, RAG otherwise); anything after a
+    tool result is answered with ``output_tokens`` words of text.
+    """
+
+    latency: float = 0.4  # seconds to first token
+    token_latency: float = 0.005  # seconds per streamed token
+    output_tokens: int = 80
+    tool_names: List[str] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs) -> "FakeChatModel":
+        names = [convert_to_openai_tool(t)["function"]["name"] for t in tools]
+        return self.model_copy(update={"tool_names": names})
+
+    def _respond(self, messages: List[BaseMessage]) -> AIMessage:
+        last = messages[-1]
+        if self.tool_names and isinstance(last, HumanMessage) and not BOOKING_PATTERN.search(str(last.content)):
+            search = next((n for n in self.tool_names if "search" in n), None)
+            rag = next((n for n in self.tool_names if "rag" in n), None)
+            name = search if search and PROVIDER_PATTERN.search(str(last.content)) else rag
+            if name:
+                return AIMessage(
+                    content="",
+                    tool_calls=[{"name": name, "args": {"query": str(last.content)}, "id": f"call_{uuid.uuid4().hex}"}],
+                )
+        digest = hashlib.sha256(str(last.content).encode("utf-8")).hexdigest()
+        words = [digest[i % 56:i % 56 + 8] for i in range(self.output_tokens)]
+        return AIMessage(content=" ".join(words))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages)
+        time.sleep(self.latency + self.token_latency * self.output_tokens * bool(message.content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages)
+        await asyncio.sleep(self.latency + self.token_latency * self.output_tokens * bool(message.content))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        result = self._generate(messages, stop, run_manager, **kwargs)
+        message = result.generations[0].message
+        yield ChatGenerationChunk(message=AIMessageChunk(content=message.content, tool_calls=message.tool_calls))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages)
+        await asyncio.sleep(self.latency)
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", tool_calls=message.tool_calls))
+            return
+        for i, word in enumerate(message.content.split(" ")):
+            await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else f" {word}"))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+def fake_llm_factory(latency: float, token_latency: float, output_tokens: int):
+    """Factory for LLMRegistry.set_factory"""
+    def build(name: str, callbacks: list, **profile) -> FakeChatModel:
+        return FakeChatModel(
+            latency=latency,
+            token_latency=token_latency,
+            output_tokens=output_tokens,
+            callbacks=callbacks,
+        )
+    return build
+
+
+class FakeEmbeddings(Embeddings):
+    """Deterministic hash-seeded unit vectors"""
+
+    def __init__(self, latency: float = 0.05, dimensions: int = 768):
+        self.latency = latency
+        self.dimensions = dimensions
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return self._vector(text)
+
+
+class FakeSearchTool(BaseTool):
+    """Returns Tavily-shaped results after a fixed delay"""
+
+    name: str = "tavily_search"
+    description: str = "Fake web search"
+    latency: float = 0.8
+    max_results: int = 3
+
+    def _results(self, query: str) -> dict:
+        return {
+            "query": query,
+            "results": [
+                {
+                    "title": f"Result {i + 1} for {query}",
+                    "url": f"https://example.com/{i + 1}",
+                    "content": f"Clinic {i + 1} offers consultations related to: {query}",
+                    "score": 1.0 - i * 0.1,
+                }
+                for i in range(self.max_results)
+            ],
+        }
+
+    def _run(self, query: str, **kwargs) -> dict:
+        time.sleep(self.latency)
+        return self._results(query)
+
+    async def _arun(self, query: str, **kwargs) -> dict:
+        await asyncio.sleep(self.latency)
+        return self._results(query)
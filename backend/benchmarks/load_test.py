@@ -0,0 +1,264 @@
+"""Offline load test for the chat API.
+
+Serves the FastAPI app with uvicorn on a loopback port, in-process, with fake
+Gemini/Tavily clients (see fakes.py), and drives simulated users through signup, login, session creation and chat,
+then reports throughput and p50/p95/p99 latency per stage.
+
+    cd backend
+    python -m benchmarks.load_test --users 50 --messages 3
+    python -m benchmarks.load_test --users 20 --stream --json bench.json --fail-p95 chat=2.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List
+import numpy as np
+
+QUESTIONS = [
+    "What are the symptoms of dengue fever?",
+    "How is type 2 diabetes treated?",
+    "Find a cardiologist in Pune",
+    "What causes frequent migraines?",
+    "List good dentists in Mumbai",
+    "Can you tell me about vitamin D deficiency?",
+    "Hospitals in Delhi with a cardiac emergency unit",
+    "Hello, what can you help me with?",
+]
+
+
+def configure_environment(args):
+    """Point every store at a scratch directory; must run before the app is imported"""
+    workdir = args.workdir or tempfile.mkdtemp(prefix="healthagent-bench-")
+    os.environ.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark-secret"),
+        "GOOGLE_API_KEY": "offline",
+        "TAVILY_API_KEY": "offline",
+        "CHECKPOINT_BACKEND": args.checkpointer,
+        "CHECKPOINT_SQLITE_PATH": os.path.join(workdir, "checkpoints.sqlite3"),
+        "VECTOR_BACKEND": "numpy",
+        "VECTOR_INDEX_DIR": os.path.join(workdir, "vector_index"),
+        "CHROMA_DB_DIR": os.path.join(workdir, "chroma_db"),
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+        "EMBEDDING_CACHE_DIR": os.path.join(workdir, "embedding_cache"),
+        "SEARCH_CACHE_PATH": "",
+        "LLM_WARMUP_PING": "false",
+        "INTENT_ROUTER_ENABLED": "false" if args.no_router else "true",
+    })
+    return workdir
+
+
+def install_fakes(args):
+    """Swap upstream clients for the offline fakes before the agent is built"""
+    from benchmarks.fakes import FakeEmbeddings, FakeSearchTool, fake_llm_factory
+    from app.services import vector_store
+    from app.services.llm_registry import llm_registry
+
+    llm_registry.set_factory(fake_llm_factory(args.llm_latency, args.token_latency, args.output_tokens))
+    vector_store.embeddings_factory = lambda: FakeEmbeddings(latency=args.embed_latency)
+
+    from app.core import rag_agent
+    rag_agent.web_search_tool.tool = FakeSearchTool(latency=args.search_latency)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def timed(self, stage: str, coro):
+        started = time.perf_counter()
+        try:
+            response = await coro
+            response.raise_for_status()
+            return response
+        except Exception as e:
+            self.errors[stage] += 1
+            print(f"{stage} failed: {e}", file=sys.stderr)
+            return None
+        finally:
+            self.latencies[stage].append(time.perf_counter() - started)
+
+    def report(self, wall_seconds: float) -> dict:
+        stages = {}
+        for stage, samples in self.latencies.items():
+            values = np.array(samples)
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            stages[stage] = {
+                "count": len(samples),
+                "errors": self.errors[stage],
+                "throughput_per_sec": round(len(samples) / wall_seconds, 2),
+                "mean": round(float(values.mean()), 4),
+                "p50": round(float(p50), 4),
+                "p95": round(float(p95), 4),
+                "p99": round(float(p99), 4),
+            }
+        return {"wall_seconds": round(wall_seconds, 2), "stages": stages}
+
+
+async def first_token(client, url: str, headers: dict, body: dict, recorder: Recorder):
+    """Stream a reply, recording time to first token and to completion"""
+    started = time.perf_counter()
+    try:
+        async with client.stream("POST", url, headers=headers, json=body) as response:
+            response.raise_for_status()
+            seen_token = False
+            async for line in response.aiter_lines():
+                if not seen_token and line == "event: token":
+                    recorder.latencies["chat_first_token"].append(time.perf_counter() - started)
+                    seen_token = True
+                elif line == "event: error":
+                    raise RuntimeError("stream reported an error")
+    except Exception as e:
+        recorder.errors["chat"] += 1
+        print(f"chat failed: {e}", file=sys.stderr)
+    recorder.latencies["chat"].append(time.perf_counter() - started)
+
+
+async def simulated_user(client, index: int, args, recorder: Recorder):
+    await asyncio.sleep(args.ramp_up * index / max(args.users, 1))
+    username = f"bench_{uuid.uuid4().hex[:10]}"
+    password = "benchmark-pass"
+
+    response = await recorder.timed("signup", client.post("/api/auth/signup", json={
+        "username": username, "email": f"{username}@example.com", "password": password,
+    }))
+    if response is None:
+        return
+    response = await recorder.timed("login", client.post("/api/auth/login", data={
+        "username": username, "password": password,
+    }))
+    if response is None:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    response = await recorder.timed("create_session", client.post(
+        "/api/sessions/", headers=headers, json={"title": "Benchmark"}
+    ))
+    if response is None:
+        return
+    session_id = response.json()["id"]
+
+    for turn in range(args.messages):
+        question = QUESTIONS[(index + turn) % len(QUESTIONS)]
+        if args.unique_queries:
+            question = f"{question} (user {index}, turn {turn})"
+        body = {"content": question, "role": "user"}
+        if args.stream:
+            await first_token(client, f"/api/chat/{session_id}/message/stream", headers, body, recorder)
+        else:
+            await recorder.timed("chat", client.post(
+                f"/api/chat/{session_id}/message", headers=headers, json=body
+            ))
+        if args.think_time:
+            await asyncio.sleep(args.think_time)
+
+
+async def run(args) -> dict:
+    import httpx
+    import uvicorn
+    from app.main import app
+    from app.services.llm_registry import llm_registry
+
+    recorder = Recorder()
+    # A real server rather than httpx.ASGITransport, which buffers the whole response
+    # and would make time to first token equal the full reply time
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    try:
+        while not server.started:
+            if serving.done():
+                serving.result()
+                raise RuntimeError("benchmark server exited during startup")
+            await asyncio.sleep(0.05)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=args.timeout, limits=limits
+        ) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*[simulated_user(client, i, args, recorder) for i in range(args.users)])
+            wall_seconds = time.perf_counter() - started
+    finally:
+        server.should_exit = True
+        await serving
+
+    result = recorder.report(wall_seconds)
+    result["config"] = {key: value for key, value in vars(args).items() if key not in ("json", "fail_p95")}
+    result["llm"] = llm_registry.stats()
+    return result
+
+
+def print_report(result: dict):
+    print(f"\n{result['config']['users']} users x {result['config']['messages']} messages "
+          f"in {result['wall_seconds']}s")
+    header = f"{'stage':<18}{'count':>7}{'errors':>8}{'req/s':>9}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}"
+    print(header)
+    print("-" * len(header))
+    for stage, s in result["stages"].items():
+        print(f"{stage:<18}{s['count']:>7}{s['errors']:>8}{s['throughput_per_sec']:>9}"
+              f"{s['mean']:>9.3f}{s['p50']:>9.3f}{s['p95']:>9.3f}{s['p99']:>9.3f}")
+    print("\nLLM calls per profile:")
+    for name, s in result["llm"].items():
+        print(f"  {name:<10} requests={s['requests']} errors={s['errors']}")
+
+
+def check_thresholds(result: dict, thresholds: List[str]) -> List[str]:
+    """'stage=seconds' p95 budgets; returns the ones that were exceeded"""
+    failures = []
+    for threshold in thresholds:
+        stage, limit = threshold.split("=")
+        p95 = result["stages"].get(stage, {}).get("p95")
+        if p95 is None or p95 > float(limit) or result["stages"][stage]["errors"]:
+            failures.append(f"{stage}: p95={p95} budget={limit}")
+    return failures
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline load test for the chat API")
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--messages", type=int, default=3, help="chat messages per user")
+    parser.add_argument("--ramp-up", type=float, default=1.0, help="seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=0.0, help="pause between a user's messages")
+    parser.add_argument("--stream", action="store_true", help="use the SSE endpoint and record time to first token")
+    parser.add_argument("--unique-queries", action="store_true", help="defeat the answer cache and coalescing")
+    parser.add_argument("--no-router", action="store_true", help="disable the intent fast path")
+    parser.add_argument("--llm-latency", type=float, default=0.4)
+    parser.add_argument("--token-latency", type=float, default=0.005)
+    parser.add_argument("--output-tokens", type=int, default=80)
+    parser.add_argument("--embed-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.8)
+    parser.add_argument("--checkpointer", default="memory", choices=["memory", "sqlite", "postgres"])
+    parser.add_argument("--database-url", default="", help="defaults to a scratch SQLite file")
+    parser.add_argument("--workdir", default="", help="defaults to a new temp directory")
+    parser.add_argument("--port", type=int, default=0, help="loopback port to serve on, 0 picks a free one")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", default="", help="write the full report to this file")
+    parser.add_argument("--fail-p95", action="append", default=[], metavar="STAGE=SECONDS",
+                        help="exit non-zero if a stage's p95 exceeds the budget (repeatable)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    configure_environment(args)
+    install_fakes(args)
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+    failures = check_thresholds(result, args.fail_p95)
+    if failures:
+        print("\nLatency budget exceeded:\n  " + "\n  ".join(failures), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Fill sessions.message_count / last_message_at / last_message_preview for existing data.
+
+    cd backend
+    python -m scripts.backfill_session_summaries [--batch-size 500]
+
+Safe to re-run: every value is recomputed from the messages table.
+"""
+import argparse
+from app.database import SessionLocal, ensure_schema
+from app.services.session_summary import backfill_session_summaries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500, help="sessions per transaction")
+    args = parser.parse_args(argv)
+
+    # Adds the summary columns if the API hasn't been started since they were introduced
+    ensure_schema()
+    db = SessionLocal()
+    try:
+        updated = backfill_session_summaries(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Backfilled summaries for {updated} sessions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import os
+import tempfile
+import pytest
+
+# Settings are read at import time; give every required one a throwaway value
+_workdir = tempfile.mkdtemp(prefix="healthagent-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_workdir, 'test.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("GOOGLE_API_KEY", "test")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+os.environ.setdefault("EMBEDDING_CACHE_DIR", os.path.join(_workdir, "embedding_cache"))
+os.environ.setdefault("SEARCH_CACHE_PATH", "")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_workdir, "uploads"))
+# Importing the API modules builds the vector store and agent; keep them off the tracked data
+os.environ.setdefault("CHROMA_DB_DIR", os.path.join(_workdir, "chroma_db"))
+os.environ.setdefault("VECTOR_INDEX_DIR", os.path.join(_workdir, "vector_index"))
+os.environ.setdefault("CHECKPOINT_SQLITE_PATH", os.path.join(_workdir, "checkpoints.sqlite3"))
+
+
+@pytest.fixture
+def db():
+    """Session on a freshly created schema"""
+    from app.database import Base, SessionLocal, engine
+    from app.models import document, message, session, user  # noqa: F401 - register the tables
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+class FakeVectorStoreManager:
+    """In-memory stand-in for VectorStoreManager's ID/metadata operations"""
+
+    def __init__(self, metadatas=None):
+        self.metadatas = dict(metadatas or {})
+        self.collection = self
+
+    def get(self, ids=None, where=None, include=None):
+        matching = [
+            chunk_id for chunk_id, metadata in self.metadatas.items()
+            if (ids is None or chunk_id in ids)
+            and all(metadata.get(key) == value for key, value in (where or {}).items())
+        ]
+        return {"ids": matching}
+
+    def delete_ids(self, ids):
+        for chunk_id in ids:
+            self.metadatas.pop(chunk_id, None)
+
+    def delete_where(self, where):
+        ids = self.get(where=where)["ids"]
+        self.delete_ids(ids)
+        return len(ids)
+
+    def update_metadatas(self, ids, metadatas):
+        for chunk_id, metadata in zip(ids, metadatas):
+            if chunk_id in self.metadatas:
+                self.metadatas[chunk_id] = metadata
+
+    def all_metadatas(self):
+        return dict(self.metadatas)
+
+
+@pytest.fixture
+def vector_store(monkeypatch):
+    from app.services import document_lifecycle
+
+    manager = FakeVectorStoreManager()
+    monkeypatch.setattr(document_lifecycle, "get_vector_store_manager", lambda: manager)
+    return manager
@@ -0,0 +1,109 @@
+import asyncio
+import time
+import pytest
+from app.utils.cache import SingleFlight, TTLCache
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("short", 1, ttl=1)
+    cache.set("default", 2)
+
+    now[0] += 2
+    assert cache.get("short") is None
+    assert cache.get("default") == 2
+    now[0] += 4
+    assert cache.get("default", "gone") == "gone"
+    assert len(cache) == 0
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_ttl_cache_pop_and_clear():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "missing") == "missing"
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_single_flight_collapses_concurrent_calls():
+    flights = SingleFlight()
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["result"] * 5
+    assert len(runs) == 1
+    stats = flights.stats()
+    assert stats["executions"] == 1 and stats["collapsed"] == 4
+    assert stats["max_waiters"] == 5 and stats["in_flight"] == 0
+
+
+def test_single_flight_runs_again_once_finished():
+    flights = SingleFlight()
+    runs = []
+
+    async def fetch():
+        runs.append(1)
+        return len(runs)
+
+    async def main():
+        return [await flights.do("key", fetch), await flights.do("key", fetch)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_single_flight_shares_exceptions():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    errors = asyncio.run(main())
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert flights.stats()["executions"] == 1
+
+
+def test_single_flight_survives_a_cancelled_caller():
+    flights = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.02)
+        return "result"
+
+    async def main():
+        first = asyncio.ensure_future(flights.do("key", fetch))
+        second = asyncio.ensure_future(flights.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "result"
@@ -0,0 +1,48 @@
+import asyncio
+from app.models.message import Message, MessageRole
+from app.models.session import Session as ChatSession
+from app.models.user import User
+from app.schemas.message import MessageCreate
+
+
+class SlowAgent:
+    """Streams a few tokens slowly, like a model mid-answer"""
+
+    async def chat_stream(self, thread_id, user_message):
+        for token in ["Drink ", "plenty ", "of ", "fluids."]:
+            await asyncio.sleep(0.02)
+            yield {"event": "token", "content": token}
+        yield {"event": "final", "content": "Drink plenty of fluids."}
+
+
+def test_reply_is_saved_when_the_client_disconnects(db, monkeypatch):
+    from app.api import chat
+    from app.database import AsyncSessionLocal
+
+    monkeypatch.setattr(chat, "rag_agent", SlowAgent())
+    user = User(username="streamer", email="streamer@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    session = ChatSession(thread_id="stream", user_id=user.id)
+    db.add(session)
+    db.commit()
+
+    async def main():
+        async with AsyncSessionLocal() as request_db:
+            response = await chat.send_message_stream(
+                session.id, MessageCreate(content="I have a fever", role="user"),
+                db=request_db, current_user=user,
+            )
+        first = await response.body_iterator.__anext__()
+        # The client goes away after the first token
+        await response.body_iterator.aclose()
+        await asyncio.gather(*chat._streamed_turns)
+        return first
+
+    first = asyncio.run(main())
+
+    assert first.startswith("event: token")
+    replies = db.query(Message).filter(Message.role == MessageRole.ASSISTANT).all()
+    assert [reply.content for reply in replies] == ["Drink plenty of fluids."]
+    db.refresh(session)
+    assert session.message_count == 2
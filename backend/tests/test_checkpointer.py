@@ -0,0 +1,89 @@
+import asyncio
+import operator
+from typing import Annotated, TypedDict
+import pytest
+from langgraph.graph import END, START, StateGraph
+from app.core import checkpointer
+from app.core.checkpointer import CheckpointerManager
+
+
+class State(TypedDict):
+    messages: Annotated[list, operator.add]
+
+
+def build_graph(saver):
+    graph = StateGraph(State)
+    graph.add_node("reply", lambda state: {"messages": [f"reply {len(state['messages'])}"]})
+    graph.add_edge(START, "reply")
+    graph.add_edge("reply", END)
+    return graph.compile(checkpointer=saver)
+
+
+def config(thread_id):
+    return {"configurable": {"thread_id": thread_id}}
+
+
+async def checkpoint_ids(saver, thread_id):
+    return [c.config["configurable"]["checkpoint_id"] async for c in saver.alist(config(thread_id))]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def manager(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpointer.settings, "CHECKPOINT_SQLITE_PATH", str(tmp_path / "checkpoints.sqlite3"))
+    manager = CheckpointerManager("sqlite:///unused.db")
+    manager.backend = request.param
+    return manager
+
+
+def test_prune_keeps_the_newest_checkpoints_and_the_state(manager):
+    async def main():
+        await manager.open()
+        try:
+            graph = build_graph(manager.saver)
+            for thread_id in ("pruned", "other"):
+                for turn in range(4):
+                    await graph.ainvoke({"messages": [f"{thread_id} {turn}"]}, config(thread_id))
+            before = await checkpoint_ids(manager.saver, "pruned")
+            other_before = await checkpoint_ids(manager.saver, "other")
+
+            await manager.prune("pruned", keep_last=2)
+
+            state = await graph.aget_state(config("pruned"))
+            writes = None
+            if manager.backend == "sqlite":
+                cursor = await manager._sqlite_conn.execute(
+                    "SELECT DISTINCT checkpoint_id FROM writes WHERE thread_id = ?", ("pruned",)
+                )
+                writes = {row[0] for row in await cursor.fetchall()}
+            return (before, await checkpoint_ids(manager.saver, "pruned"), state,
+                    other_before, await checkpoint_ids(manager.saver, "other"), writes)
+        finally:
+            await manager.close()
+
+    before, after, state, other_before, other_after, writes = asyncio.run(main())
+
+    assert len(before) > 2
+    # alist is newest first
+    assert after == before[:2]
+    assert len(state.values["messages"]) == 8
+    assert state.values["messages"][-1] == "reply 7"
+    assert other_after == other_before
+    if writes is not None:
+        assert writes <= set(after)
+
+
+def test_prune_is_a_no_op_when_keeping_everything(manager):
+    async def main():
+        await manager.open()
+        try:
+            graph = build_graph(manager.saver)
+            await graph.ainvoke({"messages": ["hi"]}, config("thread"))
+            before = await checkpoint_ids(manager.saver, "thread")
+            manager.keep_last = 0
+            await manager.prune("thread")
+            return before, await checkpoint_ids(manager.saver, "thread")
+        finally:
+            await manager.close()
+
+    before, after = asyncio.run(main())
+    assert after == before
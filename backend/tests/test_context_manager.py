@@ -0,0 +1,122 @@
+import asyncio
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, SystemMessage, ToolMessage
+from app.config import get_settings
+from app.core import context_manager
+from app.core.context_manager import ContextWindowManager
+
+settings = get_settings()
+
+
+class FakeSummaryLLM:
+    def __init__(self):
+        self.prompts = []
+        self.tags = None
+
+    def with_config(self, tags=None):
+        self.tags = tags
+        return self
+
+    async def ainvoke(self, messages):
+        self.prompts.append(messages)
+        return AIMessage(content="patient has a fever, wants a doctor in Pune")
+
+
+@pytest.fixture
+def summary_llm(monkeypatch):
+    llm = FakeSummaryLLM()
+
+    class Registry:
+        def get(self, name):
+            assert name == "summary"
+            return llm
+
+    monkeypatch.setattr(context_manager, "llm_registry", Registry())
+    return llm
+
+
+def turn(n, tool_output="results"):
+    """One user turn: question, tool call, tool result, answer"""
+    return [
+        HumanMessage(content=f"question {n} " + "x" * 200, id=f"h{n}"),
+        AIMessage(content="", id=f"c{n}", tool_calls=[
+            {"name": "tavily_search", "args": {"query": f"q{n}"}, "id": f"call{n}"},
+        ]),
+        ToolMessage(content=tool_output, tool_call_id=f"call{n}", id=f"t{n}"),
+        AIMessage(content=f"answer {n} " + "y" * 200, id=f"a{n}"),
+    ]
+
+
+def manager(recent_tokens=250, threshold=400):
+    manager = ContextWindowManager("You are a medical assistant.")
+    manager.recent_tokens = recent_tokens
+    manager.summarize_threshold = threshold
+    return manager
+
+
+def test_split_cuts_only_before_a_user_message():
+    history = turn(1) + turn(2) + turn(3)
+
+    older, recent = manager()._split(history)
+
+    assert isinstance(recent[0], HumanMessage)
+    assert older + recent == history
+    # Every tool call keeps its result on the same side of the cut
+    for side in (older, recent):
+        calls = {c["id"] for m in side if isinstance(m, AIMessage) for c in m.tool_calls}
+        results = {m.tool_call_id for m in side if isinstance(m, ToolMessage)}
+        assert calls == results
+
+
+def test_split_keeps_a_single_oversized_turn_whole():
+    history = turn(1, tool_output="z" * 10_000)
+
+    older, recent = manager(recent_tokens=10)._split(history)
+
+    assert older == [] and recent == history
+
+
+def test_compact_folds_older_turns_and_drops_legacy_system_messages(summary_llm):
+    legacy = SystemMessage(content="old stored system prompt", id="s0")
+    history = [legacy] + turn(1, tool_output="r" * 20_000) + turn(2) + turn(3)
+
+    remaining, summary, removals = asyncio.run(manager().compact(history, "earlier summary"))
+
+    assert summary == "patient has a fever, wants a doctor in Pune"
+    assert summary_llm.tags == [context_manager.SUMMARY_TAG]
+    assert isinstance(remaining[0], HumanMessage)
+    assert all(isinstance(r, RemoveMessage) for r in removals)
+    removed = {r.id for r in removals}
+    assert "s0" in removed
+    assert removed == {"s0"} | {m.id for m in history[1:] if m not in remaining}
+
+    transcript = summary_llm.prompts[0][-1].content
+    assert transcript.startswith("Summary so far:\nearlier summary")
+    # The huge tool output reaches the summarizer trimmed, not whole
+    assert "r" * (settings.CONTEXT_TOOL_OUTPUT_MAX_TOKENS * 4) + " ...[truncated]" in transcript
+    assert "r" * (settings.CONTEXT_TOOL_OUTPUT_MAX_TOKENS * 4 + 1) not in transcript
+
+
+def test_compact_below_threshold_only_removes_system_messages(summary_llm):
+    history = [SystemMessage(content="old", id="s0")] + turn(1)
+
+    remaining, summary, removals = asyncio.run(manager(threshold=10_000).compact(history, ""))
+
+    assert remaining == history[1:]
+    assert summary == ""
+    assert [r.id for r in removals] == ["s0"]
+    assert summary_llm.prompts == []
+
+
+def test_build_prompt_trims_tool_outputs():
+    limit = settings.CONTEXT_TOOL_OUTPUT_MAX_TOKENS * 4
+    history = turn(1, tool_output="r" * (limit * 3))
+
+    prompt = manager().build_prompt(history, "the summary")
+
+    assert [type(m) for m in prompt].count(SystemMessage) == 1
+    assert prompt[0].content.endswith("Summary of the earlier conversation:\nthe summary")
+    tool_output = next(m for m in prompt if isinstance(m, ToolMessage))
+    assert tool_output.content == "r" * limit + " ...[truncated]"
+    # The stored message is left untouched
+    assert len(history[2].content) == limit * 3
@@ -0,0 +1,77 @@
+from app.models.document import Document
+from app.services.document_lifecycle import compact_vector_store, orphaned_chunk_ids, remove_document
+
+
+def add_document(db, tmp_path, name, chunks, processed="completed"):
+    path = tmp_path / name
+    path.write_bytes(b"%PDF-1.4")
+    document = Document(
+        filename=name, original_filename=name, file_path=str(path), file_size=8,
+        processed=processed, chunk_hashes=chunks,
+    )
+    db.add(document)
+    db.commit()
+    return document
+
+
+def test_remove_keeps_chunks_other_documents_reference(db, tmp_path, vector_store):
+    first = add_document(db, tmp_path, "a.pdf", ["shared", "only-a"])
+    second = add_document(db, tmp_path, "b.pdf", ["shared", "only-b"])
+    vector_store.metadatas.update({
+        "shared": {"document_id": second.id}, "only-a": {"document_id": first.id},
+        "only-b": {"document_id": second.id},
+    })
+    assert orphaned_chunk_ids(db, first) == ["only-a"]
+
+    remove_document(db, first)
+
+    assert set(vector_store.metadatas) == {"shared", "only-b"}
+    assert not (tmp_path / "a.pdf").exists()
+    assert db.get(Document, first.id) is None
+
+    remove_document(db, second)
+    assert vector_store.metadatas == {}
+
+
+def test_remove_failed_upload_keeps_chunks_it_was_tagged_with(db, tmp_path, vector_store):
+    original = add_document(db, tmp_path, "guide.pdf", ["shared"])
+    failed = add_document(db, tmp_path, "guide-v2.pdf", None, processed="failed")
+    # A failed run tagged a shared chunk and upserted one new chunk before failing
+    vector_store.metadatas.update({
+        "shared": {"document_id": failed.id, "file_path": failed.file_path},
+        "partial": {"document_id": failed.id, "file_path": failed.file_path},
+    })
+
+    remove_document(db, failed)
+
+    assert set(vector_store.metadatas) == {"shared"}
+    assert db.get(Document, original.id) is not None
+
+
+def test_remove_legacy_document_by_file_path(db, tmp_path, vector_store):
+    legacy = add_document(db, tmp_path, "legacy.pdf", None)
+    vector_store.metadatas.update({
+        "uuid-1": {"file_path": legacy.file_path},
+        "uuid-2": {"file_path": "elsewhere.pdf"},
+    })
+
+    remove_document(db, legacy)
+
+    assert set(vector_store.metadatas) == {"uuid-2"}
+
+
+def test_compaction_purges_only_unreferenced_chunks(db, tmp_path, vector_store):
+    kept = add_document(db, tmp_path, "kept.pdf", ["a"])
+    in_progress = add_document(db, tmp_path, "new.pdf", None, processed="processing")
+    vector_store.metadatas.update({
+        "a": {"document_id": kept.id},
+        "b": {"document_id": in_progress.id},
+        "orphan": {"document_id": 999},
+    })
+    vector_store.stats = lambda: {"vectors": len(vector_store.metadatas)}
+    vector_store.vacuum = lambda: None
+
+    report = compact_vector_store(db)
+
+    assert report["purged_vectors"] == 1
+    assert set(vector_store.metadatas) == {"a", "b"}
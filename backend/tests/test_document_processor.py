@@ -0,0 +1,40 @@
+import threading
+import time
+from app.services import document_processor
+
+
+class SlowPool:
+    """Stands in for ProcessPoolExecutor; slow to build so racing callers overlap"""
+
+    created = []
+
+    def __init__(self, **kwargs):
+        time.sleep(0.05)
+        self.shut_down = False
+        SlowPool.created.append(self)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def test_concurrent_callers_share_one_pool_and_shutdown_stops_it(monkeypatch):
+    monkeypatch.setattr(document_processor, "ProcessPoolExecutor", SlowPool)
+    monkeypatch.setattr(document_processor, "_extraction_executor", None)
+    SlowPool.created = []
+    pools = []
+
+    threads = [threading.Thread(target=lambda: pools.append(document_processor._get_extraction_executor()))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(SlowPool.created) == 1
+    assert all(pool is SlowPool.created[0] for pool in pools)
+
+    document_processor.shutdown_extraction_executor()
+    assert SlowPool.created[0].shut_down
+    assert document_processor._extraction_executor is None
+    # Shutting down again, or without a pool, is a no-op
+    document_processor.shutdown_extraction_executor()
@@ -0,0 +1,53 @@
+import asyncio
+from app.services.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(len(text))]
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+def test_hits_do_not_write_until_flushed(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), flush_interval=3600)
+    cache.put_many(["a"], [[1.0]])
+    before = cache._conn.execute("SELECT last_used FROM embeddings").fetchone()[0]
+
+    assert cache.get_many(["a", "missing"]) == [[1.0], None]
+    assert cache._conn.execute("SELECT last_used FROM embeddings").fetchone()[0] == before
+
+    cache.flush()
+    assert cache._conn.execute("SELECT last_used FROM embeddings").fetchone()[0] > before
+
+
+def test_eviction_sees_pending_hits(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=2, flush_interval=3600)
+    cache.put_many(["a", "b"], [[1.0], [2.0]])
+    cache.get_many(["a"])
+    cache.put_many(["c"], [[3.0]])
+
+    assert cache.get_many(["a", "b", "c"]) == [[1.0], None, [3.0]]
+
+
+def test_async_query_uses_cache(tmp_path):
+    upstream = CountingEmbeddings()
+    embeddings = CachedEmbeddings(upstream, "model", EmbeddingCache(str(tmp_path)))
+
+    first = asyncio.run(embeddings.aembed_query("fever"))
+    second = asyncio.run(embeddings.aembed_query("fever"))
+
+    assert first == second == [5.0]
+    assert upstream.calls == 1
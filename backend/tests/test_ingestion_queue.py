@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+import pytest
+from app.models.document import Document
+from app.services.ingestion_queue import IngestionQueue
+
+
+def add_document(db, tmp_path, name, processed, heartbeat_at=None, with_file=True):
+    path = tmp_path / name
+    if with_file:
+        path.write_bytes(b"%PDF-1.4")
+    document = Document(
+        filename=name, original_filename=name, file_path=str(path), file_size=8,
+        processed=processed, heartbeat_at=heartbeat_at,
+    )
+    db.add(document)
+    db.commit()
+    return document.id
+
+
+def test_claim_stale_resumes_abandoned_documents(db, tmp_path):
+    stale = datetime.utcnow() - timedelta(hours=1)
+    abandoned = add_document(db, tmp_path, "abandoned.pdf", "processing", stale)
+    released = add_document(db, tmp_path, "released.pdf", "pending")
+    running = add_document(db, tmp_path, "running.pdf", "processing", datetime.utcnow())
+    done = add_document(db, tmp_path, "done.pdf", "completed", stale)
+    missing = add_document(db, tmp_path, "missing.pdf", "processing", stale, with_file=False)
+
+    claimed = IngestionQueue._claim_stale()
+
+    assert sorted(document_id for document_id, _, _ in claimed) == sorted([abandoned, released])
+    db.expire_all()
+    assert db.get(Document, running).processed == "processing"
+    assert db.get(Document, done).processed == "completed"
+    assert db.get(Document, missing).processed == "failed"
+    # Claimed rows now carry a fresh heartbeat, so a second worker does not take them too
+    assert IngestionQueue._claim_stale() == []
+
+
+def test_release_hands_unfinished_documents_back(db, tmp_path):
+    running = add_document(db, tmp_path, "running.pdf", "processing", datetime.utcnow())
+    done = add_document(db, tmp_path, "done.pdf", "completed", datetime.utcnow())
+
+    IngestionQueue._release([running, done])
+
+    db.expire_all()
+    assert (db.get(Document, running).processed, db.get(Document, running).heartbeat_at) == ("pending", None)
+    assert db.get(Document, done).processed == "completed"
+    assert [document_id for document_id, _, _ in IngestionQueue._claim_stale()] == [running]
+
+
+def test_is_ingesting_covers_other_workers(db, tmp_path):
+    queue = IngestionQueue()
+    local = add_document(db, tmp_path, "local.pdf", "pending")
+    remote = add_document(db, tmp_path, "remote.pdf", "processing", datetime.utcnow())
+    abandoned = add_document(db, tmp_path, "abandoned.pdf", "processing", datetime.utcnow() - timedelta(hours=1))
+    done = add_document(db, tmp_path, "done.pdf", "completed", datetime.utcnow())
+    queue._active.add(local)
+
+    assert [queue.is_ingesting(db.get(Document, document_id)) for document_id in (local, remote, abandoned, done)] \
+        == [True, True, False, False]
+
+
+def test_complete_purges_vectors_of_a_document_deleted_mid_ingestion(db, tmp_path, vector_store):
+    kept = add_document(db, tmp_path, "kept.pdf", "completed")
+    db.get(Document, kept).chunk_hashes = ["shared"]
+    db.commit()
+    deleted = add_document(db, tmp_path, "deleted.pdf", "processing", datetime.utcnow())
+    vector_store.metadatas.update({
+        "shared": {"document_id": deleted}, "new": {"document_id": deleted}, "other": {"document_id": kept},
+    })
+    db.delete(db.get(Document, deleted))
+    db.commit()
+
+    with pytest.raises(Exception, match="deleted during processing"):
+        IngestionQueue._complete_document(deleted, ["shared", "new"], [], [])
+
+    assert set(vector_store.metadatas) == {"shared", "other"}
+
+
+def test_delete_is_rejected_while_ingesting(db, tmp_path, vector_store):
+    from fastapi import HTTPException
+    from app.api import admin
+
+    running = add_document(db, tmp_path, "running.pdf", "processing", datetime.utcnow())
+
+    with pytest.raises(HTTPException) as error:
+        admin.delete_document(running, db=db, current_user=None)
+    assert error.value.status_code == 409
+    assert db.get(Document, running) is not None
@@ -0,0 +1,58 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from app.core.intent_router import BOOKING, MEDICAL_INFO, PROVIDER_SEARCH, ROUTE_ID_PREFIX, IntentRouter
+
+ROUTES = {MEDICAL_INFO: "medical_assistant_rag", PROVIDER_SEARCH: "tavily_search"}
+
+
+@pytest.fixture(scope="module")
+def router():
+    return IntentRouter(ROUTES, min_confidence=0.8)
+
+
+@pytest.mark.parametrize("text", [
+    "what is your name",
+    "what is the weather today",
+    "what are your working hours",
+    "how can i contact support",
+    "how do i change my email address",
+    "what is the capital of france",
+    "hello, what can you help me with?",
+])
+def test_small_talk_is_not_routed(router, text):
+    assert router.route([HumanMessage(content=text)]) is None
+
+
+@pytest.mark.parametrize("text", [
+    "What are the symptoms of dengue fever?",
+    "How is type 2 diabetes treated?",
+    "what are the side effects of paracetamol",
+    "how can i prevent high blood pressure",
+])
+def test_medical_questions_route_to_rag(router, text):
+    message = router.route([HumanMessage(content=text)])
+
+    assert message is not None
+    call = message.tool_calls[0]
+    assert call["name"] == "medical_assistant_rag"
+    assert call["args"] == {"query": text}
+    assert call["id"].startswith(ROUTE_ID_PREFIX)
+
+
+def test_provider_search_needs_a_city(router):
+    assert router.route([HumanMessage(content="find a cardiologist near me")]) is None
+    message = router.route([HumanMessage(content="find a cardiologist in pune")])
+    assert message.tool_calls[0]["name"] == "tavily_search"
+
+
+def test_booking_always_defers_to_the_agent(router):
+    assert router.classify("book an appointment for dengue treatment")[0] == BOOKING
+    assert router.route([HumanMessage(content="book an appointment for dengue treatment")]) is None
+
+
+def test_answers_to_the_assistant_defer_to_the_agent(router):
+    messages = [
+        AIMessage(content="Which city are you in?"),
+        HumanMessage(content="what are the symptoms of flu"),
+    ]
+    assert router.route(messages) is None
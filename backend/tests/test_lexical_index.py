@@ -0,0 +1,62 @@
+from app.services.lexical_index import LexicalIndex, reciprocal_rank_fusion, tokenize
+
+
+def build_index():
+    index = LexicalIndex()
+    index.add(
+        ["dengue", "diabetes", "dosage"],
+        [
+            "Dengue fever causes high fever and joint pain",
+            "Type 2 diabetes is treated with metformin",
+            "Paracetamol 500mg dosage for adults with fever",
+        ],
+        [{"source": "a.pdf"}, {"source": "b.pdf"}, {"source": "c.pdf"}],
+    )
+    return index
+
+
+def test_tokenize_keeps_codes_and_dosages():
+    assert tokenize("Take 500mg for COVID-19 (E11.9)") == ["take", "500mg", "for", "covid-19", "e11.9"]
+
+
+def test_search_ranks_by_bm25():
+    index = build_index()
+    hits = index.search("dengue fever", k=3)
+
+    assert [doc_id for doc_id, _ in hits] == ["dengue", "dosage"]
+    assert hits[0][1] > hits[1][1]
+    assert index.covers("dengue fever", "dengue")
+    assert not index.covers("dengue fever", "dosage")
+
+
+def test_add_replaces_and_remove_drops_postings():
+    index = build_index()
+    index.add(["dengue"], ["Malaria is spread by mosquitoes"])
+    assert index.search("dengue") == []
+    assert [doc_id for doc_id, _ in index.search("malaria")] == ["dengue"]
+
+    index.remove(["dengue", "unknown"])
+    assert len(index) == 2
+    assert index.search("malaria") == []
+
+
+def test_get_skips_removed_chunks():
+    index = build_index()
+    hits = [doc_id for doc_id, _ in index.search("fever", k=3)]
+    index.remove(["dengue"])
+
+    found = index.get(hits)
+    assert set(found) == {"dosage"}
+    assert found["dosage"] == ("Paracetamol 500mg dosage for adults with fever", {"source": "c.pdf"})
+
+
+def test_update_metadata_only_touches_indexed_chunks():
+    index = build_index()
+    index.update_metadata(["diabetes", "unknown"], [{"source": "new.pdf"}, {"source": "x"}])
+    assert index.get(["diabetes", "unknown"]) == {
+        "diabetes": ("Type 2 diabetes is treated with metformin", {"source": "new.pdf"})
+    }
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    assert reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60) == ["b", "a", "d", "c"]
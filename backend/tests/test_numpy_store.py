@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+from app.services.numpy_store import NumpyVectorStore
+
+
+class UnitEmbeddings:
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = np.zeros(4, dtype=np.float32)
+        vector[len(text) % 4] = 1.0
+        return vector.tolist()
+
+
+def vector(*values):
+    return list(values)
+
+
+@pytest.fixture(params=[False, True], ids=["float32", "int8"])
+def store(request, tmp_path):
+    return NumpyVectorStore(str(tmp_path), UnitEmbeddings(), quantize=request.param)
+
+
+def test_upsert_and_search(store):
+    store.upsert(
+        ids=["a", "b", "c"],
+        embeddings=[vector(1, 0, 0, 0), vector(0, 1, 0, 0), vector(0.9, 0.1, 0, 0)],
+        documents=["alpha", "beta", "gamma"],
+        metadatas=[{"document_id": 1}, {"document_id": 2}, None],
+    )
+
+    results = store.similarity_search_by_vector_with_score(vector(1, 0, 0, 0), k=2)
+    assert [doc.id for doc, _ in results] == ["a", "c"]
+    assert results[0][1] == pytest.approx(1.0, abs=0.01)
+    assert store.count() == 3
+    assert store.get(ids=["c", "missing"])["metadatas"] == [{}]
+
+
+def test_upsert_replaces_existing_ids(store):
+    store.upsert(ids=["a"], embeddings=[vector(1, 0, 0, 0)], documents=["old"])
+    store.upsert(ids=["a", "b"], embeddings=[vector(0, 0, 1, 0), vector(0, 1, 0, 0)], documents=["new", "b"])
+
+    assert store.count() == 2
+    assert store.get(ids=["a"])["documents"] == ["new"]
+    top = store.similarity_search_by_vector(vector(0, 0, 1, 0), k=3)
+    assert [doc.id for doc in top] == ["a", "b"]
+
+
+def test_appends_write_only_the_new_batch(store, tmp_path):
+    store.upsert(ids=["a"], embeddings=[vector(1, 0, 0, 0)], documents=["a"])
+    store.upsert(ids=["b", "c"], embeddings=[vector(0, 1, 0, 0), vector(0, 0, 1, 0)], documents=["b", "c"])
+    first = list(store._manifest["segments"])
+    store.upsert(ids=["d"], embeddings=[vector(0, 0, 0, 1)], documents=["d"])
+
+    # The earlier, larger segment is left as is
+    assert store._manifest["segments"][0] == first[0]
+    assert len(store._manifest["segments"]) == 2
+    assert store.count() == 4
+
+
+def test_segment_count_stays_logarithmic(store):
+    for i in range(64):
+        store.upsert(ids=[f"id{i}"], embeddings=[vector(1, i, 0, 0)], documents=[str(i)])
+
+    assert store.count() == 64
+    assert len(store._manifest["segments"]) <= 7
+    assert store.get(ids=["id0", "id63"])["documents"] == ["0", "63"]
+
+
+def test_update_patches_metadata_without_rewriting_vectors(store, tmp_path):
+    store.upsert(ids=["a", "b"], embeddings=[vector(1, 0, 0, 0), vector(0, 1, 0, 0)], documents=["a", "b"],
+                 metadatas=[{"document_id": 1}, {"document_id": 1}])
+    segments = list(store._manifest["segments"])
+
+    store.update(ids=["a", "missing"], metadatas=[{"document_id": 2}, {"document_id": 3}])
+
+    assert store._manifest["segments"] == segments
+    assert store.get(where={"document_id": 2})["ids"] == ["a"]
+    assert store.similarity_search_by_vector(vector(1, 0, 0, 0), k=1)[0].metadata == {"document_id": 2}
+    # A fresh reader sees the patch too
+    reader = NumpyVectorStore(str(tmp_path), UnitEmbeddings())
+    assert reader.get(ids=["a"])["metadatas"] == [{"document_id": 2}]
+
+
+def test_upsert_after_update_wins(store):
+    store.upsert(ids=["a"], embeddings=[vector(1, 0, 0, 0)], documents=["a"], metadatas=[{"v": 1}])
+    store.update(ids=["a"], metadatas=[{"v": 2}])
+    store.upsert(ids=["a"], embeddings=[vector(1, 0, 0, 0)], documents=["a"], metadatas=[{"v": 3}])
+
+    assert store.get(ids=["a"])["metadatas"] == [{"v": 3}]
+
+
+def test_delete_by_id_and_where(store):
+    store.upsert(
+        ids=["a", "b", "c"],
+        embeddings=[vector(1, 0, 0, 0), vector(0, 1, 0, 0), vector(0, 0, 1, 0)],
+        documents=["a", "b", "c"],
+        metadatas=[{"file_path": "x"}, {"file_path": "y"}, {"file_path": "x"}],
+    )
+
+    store.delete(ids=["b"])
+    store.delete(where={"file_path": "x"})
+
+    assert store.count() == 0
+    assert store.similarity_search_by_vector(vector(1, 0, 0, 0), k=3) == []
+
+
+def test_vacuum_folds_segments_and_removes_unused_files(store, tmp_path):
+    for i in range(5):
+        store.upsert(ids=[f"id{i}"], embeddings=[vector(1, i, 0, 0)], documents=[str(i)], metadatas=[{"i": i}])
+    store.update(ids=["id1"], metadatas=[{"i": 10}])
+    store.delete(ids=["id2"])
+    (tmp_path / "vectors.f32-1").write_bytes(b"stale")
+
+    store.vacuum()
+
+    manifest = store._manifest
+    assert len(manifest["segments"]) == 1
+    assert manifest["segments"][0]["deleted"] == []
+    assert manifest["patches"] == []
+    assert store.get()["ids"] == ["id0", "id1", "id3", "id4"]
+    assert store.get(ids=["id1"])["metadatas"] == [{"i": 10}]
+    files = {path.name for path in tmp_path.iterdir()}
+    assert files == {"manifest.json", ".lock"} | {
+        name for name in files if name.startswith(manifest["segments"][0]["name"])
+    }
+    assert len(files) == (5 if store.quantize else 4)
+
+
+def test_reads_single_matrix_layout(tmp_path):
+    np.array([[1, 0], [0, 1]], dtype=np.float32).tofile(tmp_path / "vectors.f32-3")
+    (tmp_path / "records.json-3").write_text('{"ids": ["a", "b"], "documents": ["a", "b"], "metadatas": [{}, {}]}')
+    (tmp_path / "manifest.json").write_text('{"version": 3, "count": 2, "dim": 2, "dtype": "float32"}')
+
+    store = NumpyVectorStore(str(tmp_path), UnitEmbeddings())
+    assert store.count() == 2
+    store.upsert(ids=["c"], embeddings=[[1, 1]], documents=["c"])
+    store.delete(ids=["a"])
+    store.vacuum()
+
+    assert store.get()["ids"] == ["b", "c"]
+    assert not (tmp_path / "vectors.f32-3").exists()
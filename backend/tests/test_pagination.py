@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException, Response
+from app.utils.pagination import cursor_headers, decode_cursor, encode_cursor
+
+T0 = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def test_cursor_round_trip():
+    timestamp = datetime(2024, 5, 6, 7, 8, 9, 123456)
+    cursor = encode_cursor(timestamp, 42)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (timestamp, 42)
+    assert decode_cursor(None) is None
+    assert decode_cursor("") is None
+
+
+def test_malformed_cursor_raises_value_error():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_cursor_headers_at_page_boundaries():
+    oldest, newest = (T0, 1), (T0 + timedelta(minutes=1), 2)
+
+    # First page: older rows only if the query overflowed
+    assert set(cursor_headers(oldest, newest, True, False, False)) == {"X-Before-Cursor"}
+    assert cursor_headers(oldest, newest, False, False, False) == {}
+    # Paging backwards: newer rows exist by construction
+    assert set(cursor_headers(oldest, newest, False, True, False)) == {"X-After-Cursor"}
+    assert set(cursor_headers(oldest, newest, True, True, False)) == {"X-Before-Cursor", "X-After-Cursor"}
+    # Paging forwards: older rows exist by construction
+    assert set(cursor_headers(oldest, newest, False, False, True)) == {"X-Before-Cursor"}
+    assert cursor_headers(oldest, newest, True, False, True) == {
+        "X-Before-Cursor": encode_cursor(*oldest),
+        "X-After-Cursor": encode_cursor(*newest),
+    }
+
+
+@pytest.fixture
+def user(db):
+    from app.models.user import User
+
+    user = User(username="pager", email="pager@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user
+
+
+async def _page(endpoint, *args, user, before=None, after=None, limit=2):
+    """(items, X-Before-Cursor, X-After-Cursor) from calling the endpoint directly"""
+    from app.database import AsyncSessionLocal
+
+    response = Response()
+    async with AsyncSessionLocal() as session:
+        items = await endpoint(
+            *args, response=response, before=before, after=after, limit=limit, db=session,
+            current_user=user,
+        )
+    return items, response.headers.get("X-Before-Cursor"), response.headers.get("X-After-Cursor")
+
+
+def _walk(endpoint, *args, user):
+    """Pages from the default page to the oldest, then back to the newest"""
+    async def walk():
+        backwards = [await _page(endpoint, *args, user=user)]
+        while backwards[-1][1]:
+            backwards.append(await _page(endpoint, *args, user=user, before=backwards[-1][1]))
+        forwards = [backwards[-1]]
+        while forwards[-1][2]:
+            forwards.append(await _page(endpoint, *args, user=user, after=forwards[-1][2]))
+        return backwards, forwards
+    return asyncio.run(walk())
+
+
+def test_sessions_pages_cover_every_row_once(db, user):
+    from app.api.sessions import list_sessions
+    from app.models.session import Session as ChatSession
+
+    # Two sessions share an updated_at, so the id tiebreak decides their order
+    stamps = [T0, T0 + timedelta(minutes=1), T0 + timedelta(minutes=1), T0 + timedelta(minutes=2),
+              T0 + timedelta(minutes=3)]
+    for i, stamp in enumerate(stamps):
+        db.add(ChatSession(thread_id=f"t{i}", user_id=user.id, title=f"chat {i}",
+                           created_at=stamp, updated_at=stamp))
+    db.commit()
+
+    backwards, forwards = _walk(list_sessions, user=user)
+
+    newest_first = [s.title for s in db.query(ChatSession).order_by(
+        ChatSession.updated_at.desc(), ChatSession.id.desc())]
+    assert [s.title for items, _, _ in backwards for s in items] == newest_first
+    assert [len(items) for items, _, _ in backwards] == [2, 2, 1]
+    # The first page has nothing newer and the last nothing older
+    assert backwards[0][2] is None and backwards[-1][1] is None
+    assert [s.title for items, _, _ in reversed(forwards) for s in items] == newest_first
+
+
+def test_messages_pages_are_chronological(db, user):
+    from app.api.chat import get_messages
+    from app.models.message import Message, MessageRole
+    from app.models.session import Session as ChatSession
+
+    chat = ChatSession(thread_id="messages", user_id=user.id)
+    db.add(chat)
+    db.commit()
+    for i in range(5):
+        db.add(Message(session_id=chat.id, role=MessageRole.USER, content=f"m{i}",
+                       created_at=T0 + timedelta(seconds=i // 2)))
+    db.commit()
+
+    backwards, forwards = _walk(get_messages, chat.id, user=user)
+
+    # Default page is the latest one, oldest first within it
+    assert [m.content for m in backwards[0][0]] == ["m3", "m4"]
+    assert [m.content for items, _, _ in reversed(backwards) for m in items] == [f"m{i}" for i in range(5)]
+    assert [m.content for items, _, _ in forwards for m in items] == [f"m{i}" for i in range(5)]
+    assert forwards[-1][2] is None
+
+
+def test_bad_cursor_is_a_400(db, user):
+    from app.api.sessions import list_sessions
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(_page(list_sessions, user=user, before="garbage"))
+    assert error.value.status_code == 400
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+import pytest
+from fastapi import HTTPException
+from app.core.security import PasswordHashPool
+
+
+def blocked_until(event: threading.Event):
+    def fn():
+        event.wait(5)
+        return "hashed"
+    return fn
+
+
+async def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_full_pool_fails_fast_with_retry_after():
+    pool = PasswordHashPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(pool.run("hash", blocked_until(release)))
+        queued = asyncio.ensure_future(pool.run("hash", blocked_until(release)))
+        await wait_until(lambda: pool.pending == 2)
+
+        with pytest.raises(HTTPException) as error:
+            await pool.run("verify", blocked_until(release))
+        release.set()
+        return error.value, await asyncio.gather(running, queued)
+
+    error, results = asyncio.run(main())
+
+    assert error.status_code == 503
+    assert "Retry-After" in error.headers
+    assert results == ["hashed", "hashed"]
+    assert pool.pending == 0
+
+
+def test_cancelled_caller_keeps_its_slot_until_bcrypt_finishes():
+    pool = PasswordHashPool(workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def main():
+        caller = asyncio.ensure_future(pool.run("verify", blocked_until(release)))
+        await wait_until(lambda: pool.pending == 1)
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+
+        # The thread is still hashing, so there is still no room
+        assert pool.pending == 1
+        with pytest.raises(HTTPException):
+            await pool.run("verify", blocked_until(release))
+
+        release.set()
+        await wait_until(lambda: pool.pending == 0)
+        return await pool.run("verify", lambda: "free again")
+
+    assert asyncio.run(main()) == "free again"
+
+
+def test_cancelled_queued_call_frees_its_slot():
+    pool = PasswordHashPool(workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def main():
+        running = asyncio.ensure_future(pool.run("hash", blocked_until(release)))
+        queued = asyncio.ensure_future(pool.run("hash", blocked_until(release)))
+        await wait_until(lambda: pool.pending == 2)
+        queued.cancel()
+        # Never started, so dropping it from the queue gives the slot back
+        await wait_until(lambda: pool.pending == 1)
+        release.set()
+        return await running
+
+    assert asyncio.run(main()) == "hashed"
+    assert pool.pending == 0
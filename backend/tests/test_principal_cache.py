@@ -0,0 +1,47 @@
+from app.core.security import Principal, principal_cache
+from app.models.user import User
+
+
+def cached_user(db, username="alice"):
+    user = User(username=username, email=f"{username}@example.com", hashed_password="x")
+    db.add(user)
+    db.commit()
+    principal_cache.set(username, Principal.from_user(user))
+    return user
+
+
+def test_eviction_waits_for_commit(db):
+    user = cached_user(db)
+
+    user.is_active = False
+    db.flush()
+    # Not committed yet: other requests still see (and may cache) the active row
+    assert principal_cache.get("alice") is not None
+
+    db.commit()
+    assert principal_cache.get("alice") is None
+
+
+def test_rolled_back_change_keeps_the_cache(db):
+    user = cached_user(db)
+
+    user.is_admin = True
+    db.flush()
+    db.rollback()
+
+    assert principal_cache.get("alice").is_admin is False
+
+
+def test_rename_and_delete_evict_every_username(db):
+    user = cached_user(db)
+    principal_cache.set("bob", "stale")
+
+    user.username = "bob"
+    db.commit()
+    assert principal_cache.get("alice") is None
+    assert principal_cache.get("bob") is None
+
+    principal_cache.set("bob", "stale")
+    db.delete(user)
+    db.commit()
+    assert principal_cache.get("bob") is None
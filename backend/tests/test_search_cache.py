@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+import pytest
+from langchain_core.tools import BaseTool
+from app.services.search_cache import CachedSearchTool, SearchResultStore, search_key
+from app.utils.cache import TTLCache
+
+
+def test_rephrasings_share_a_key():
+    assert search_key("Find the best cardiologist in Pune")[:2] == search_key("cardiologist pune")[:2] == ("cardiologist", "pune")
+
+
+def test_trailing_place_words_are_not_cities():
+    assert search_key("find a cardiologist near me")[1] == ""
+    assert search_key("dermatologist in nagpur")[1] == "nagpur"
+
+
+class CountingSearch(BaseTool):
+    name: str = "search"
+    description: str = "Numbered results so refetches are visible"
+    calls: int = 0
+
+    def _run(self, query: str) -> str:
+        self.calls += 1
+        return f"{query} #{self.calls}"
+
+    async def _arun(self, query: str) -> str:
+        return self._run(query)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    return now
+
+
+def _cached(tool, store=None):
+    return CachedSearchTool(
+        name=tool.name, description=tool.description, args_schema=tool.args_schema, tool=tool,
+        ttl=10, stale_ttl=100, cache=TTLCache(maxsize=16, ttl=110), store=store,
+    )
+
+
+def test_fresh_entries_skip_the_tool(clock):
+    tool = CountingSearch()
+    cached = _cached(tool)
+
+    async def main():
+        return [await cached.ainvoke({"query": "cardiologist pune"}),
+                await cached.ainvoke({"query": "best cardiologist in Pune"})]
+
+    assert asyncio.run(main()) == ["cardiologist pune #1"] * 2
+    assert tool.calls == 1
+
+
+def test_stale_entries_are_served_while_refreshing(clock):
+    tool = CountingSearch()
+    cached = _cached(tool)
+
+    async def main():
+        await cached.ainvoke({"query": "dentist mumbai"})
+        clock[0] += 20  # past ttl, inside the stale window
+        stale = await cached.ainvoke({"query": "dentist mumbai"})
+        await asyncio.gather(*cached._refreshing.values())
+        return stale, await cached.ainvoke({"query": "dentist mumbai"})
+
+    assert asyncio.run(main()) == ("dentist mumbai #1", "dentist mumbai #2")
+    assert cached.refreshed == 1
+
+
+def test_expired_entries_are_fetched_again(clock):
+    tool = CountingSearch()
+    cached = _cached(tool)
+
+    async def main():
+        await cached.ainvoke({"query": "dentist mumbai"})
+        clock[0] += 200  # past ttl + stale_ttl
+        return await cached.ainvoke({"query": "dentist mumbai"})
+
+    assert asyncio.run(main()) == "dentist mumbai #2"
+    assert cached.refreshed == 0
+
+
+def test_disk_store_survives_a_restart(clock, tmp_path):
+    path = str(tmp_path / "search.sqlite3")
+    tool = CountingSearch()
+
+    async def lookup(cached):
+        return await cached.ainvoke({"query": "hospital delhi"})
+
+    assert asyncio.run(lookup(_cached(tool, SearchResultStore(path)))) == "hospital delhi #1"
+    # A new process: empty memory cache, same file
+    assert asyncio.run(lookup(_cached(tool, SearchResultStore(path)))) == "hospital delhi #1"
+    assert tool.calls == 1
+
+    clock[0] += 200
+    assert asyncio.run(lookup(_cached(tool, SearchResultStore(path)))) == "hospital delhi #2"
+
+
+class ThreadRecordingStore(SearchResultStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.threads = set()
+
+    def get(self, key):
+        self.threads.add(threading.current_thread())
+        return super().get(key)
+
+    def set(self, key, fetched_at, value):
+        self.threads.add(threading.current_thread())
+        super().set(key, fetched_at, value)
+
+
+def test_async_path_keeps_sqlite_off_the_event_loop(clock, tmp_path):
+    store = ThreadRecordingStore(str(tmp_path / "search.sqlite3"))
+    cached = _cached(CountingSearch(), store)
+
+    asyncio.run(cached.ainvoke({"query": "clinic goa"}))
+
+    assert store.threads and threading.main_thread() not in store.threads
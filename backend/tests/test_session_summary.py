@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+from app.models.message import Message, MessageRole
+from app.models.session import Session as ChatSession
+from app.models.user import User
+from app.services.session_summary import PREVIEW_LENGTH, backfill_session_summaries, record_message
+
+T0 = datetime(2024, 1, 1, 12, 0, 0)
+
+
+def _session(db, thread_id):
+    user = db.query(User).first()
+    if user is None:
+        user = User(username="summary", email="summary@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+    session = ChatSession(thread_id=thread_id, user_id=user.id, created_at=T0, updated_at=T0)
+    db.add(session)
+    db.commit()
+    return session
+
+
+def test_record_message_bumps_summary(db):
+    session = _session(db, "record")
+    long_reply = "x" * (PREVIEW_LENGTH + 50)
+
+    db.execute(record_message(session.id, "hello", T0 + timedelta(minutes=1)))
+    db.execute(record_message(session.id, long_reply, T0 + timedelta(minutes=2)))
+    db.commit()
+    db.refresh(session)
+
+    assert session.message_count == 2
+    assert session.last_message_at == T0 + timedelta(minutes=2)
+    assert session.last_message_preview == long_reply[:PREVIEW_LENGTH]
+    assert session.updated_at == T0 + timedelta(minutes=2)
+
+
+def test_backfill_recomputes_from_messages(db):
+    sessions = [_session(db, f"backfill-{i}") for i in range(3)]
+    # Same created_at for the last two: the higher id is the latest message
+    for content, seconds in [("first", 0), ("tie-a", 10), ("tie-b", 10)]:
+        db.add(Message(session_id=sessions[0].id, role=MessageRole.USER, content=content,
+                       created_at=T0 + timedelta(seconds=seconds)))
+    db.add(Message(session_id=sessions[2].id, role=MessageRole.ASSISTANT, content="only",
+                   created_at=T0 + timedelta(minutes=5)))
+    sessions[1].message_count = 7  # stale value with no messages behind it
+    sessions[1].updated_at = T0  # explicit, or the ORM's onupdate would move it
+    db.commit()
+
+    assert backfill_session_summaries(db, batch_size=2) == 3
+
+    for session in sessions:
+        db.refresh(session)
+    assert (sessions[0].message_count, sessions[0].last_message_preview) == (3, "tie-b")
+    assert sessions[0].last_message_at == T0 + timedelta(seconds=10)
+    assert (sessions[1].message_count, sessions[1].last_message_at) == (0, None)
+    assert (sessions[2].message_count, sessions[2].last_message_preview) == (1, "only")
+    # updated_at orders the sidebar and must not move
+    assert all(session.updated_at == T0 for session in sessions)
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+from app.models.document import Document
+from app.services.ingestion_queue import IngestionQueue
+
+
+def add_document(db, tmp_path, name, processed, uploaded_at, chunks):
+    path = tmp_path / f"{len(list(tmp_path.iterdir()))}-{name}"
+    path.write_bytes(b"%PDF-1.4")
+    document = Document(
+        filename=path.name, original_filename=name, file_path=str(path), file_size=8,
+        processed=processed, uploaded_at=uploaded_at, chunk_hashes=chunks,
+    )
+    db.add(document)
+    db.commit()
+    return document.id
+
+
+def test_supersede_only_removes_older_completed_versions(db, tmp_path, vector_store):
+    now = datetime.utcnow()
+    old = add_document(db, tmp_path, "guidelines.pdf", "completed", now - timedelta(days=2), ["shared", "old"])
+    in_flight = add_document(db, tmp_path, "guidelines.pdf", "processing", now - timedelta(days=1), None)
+    other = add_document(db, tmp_path, "other.pdf", "completed", now - timedelta(days=3), ["x"])
+    new = add_document(db, tmp_path, "guidelines.pdf", "completed", now, ["shared", "new"])
+    vector_store.metadatas.update({
+        "shared": {"document_id": new}, "old": {"document_id": old},
+        "new": {"document_id": new}, "x": {"document_id": other},
+    })
+
+    assert IngestionQueue._supersede_previous_versions(new) == 1
+
+    db.expire_all()
+    assert db.get(Document, old) is None
+    assert db.get(Document, in_flight) is not None
+    assert db.get(Document, other) is not None
+    assert set(vector_store.metadatas) == {"shared", "new", "x"}
@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import pytest
+from starlette.requests import Request
+from app.services.document_processor import DocumentProcessor, FileTooLargeError, InvalidUploadError
+
+BOUNDARY = "testboundary"
+
+
+def multipart_body(filename: str, content: bytes, field: str = "file") -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="note"\r\n\r\n'
+        f"ignored\r\n"
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: application/pdf\r\n\r\n"
+    ).encode() + content + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+class StreamedRequest:
+    """ASGI receive callable that serves the body in small chunks and counts what was read"""
+
+    def __init__(self, body: bytes, chunk_size: int = 1024, content_type: str = None):
+        self.chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+        self.sent = 0
+        content_type = content_type or f"multipart/form-data; boundary={BOUNDARY}"
+        self.request = Request(
+            {"type": "http", "method": "POST", "headers": [(b"content-type", content_type.encode())]},
+            self.receive,
+        )
+
+    async def receive(self):
+        chunk = self.chunks[self.sent] if self.sent < len(self.chunks) else b""
+        self.sent += 1
+        return {"type": "http.request", "body": chunk, "more_body": self.sent < len(self.chunks)}
+
+
+@pytest.fixture
+def processor(tmp_path):
+    processor = DocumentProcessor()
+    processor.upload_dir = tmp_path
+    return processor
+
+
+def test_saves_file_field_with_hash_and_size(processor, tmp_path):
+    content = b"%PDF-1.4 " + bytes(range(256)) * 40
+    stream = StreamedRequest(multipart_body("Guidelines.PDF", content))
+
+    upload = asyncio.run(processor.save_upload(stream.request, max_size=len(content)))
+
+    assert upload.original_filename == "Guidelines.PDF"
+    assert upload.content_type == "application/pdf"
+    assert upload.size == len(content)
+    assert upload.content_hash == hashlib.sha256(content).hexdigest()
+    assert upload.filename.endswith(".PDF")
+    assert [path.name for path in tmp_path.iterdir()] == [upload.filename]
+    assert (tmp_path / upload.filename).read_bytes() == content
+
+
+def test_oversized_upload_stops_reading_at_the_limit(processor, tmp_path):
+    stream = StreamedRequest(multipart_body("big.pdf", b"x" * 100_000))
+
+    with pytest.raises(FileTooLargeError):
+        asyncio.run(processor.save_upload(stream.request, max_size=10_000))
+
+    assert stream.sent < len(stream.chunks) // 2
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rejects_other_file_types_before_reading_them(processor, tmp_path):
+    stream = StreamedRequest(multipart_body("notes.txt", b"x" * 100_000))
+
+    with pytest.raises(InvalidUploadError):
+        asyncio.run(processor.save_upload(stream.request, max_size=1_000_000))
+
+    assert stream.sent < 3
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_rejects_requests_without_a_file(processor):
+    missing_field = StreamedRequest(multipart_body("a.pdf", b"data", field="attachment"))
+    with pytest.raises(InvalidUploadError):
+        asyncio.run(processor.save_upload(missing_field.request, max_size=1000))
+
+    not_multipart = StreamedRequest(b"{}", content_type="application/json")
+    with pytest.raises(InvalidUploadError):
+        asyncio.run(processor.save_upload(not_multipart.request, max_size=1000))
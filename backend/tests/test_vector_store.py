@@ -0,0 +1,56 @@
+import asyncio
+import pytest
+from langchain_core.documents import Document
+from app.services.lexical_index import LexicalIndex
+from app.services.vector_store import VectorStoreManager
+
+
+class FailingEmbeddings:
+    """Fails the batch containing "bad"; every other batch takes a while"""
+
+    async def aembed_documents(self, texts):
+        if "bad" in texts:
+            raise RuntimeError("quota exceeded")
+        await asyncio.sleep(0.05)
+        return [[1.0] for _ in texts]
+
+
+class RecordingCollection:
+    def __init__(self):
+        self.ids = []
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.ids.extend(ids)
+
+    def count(self):
+        return len(self.ids)
+
+
+def _manager():
+    manager = VectorStoreManager.__new__(VectorStoreManager)
+    manager.embeddings = FailingEmbeddings()
+    manager.collection = RecordingCollection()
+    manager.lexical_index = LexicalIndex()
+    return manager
+
+
+def test_failed_batch_stops_the_others():
+    manager = _manager()
+    documents = [Document(page_content=text, metadata={"document_id": 1})
+                 for text in ["bad", "a", "b", "c", "d", "e", "f", "g", "h"]]
+    progress = []
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await manager.aadd_documents_batched(
+                documents, ids=[str(i) for i in range(len(documents))], batch_size=1,
+                max_concurrency=4, max_retries=0, progress_callback=progress.append,
+            )
+        # Anything still running would land well within this window
+        await asyncio.sleep(0.2)
+
+    asyncio.run(main())
+
+    assert manager.collection.count() == 0
+    assert len(manager.lexical_index) == 0
+    assert progress == []
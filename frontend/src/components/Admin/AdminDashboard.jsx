@@ -47,6 +47,8 @@ const AdminDashboard = () => {
         setDeleteConfirm(null)
       } catch (error) {
         console.error('Failed to delete document:', error)
+        // 409 while the document is still being indexed
+        alert(error.response?.data?.detail || 'Failed to delete document')
       }
     } else {
       setDeleteConfirm(documentId)
@@ -1,5 +1,14 @@
-import React, { useState, useRef } from 'react'
-import { Upload, FileText, X, CheckCircle, AlertCircle } from 'lucide-react'
+import React, { useState, useRef, useEffect } from 'react'
+import { Upload, FileText, X, CheckCircle, AlertCircle, Loader2 } from 'lucide-react'
+
+const JOB_POLL_INTERVAL_MS = 1500
+
+// "embed 40%" for the stage a job is in, from GET /api/admin/jobs/{id}
+const describeJob = (job) => {
+  const stage = job.stages?.find(s => s.status === 'running')
+  if (!stage) return job.status
+  return stage.total ? `${stage.name} ${Math.round(stage.progress * 100)}%` : stage.name
+}
 
 const DocumentUpload = ({ onUploadComplete }) => {
   const [selectedFile, setSelectedFile] = useState(null)
@@ -7,7 +16,11 @@ const DocumentUpload = ({ onUploadComplete }) => {
   const [progress, setProgress] = useState(0)
   const [error, setError] = useState('')
   const [success, setSuccess] = useState(false)
+  const [processing, setProcessing] = useState('')
   const fileInputRef = useRef(null)
+  const unmounted = useRef(false)
+
+  useEffect(() => () => { unmounted.current = true }, [])
 
   const MAX_FILE_SIZE = 100 * 1024 * 1024 // 100MB
 
@@ -55,11 +68,20 @@ const DocumentUpload = ({ onUploadComplete }) => {
 
     try {
       const { adminAPI } = await import('../../services/api')
-      await adminAPI.uploadDocument(selectedFile, (percent) => {
+      const document = await adminAPI.uploadDocument(selectedFile, (percent) => {
         setProgress(percent)
       })
 
-      setSuccess(true)
+      // The upload returns before indexing; follow the job until it settles
+      let job = { status: document.processed, stages: [] }
+      while (!['completed', 'failed'].includes(job.status)) {
+        setProcessing(describeJob(job))
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS))
+        if (unmounted.current) return
+        job = await adminAPI.getJob(document.id)
+      }
+      setProcessing('')
+
       setSelectedFile(null)
       setProgress(0)
       
@@ -70,11 +92,15 @@ const DocumentUpload = ({ onUploadComplete }) => {
 
       // Notify parent component
       if (onUploadComplete) {
-        setTimeout(() => {
-          onUploadComplete()
-        }, 1000)
+        onUploadComplete()
       }
 
+      if (job.status === 'failed') {
+        setError(job.error || 'Processing failed. Please try again.')
+        return
+      }
+      setSuccess(true)
+
       // Clear success message after 3 seconds
       setTimeout(() => {
         setSuccess(false)
@@ -82,6 +108,7 @@ const DocumentUpload = ({ onUploadComplete }) => {
     } catch (err) {
       setError(err.response?.data?.detail || 'Upload failed. Please try again.')
       setProgress(0)
+      setProcessing('')
     } finally {
       setUploading(false)
     }
@@ -118,6 +145,13 @@ const DocumentUpload = ({ onUploadComplete }) => {
         </div>
       )}
 
+      {processing && (
+        <div className="upload-message info">
+          <Loader2 size={18} className="spin" />
+          <span>Processing document: {processing}</span>
+        </div>
+      )}
+
       {success && (
         <div className="upload-message success">
           <CheckCircle size={18} />
@@ -182,7 +216,7 @@ const DocumentUpload = ({ onUploadComplete }) => {
             onClick={handleUpload}
             disabled={uploading}
           >
-            {uploading ? 'Uploading...' : 'Upload Document'}
+            {processing ? 'Processing...' : uploading ? 'Uploading...' : 'Upload Document'}
           </button>
         </>
       )}
@@ -8,6 +8,8 @@ const ChatArea = ({ session, onUpdateTitle, sidebarCollapsed }) => {
   const [messages, setMessages] = useState([])
   const [loading, setLoading] = useState(false)
   const [sending, setSending] = useState(false)
+  const [olderCursor, setOlderCursor] = useState(null)
+  const [loadingOlder, setLoadingOlder] = useState(false)
 
   useEffect(() => {
     if (session) {
@@ -20,8 +22,9 @@ const ChatArea = ({ session, onUpdateTitle, sidebarCollapsed }) => {
     
     setLoading(true)
     try {
-      const data = await chatAPI.getMessages(session.id)
-      setMessages(data)
+      const { items, before } = await chatAPI.getMessagesPage(session.id)
+      setMessages(items)
+      setOlderCursor(before)
     } catch (error) {
       console.error('Failed to load messages:', error)
     } finally {
@@ -29,6 +32,31 @@ const ChatArea = ({ session, onUpdateTitle, sidebarCollapsed }) => {
     }
   }
 
+  const loadOlderMessages = async () => {
+    if (!session || !olderCursor || loadingOlder) return
+    
+    setLoadingOlder(true)
+    try {
+      const { items, before } = await chatAPI.getMessagesPage(session.id, { before: olderCursor })
+      setMessages(current => [...items, ...current])
+      setOlderCursor(before)
+    } catch (error) {
+      console.error('Failed to load older messages:', error)
+    } finally {
+      setLoadingOlder(false)
+    }
+  }
+
+  // Re-reads the latest page without dropping older pages already loaded
+  const refreshLatestMessages = async () => {
+    const { items } = await chatAPI.getMessagesPage(session.id)
+    const latest = new Set(items.map(m => m.id))
+    setMessages(current => [
+      ...current.filter(m => !m.pending && !latest.has(m.id)),
+      ...items,
+    ])
+  }
+
   const handleSendMessage = async (content) => {
     if (!session || !content.trim()) return
 
@@ -40,14 +68,31 @@ const ChatArea = ({ session, onUpdateTitle, sidebarCollapsed }) => {
       role: 'user',
       content: content,
       created_at: new Date().toISOString(),
+      pending: true,
+    }
+    // Filled in token by token as the reply streams
+    const replyMessage = {
+      id: `reply-${userMessage.id}`,
+      role: 'assistant',
+      content: '',
+      created_at: new Date().toISOString(),
+      pending: true,
     }
-    setMessages([...messages, userMessage])
+    setMessages([...messages, userMessage, replyMessage])
 
     try {
-      const response = await chatAPI.sendMessage(session.id, content)
+      await chatAPI.sendMessageStream(session.id, content, (event, data) => {
+        if (event === 'token') {
+          setMessages(current => current.map(m =>
+            m.id === replyMessage.id ? { ...m, content: m.content + data.content } : m
+          ))
+        } else if (event === 'error') {
+          throw new Error(data.detail)
+        }
+      })
       
       // Reload messages to get the complete conversation
-      await loadMessages()
+      await refreshLatestMessages()
       
       // Update session title if it's the first message
       if (messages.length === 0) {
@@ -91,7 +136,12 @@ const ChatArea = ({ session, onUpdateTitle, sidebarCollapsed }) => {
         </div>
       ) : (
         <>
-          <MessageList messages={messages} />
+          <MessageList
+            messages={messages}
+            hasOlder={Boolean(olderCursor)}
+            loadingOlder={loadingOlder}
+            onLoadOlder={loadOlderMessages}
+          />
           <MessageInput onSend={handleSendMessage} disabled={sending} />
         </>
       )}
@@ -10,6 +10,8 @@ const ChatLayout = () => {
   const [sessions, setSessions] = useState([])
   const [currentSession, setCurrentSession] = useState(null)
   const [loading, setLoading] = useState(true)
+  const [olderSessionsCursor, setOlderSessionsCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [sidebarCollapsed, setSidebarCollapsed] = useState(false)
 
   useEffect(() => {
@@ -18,8 +20,9 @@ const ChatLayout = () => {
 
   const loadSessions = async () => {
     try {
-      const data = await sessionAPI.getSessions()
+      const { items: data, before } = await sessionAPI.getSessionsPage()
       setSessions(data)
+      setOlderSessionsCursor(before)
       
       // If no sessions, create a new one
       if (data.length === 0) {
@@ -35,6 +38,25 @@ const ChatLayout = () => {
     }
   }
 
+  const loadMoreSessions = async () => {
+    if (!olderSessionsCursor || loadingMore) return
+    
+    setLoadingMore(true)
+    try {
+      const { items, before } = await sessionAPI.getSessionsPage({ before: olderSessionsCursor })
+      // A session touched since the first page may show up again further down
+      setSessions(current => [
+        ...current,
+        ...items.filter(s => !current.some(existing => existing.id === s.id)),
+      ])
+      setOlderSessionsCursor(before)
+    } catch (error) {
+      console.error('Failed to load more sessions:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
   const handleNewChat = async () => {
     try {
       const newSession = await sessionAPI.createSession()
@@ -95,6 +117,9 @@ const ChatLayout = () => {
         onNewChat={handleNewChat}
         onSelectSession={handleSelectSession}
         onDeleteSession={handleDeleteSession}
+        hasMore={Boolean(olderSessionsCursor)}
+        loadingMore={loadingMore}
+        onLoadMore={loadMoreSessions}
         collapsed={sidebarCollapsed}
         onToggleCollapse={() => setSidebarCollapsed(!sidebarCollapsed)}
       />
@@ -3,12 +3,14 @@ import { User, Bot } from 'lucide-react'
 import ReactMarkdown from 'react-markdown'
 import { format } from 'date-fns'
 
-const MessageList = ({ messages }) => {
+const MessageList = ({ messages, hasOlder, loadingOlder, onLoadOlder }) => {
   const messagesEndRef = useRef(null)
+  const lastMessageId = messages[messages.length - 1]?.id
 
+  // Only new messages at the bottom scroll; prepending older ones keeps the view
   useEffect(() => {
     scrollToBottom()
-  }, [messages])
+  }, [lastMessageId])
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
@@ -37,6 +39,15 @@ const MessageList = ({ messages }) => {
   return (
     <div className="messages-container">
       <div className="messages-list">
+        {hasOlder && (
+          <button
+            className="load-more-btn"
+            onClick={onLoadOlder}
+            disabled={loadingOlder}
+          >
+            {loadingOlder ? 'Loading...' : 'Load earlier messages'}
+          </button>
+        )}
         {messages.map((message) => (
           <div
             key={message.id}
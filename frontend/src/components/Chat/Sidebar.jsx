@@ -19,6 +19,9 @@ const Sidebar = ({
   onNewChat,
   onSelectSession,
   onDeleteSession,
+  hasMore,
+  loadingMore,
+  onLoadMore,
   collapsed,
   onToggleCollapse,
 }) => {
@@ -111,6 +114,15 @@ const Sidebar = ({
             </div>
           ))
         )}
+        {hasMore && (
+          <button
+            className="load-more-btn"
+            onClick={onLoadMore}
+            disabled={loadingMore}
+          >
+            {loadingMore ? 'Loading...' : 'Load more chats'}
+          </button>
+        )}
       </div>
 
       <div className="sidebar-footer">
@@ -37,6 +37,14 @@ api.interceptors.response.use(
   }
 )
 
+// Keyset-paginated responses: before / after are the X-Before-Cursor /
+// X-After-Cursor cursors of the older / newer pages, null when there are none
+const toPage = (response) => ({
+  items: response.data,
+  before: response.headers['x-before-cursor'] || null,
+  after: response.headers['x-after-cursor'] || null,
+})
+
 // Auth API
 export const authAPI = {
   login: async (credentials) => {
@@ -70,11 +78,19 @@ export const sessionAPI = {
     return response.data
   },
   
-  getSessions: async () => {
-    const response = await api.get('/api/sessions/')
+  // params: { before, after, limit }; the X-Before-Cursor / X-After-Cursor
+  // response headers hold the cursors of the neighbouring pages
+  getSessions: async (params = {}) => {
+    const response = await api.get('/api/sessions/', { params })
     return response.data
   },
   
+  // Same as getSessions, resolving to { items, before, after }
+  getSessionsPage: async (params = {}) => {
+    const response = await api.get('/api/sessions/', { params })
+    return toPage(response)
+  },
+  
   getSession: async (sessionId) => {
     const response = await api.get(`/api/sessions/${sessionId}`)
     return response.data
@@ -103,10 +119,54 @@ export const chatAPI = {
     return response.data
   },
   
-  getMessages: async (sessionId) => {
-    const response = await api.get(`/api/chat/${sessionId}/messages`)
+  // Streams server-sent events; onEvent(event, data) fires for token, tool_start,
+  // tool_end, done and error. Resolves with the saved assistant message.
+  sendMessageStream: async (sessionId, content, onEvent) => {
+    const response = await fetch(`${API_BASE_URL}/api/chat/${sessionId}/message/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Authorization: `Bearer ${localStorage.getItem('token')}`,
+      },
+      body: JSON.stringify({ content, role: 'user' }),
+    })
+    if (!response.ok) {
+      throw new Error(`Request failed with status ${response.status}`)
+    }
+    
+    const reader = response.body.getReader()
+    const decoder = new TextDecoder()
+    let buffer = ''
+    let savedMessage = null
+    while (true) {
+      const { value, done } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      const frames = buffer.split('\n\n')
+      buffer = frames.pop()
+      for (const frame of frames) {
+        const event = frame.match(/^event: (.*)$/m)?.[1]
+        const data = frame.match(/^data: (.*)$/m)?.[1]
+        if (!event || !data) continue
+        const payload = JSON.parse(data)
+        if (event === 'done') savedMessage = payload
+        if (onEvent) onEvent(event, payload)
+      }
+    }
+    return savedMessage
+  },
+  
+  // Latest page by default; pass { before: cursor } for older messages
+  getMessages: async (sessionId, params = {}) => {
+    const response = await api.get(`/api/chat/${sessionId}/messages`, { params })
     return response.data
   },
+  
+  // Same as getMessages, resolving to { items, before, after }
+  getMessagesPage: async (sessionId, params = {}) => {
+    const response = await api.get(`/api/chat/${sessionId}/messages`, { params })
+    return toPage(response)
+  },
 }
 
 // Admin API
@@ -138,6 +198,11 @@ export const adminAPI = {
     const response = await api.delete(`/api/admin/documents/${documentId}`)
     return response.data
   },
+  
+  getJob: async (jobId) => {
+    const response = await api.get(`/api/admin/jobs/${jobId}`)
+    return response.data
+  },
 }
 
 export default api